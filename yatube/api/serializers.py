@@ -0,0 +1,156 @@
+"""Сериализация для JSON API.
+
+Списки и объекты читаются через ``values()`` сразу в словари, без
+создания экземпляров моделей. Клиент выбирает поля параметром
+``?fields=`` и подгружает связанные объекты параметром ``?include=``:
+авторы, группы и последние комментарии добираются одним запросом на всю
+страницу.
+"""
+from django.core.files.storage import default_storage
+from django.db.models import OuterRef, Subquery
+
+from posts.models import Comment, Group, User
+
+# Имя поля в ответе -> поле для values().
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+GROUP_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'slug': 'slug',
+    'description': 'description',
+}
+USER_FIELDS = ('id', 'username', 'first_name', 'last_name')
+POST_INCLUDES = ('author', 'group', 'comments')
+
+MEDIA_FIELDS = ('image',)
+DEFAULT_COMMENTS = 3
+MAX_COMMENTS = 20
+
+
+class ApiError(Exception):
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def parse_list(request, name, allowed, default):
+    """Список через запятую из параметра ``name``, проверенный по allowed."""
+    raw = request.GET.get(name)
+    if not raw:
+        return list(default)
+    values = [value.strip() for value in raw.split(',') if value.strip()]
+    unknown = [value for value in values if value not in allowed]
+    if unknown:
+        raise ApiError(
+            f'Неизвестные значения {name}: {", ".join(unknown)}. '
+            f'Допустимо: {", ".join(allowed)}.'
+        )
+    return values
+
+
+def parse_int(request, name, default, maximum):
+    try:
+        value = int(request.GET.get(name, default))
+    except ValueError:
+        raise ApiError(f'{name} должно быть числом.')
+    return max(0, min(value, maximum))
+
+
+def columns(fields, mapping, required=()):
+    """Поля для values(): выбранные клиентом и нужные для курсора."""
+    selected = [mapping[field] for field in fields]
+    return list(dict.fromkeys(selected + list(required)))
+
+
+def rename(row, fields, mapping):
+    data = {field: row[mapping[field]] for field in fields}
+    for field in MEDIA_FIELDS:
+        if field in data:
+            data[field] = (
+                default_storage.url(data[field]) if data[field] else None
+            )
+    return data
+
+
+def latest_comments(post_ids, limit, fields):
+    """Последние ``limit`` комментариев каждого поста одним запросом."""
+    if not post_ids or not limit:
+        return {}
+    newest = Comment.objects.filter(
+        post=OuterRef('post')
+    ).order_by('-created', '-pk').values('pk')[:limit]
+    rows = Comment.objects.filter(
+        post_id__in=post_ids, pk__in=Subquery(newest)
+    ).order_by('post_id', '-created', '-pk').values(
+        *columns(fields, COMMENT_FIELDS, ['post_id'])
+    )
+    comments = {}
+    for row in rows:
+        comments.setdefault(row['post_id'], []).append(
+            rename(row, fields, COMMENT_FIELDS)
+        )
+    return comments
+
+
+def related(model, ids, fields):
+    if not ids:
+        return {}
+    return {
+        row['id']: row
+        for row in model.objects.filter(pk__in=set(ids)).values(*fields)
+    }
+
+
+def serialize_posts(rows, fields, includes, comments_limit):
+    """Посты из values() с подгрузкой связанных объектов пачкой."""
+    rows = list(rows)
+    authors = groups = comments = {}
+    if 'author' in includes:
+        authors = related(
+            User, [row['author_id'] for row in rows], USER_FIELDS
+        )
+    if 'group' in includes:
+        groups = related(
+            Group, [row['group_id'] for row in rows if row['group_id']],
+            tuple(GROUP_FIELDS)
+        )
+    if 'comments' in includes:
+        comments = latest_comments(
+            [row['id'] for row in rows], comments_limit,
+            list(COMMENT_FIELDS)
+        )
+    result = []
+    for row in rows:
+        data = rename(row, fields, POST_FIELDS)
+        if 'author' in includes:
+            data['author'] = authors.get(row['author_id'])
+        if 'group' in includes:
+            data['group'] = groups.get(row['group_id'])
+        if 'comments' in includes:
+            data['comments'] = comments.get(row['id'], [])
+        result.append(data)
+    return result
+
+
+def post_columns(fields, includes):
+    required = ['id', 'pub_date']
+    if 'author' in includes:
+        required.append('author_id')
+    if 'group' in includes:
+        required.append('group_id')
+    return columns(fields, POST_FIELDS, required)
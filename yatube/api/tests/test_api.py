@@ -0,0 +1,159 @@
+import json
+from urllib.parse import urlencode
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='ilya')
+        cls.reader = User.objects.create_user(username='fiji')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        for i in range(12):
+            cls.post = Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {i}'
+            )
+        for i in range(5):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f'Комментарий {i}'
+            )
+
+    def send(self, method, url, data):
+        return getattr(self.client, method)(
+            url, json.dumps(data), content_type='application/json'
+        )
+
+    def test_posts_cursor_pagination(self):
+        """Список постов листается курсором без повторов."""
+        url = reverse('api:posts')
+        first = self.client.get(url).json()
+        self.assertEqual(len(first['results']), 10)
+        self.assertIsNone(first['previous'])
+        second = self.client.get(url, {'cursor': first['next']}).json()
+        self.assertEqual(len(second['results']), 2)
+        self.assertIsNone(second['next'])
+        ids = [post['id'] for post in first['results'] + second['results']]
+        self.assertEqual(
+            ids, list(Post.objects.values_list('pk', flat=True))
+        )
+
+    def test_sparse_fields_and_includes(self):
+        """Выбор полей и подгрузка автора, группы и комментариев."""
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('api:posts'), {
+                'fields': 'id,text',
+                'include': 'author,group,comments',
+                'comments': 2,
+                'limit': 3,
+            })
+        post = response.json()['results'][0]
+        self.assertEqual(
+            set(post), {'id', 'text', 'author', 'group', 'comments'}
+        )
+        self.assertEqual(post['author']['username'], 'ilya')
+        self.assertEqual(post['group']['slug'], 'group')
+        self.assertEqual(
+            [comment['text'] for comment in post['comments']],
+            ['Комментарий 4', 'Комментарий 3']
+        )
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse('api:posts'), {'fields': 'secret'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_post_write(self):
+        """Создавать посты могут авторизованные, править — только автор."""
+        url = reverse('api:posts')
+        data = {'text': 'Из API', 'group': 'group'}
+        self.assertEqual(self.send('post', url, data).status_code, 401)
+
+        self.client.force_login(self.reader)
+        response = self.send('post', url, data)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['author'], 'fiji')
+        self.assertEqual(response.json()['group'], 'group')
+
+        detail = reverse('api:post_detail', kwargs={'post_id': self.post.pk})
+        self.assertEqual(
+            self.send('patch', detail, {'text': 'Чужой'}).status_code, 403
+        )
+        self.client.force_login(self.author)
+        response = self.send('patch', detail, {'text': 'Правка'})
+        self.assertEqual(response.json()['text'], 'Правка')
+        self.assertEqual(response.json()['group'], 'group')
+        self.assertEqual(self.client.delete(detail).status_code, 204)
+        self.assertEqual(self.client.get(detail).status_code, 404)
+
+    def test_patch_form(self):
+        """PATCH формой меняет пост, тело другого типа отклоняется."""
+        post = Post.objects.create(author=self.author, text='Черновик')
+        detail = reverse('api:post_detail', kwargs={'post_id': post.pk})
+        self.client.force_login(self.author)
+        response = self.client.patch(
+            detail, urlencode({'text': 'Правка формой'}),
+            content_type='application/x-www-form-urlencoded'
+        )
+        self.assertEqual(response.json()['text'], 'Правка формой')
+        response = self.client.patch(
+            detail, 'text=x', content_type='text/plain'
+        )
+        self.assertEqual(response.status_code, 415)
+
+    def test_csrf_enforced_with_json_errors(self):
+        """Запись без CSRF-токена получает JSON 403, с токеном проходит."""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.reader)
+        url = reverse('api:posts')
+        data = json.dumps({'text': 'Из API'})
+        response = client.post(url, data, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('detail', response.json())
+        client.get(reverse('login'))
+        token = client.cookies['csrftoken'].value
+        response = client.post(
+            url, data, content_type='application/json',
+            HTTP_X_CSRFTOKEN=token
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_comments(self):
+        url = reverse('api:comments', kwargs={'post_id': self.post.pk})
+        response = self.client.get(url, {'limit': 3}).json()
+        self.assertEqual(len(response['results']), 3)
+        self.client.force_login(self.reader)
+        response = self.send('post', url, {'text': 'Новый'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['post'], self.post.pk)
+        self.assertEqual(self.send('post', url, {}).status_code, 400)
+
+    def test_groups(self):
+        response = self.client.get(reverse('api:groups'), {'fields': 'slug'})
+        self.assertEqual(response.json(), {'results': [{'slug': 'group'}]})
+        response = self.client.get(
+            reverse('api:group_detail', kwargs={'slug': 'group'})
+        )
+        self.assertEqual(response.json()['title'], 'Группа')
+
+    def test_follows(self):
+        url = reverse('api:follows')
+        self.client.force_login(self.reader)
+        self.assertEqual(
+            self.send('post', url, {'author': 'ilya'}).status_code, 201
+        )
+        self.assertEqual(
+            self.send('post', url, {'author': 'fiji'}).status_code, 400
+        )
+        self.assertEqual(
+            self.client.get(url).json(), {'results': [{'author': 'ilya'}]}
+        )
+        detail = reverse('api:follow_detail', kwargs={'username': 'ilya'})
+        self.assertEqual(self.client.delete(detail).status_code, 204)
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(self.client.put(detail).status_code, 405)
@@ -0,0 +1,293 @@
+import json
+from functools import wraps
+
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse, JsonResponse, QueryDict
+from django.middleware.csrf import CsrfViewMiddleware
+from django.shortcuts import get_object_or_404
+from django.views.decorators.csrf import csrf_exempt
+
+from core.ratelimit import rate_limited
+from posts import thumbnails
+from posts.forms import CommentForm, PostForm
+from posts.models import Comment, Follow, Group, Post, User
+from posts.utils import COMMENTS_PER_PAGE, POSTS_PER_PAGE, CursorPaginator
+
+from .serializers import (
+    COMMENT_FIELDS, DEFAULT_COMMENTS, GROUP_FIELDS, MAX_COMMENTS,
+    POST_FIELDS, POST_INCLUDES, ApiError, columns, parse_int, parse_list,
+    post_columns, rename, serialize_posts
+)
+
+MAX_PAGE_SIZE = 100
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+FORM_CONTENT_TYPE = 'application/x-www-form-urlencoded'
+
+csrf = CsrfViewMiddleware()
+
+
+def json_response(data, status=200):
+    return JsonResponse(
+        data, status=status, safe=False,
+        json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def csrf_rejected(request):
+    """Отклонила бы запрос проверка CSRF сайта."""
+    return csrf.process_view(request, None, (), {}) is not None
+
+
+def api_view(*methods):
+    """Допустимые методы и ошибки в виде JSON вместо HTML-страниц.
+
+    CSRF проверяется здесь же, а не в middleware: иначе клиент без токена
+    получил бы HTML-страницу отказа.
+    """
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                response = json_response(
+                    {'detail': f'Метод {request.method} не поддерживается.'},
+                    status=405
+                )
+                response['Allow'] = ', '.join(methods)
+                return response
+            if request.method not in SAFE_METHODS and csrf_rejected(request):
+                return json_response({
+                    'detail': 'Нет CSRF-токена: передайте значение cookie '
+                              'csrftoken в заголовке X-CSRFToken.'
+                }, 403)
+            try:
+                return view(request, *args, **kwargs)
+            except ApiError as error:
+                return json_response({'detail': error.detail}, error.status)
+            except Http404:
+                return json_response({'detail': 'Не найдено.'}, 404)
+            except PermissionDenied:
+                return json_response({'detail': 'Недостаточно прав.'}, 403)
+        return wrapper
+    return decorator
+
+
+def throttled(request, retry_after):
+    response = json_response(
+        {'detail': 'Слишком много запросов, попробуйте позже.'}, 429
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def require_user(request):
+    if not request.user.is_authenticated:
+        raise ApiError('Требуется авторизация.', 401)
+
+
+def request_data(request):
+    """Тело запроса: JSON или обычная форма.
+
+    Django разбирает форму только у POST, у PATCH она читается из тела.
+    """
+    if request.content_type != 'application/json':
+        if request.method == 'POST':
+            return request.POST.dict()
+        if request.content_type == FORM_CONTENT_TYPE:
+            return QueryDict(request.body, encoding=request.encoding).dict()
+        raise ApiError(
+            f'Ожидается application/json или {FORM_CONTENT_TYPE}.', 415
+        )
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ApiError('Некорректный JSON.')
+    if not isinstance(data, dict):
+        raise ApiError('Ожидается JSON-объект.')
+    return data
+
+
+def page_size(request, default):
+    return parse_int(request, 'limit', default, MAX_PAGE_SIZE) or default
+
+
+def cursor_response(page, results):
+    return json_response({
+        'results': results,
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+def post_options(request):
+    fields = parse_list(request, 'fields', POST_FIELDS, POST_FIELDS)
+    includes = parse_list(request, 'include', POST_INCLUDES, ())
+    comments = parse_int(request, 'comments', DEFAULT_COMMENTS, MAX_COMMENTS)
+    return fields, includes, comments
+
+
+def post_data(request, post_id, status=200):
+    fields, includes, comments = post_options(request)
+    rows = Post.objects.filter(pk=post_id).values(
+        *post_columns(fields, includes)
+    )
+    if not rows:
+        raise Http404
+    return json_response(
+        serialize_posts(rows, fields, includes, comments)[0], status
+    )
+
+
+def post_form_data(data, post=None):
+    """Данные для PostForm: группа по slug, при PATCH — текущие значения."""
+    form_data = {}
+    if post is not None:
+        form_data = {'text': post.text, 'group': post.group_id}
+    form_data.update(data)
+    slug = data.get('group')
+    if slug:
+        group = Group.objects.filter(slug=slug).values_list(
+            'pk', flat=True
+        ).first()
+        if group is None:
+            raise ApiError({'group': [f'Группы {slug} не существует.']})
+        form_data['group'] = group
+    return form_data
+
+
+def save_post(request, post=None):
+    form = PostForm(
+        post_form_data(request_data(request), post),
+        files=request.FILES or None,
+        instance=post
+    )
+    if not form.is_valid():
+        raise ApiError(form.errors.get_json_data())
+    post = form.save(commit=False)
+    if post.author_id is None:
+        post.author = request.user
+    post.save()
+    if 'image' in form.changed_data:
+        thumbnails.schedule(post)
+    return post
+
+
+@api_view('GET', 'POST')
+@rate_limited(respond=throttled)
+def posts(request):
+    if request.method == 'POST':
+        require_user(request)
+        return post_data(request, save_post(request).pk, status=201)
+    queryset = Post.objects.all()
+    if request.GET.get('group'):
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        queryset = queryset.filter(author__username=request.GET['author'])
+    fields, includes, comments = post_options(request)
+    paginator = CursorPaginator(
+        queryset.values(*post_columns(fields, includes)),
+        page_size(request, POSTS_PER_PAGE)
+    )
+    page = paginator.cursor_page(request.GET.get('cursor'))
+    return cursor_response(
+        page, serialize_posts(page.object_list, fields, includes, comments)
+    )
+
+
+@api_view('GET', 'PATCH', 'DELETE')
+def post_detail(request, post_id):
+    if request.method == 'GET':
+        return post_data(request, post_id)
+    require_user(request)
+    post = get_object_or_404(Post, pk=post_id)
+    if post.author_id != request.user.pk:
+        raise PermissionDenied
+    if request.method == 'DELETE':
+        post.delete()
+        return HttpResponse(status=204)
+    save_post(request, post)
+    return post_data(request, post_id)
+
+
+@api_view('GET', 'POST')
+@rate_limited(respond=throttled)
+def comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    fields = parse_list(request, 'fields', COMMENT_FIELDS, COMMENT_FIELDS)
+    if request.method == 'POST':
+        require_user(request)
+        form = CommentForm(request_data(request))
+        if not form.is_valid():
+            raise ApiError(form.errors.get_json_data())
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post_id = post_id
+        comment.save()
+        row = Comment.objects.filter(pk=comment.pk).values(
+            *columns(fields, COMMENT_FIELDS)
+        ).get()
+        return json_response(rename(row, fields, COMMENT_FIELDS), 201)
+    paginator = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).values(
+            *columns(fields, COMMENT_FIELDS, ['id', 'created'])
+        ),
+        page_size(request, COMMENTS_PER_PAGE),
+        key='created'
+    )
+    page = paginator.cursor_page(request.GET.get('cursor'))
+    return cursor_response(page, [
+        rename(row, fields, COMMENT_FIELDS) for row in page.object_list
+    ])
+
+
+@api_view('GET')
+def groups(request):
+    fields = parse_list(request, 'fields', GROUP_FIELDS, GROUP_FIELDS)
+    rows = Group.objects.order_by('title').values(
+        *columns(fields, GROUP_FIELDS)
+    )
+    return json_response({
+        'results': [rename(row, fields, GROUP_FIELDS) for row in rows]
+    })
+
+
+@api_view('GET')
+def group_detail(request, slug):
+    fields = parse_list(request, 'fields', GROUP_FIELDS, GROUP_FIELDS)
+    row = Group.objects.filter(slug=slug).values(
+        *columns(fields, GROUP_FIELDS)
+    ).first()
+    if row is None:
+        raise Http404
+    return json_response(rename(row, fields, GROUP_FIELDS))
+
+
+@api_view('GET', 'POST')
+@rate_limited(respond=throttled)
+def follows(request):
+    require_user(request)
+    if request.method == 'POST':
+        username = request_data(request).get('author')
+        author = get_object_or_404(User, username=username)
+        if author == request.user:
+            raise ApiError('Нельзя подписаться на самого себя.')
+        Follow.objects.get_or_create(user=request.user, author=author)
+        return json_response({'author': author.username}, 201)
+    authors = Follow.objects.filter(user=request.user).order_by(
+        'author__username'
+    ).values_list('author__username', flat=True)
+    return json_response({
+        'results': [{'author': author} for author in authors]
+    })
+
+
+@api_view('DELETE')
+def follow_detail(request, username):
+    require_user(request)
+    deleted, _ = Follow.objects.filter(
+        user=request.user, author__username=username
+    ).delete()
+    if not deleted:
+        raise Http404
+    return HttpResponse(status=204)
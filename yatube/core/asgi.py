@@ -0,0 +1,205 @@
+"""ASGI-приложение поверх WSGI-обработчика Django.
+
+Django 2.2 не умеет ни ASGI, ни асинхронные view, поэтому view
+по-прежнему синхронные, но выполняются в пуле из ``ASGI_THREADS``
+потоков, как это делал бы ``sync_to_async``. Тело запроса читается, а
+ответ отдаётся клиенту в цикле событий, так что медленный клиент или
+долгое соединение не держат поток пула: поток занят только на время
+работы view.
+
+Обычный ответ собирается целиком в потоке пула. Потоковый ответ
+(``StreamingHttpResponse``, ``FileResponse``) читается по кускам в
+отдельном потоке этого ответа: генераторы могут держать курсор БД,
+который нельзя передавать между потоками. Одновременно открыто не больше
+``ASGI_STREAMS`` потоковых ответов, сверх этого клиент получает 503.
+Пока ответ отдаётся, приложение ждёт ``http.disconnect`` и при отключении
+клиента сразу закрывает ответ, освобождая его поток.
+"""
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+BODY_MEMORY_SIZE = 1024 * 1024
+
+
+def environ_for(scope, body):
+    """WSGI environ для HTTP-соединения ASGI."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin1'),
+        'PATH_INFO': scope['path'].encode().decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'REMOTE_ADDR': str(client[0]),
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1').upper().replace('-', '_')
+        value = value.decode('latin1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            # Повторные заголовки склеиваются через запятую, кроме Cookie:
+            # HTTP/2 шлёт каждую куку отдельно, а разделитель у них '; '.
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = f'{environ[name]}{separator}{value}'
+        environ[name] = value
+    return environ
+
+
+class StartResponse:
+    def __init__(self):
+        self.status = None
+        self.headers = []
+
+    def __call__(self, status, headers, exc_info=None):
+        self.status = int(status.split(' ', 1)[0])
+        self.headers = [
+            (name.lower().encode('latin1'), value.encode('latin1'))
+            for name, value in headers
+        ]
+
+
+class AsgiHandler:
+    def __init__(self, wsgi_application, max_workers=None, max_streams=None):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.ASGI_THREADS,
+            thread_name_prefix='asgi'
+        )
+        self.max_streams = max_streams or settings.ASGI_STREAMS
+        self.streams = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Неподдерживаемое соединение: {scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        """Тело запроса или None, если клиент отключился."""
+        body = tempfile.SpooledTemporaryFile(max_size=BODY_MEMORY_SIZE)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                body.seek(0)
+                return body
+
+    def respond(self, environ, start_response):
+        """Вызывает Django; обычный ответ сразу собирает и закрывает."""
+        response = self.wsgi_application(environ, start_response)
+        if getattr(response, 'streaming', False):
+            return response, None
+        try:
+            return None, b''.join(response)
+        finally:
+            response.close()
+
+    async def http(self, scope, receive, send):
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        start_response = StartResponse()
+        with body:
+            streaming, content = await loop.run_in_executor(
+                self.executor, self.respond,
+                environ_for(scope, body), start_response
+            )
+        if streaming is not None and self.streams >= self.max_streams:
+            await loop.run_in_executor(self.executor, streaming.close)
+            await self.unavailable(send)
+            return
+        await send({
+            'type': 'http.response.start',
+            'status': start_response.status,
+            'headers': start_response.headers,
+        })
+        if streaming is None:
+            await send({'type': 'http.response.body', 'body': content})
+            return
+        self.streams += 1
+        try:
+            await self.stream(loop, streaming, receive, send)
+        finally:
+            self.streams -= 1
+
+    async def unavailable(self, send):
+        await send({
+            'type': 'http.response.start',
+            'status': 503,
+            'headers': [
+                (b'content-type', b'text/plain; charset=utf-8'),
+                (b'retry-after', b'5'),
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': 'Слишком много открытых потоков.'.encode(),
+        })
+
+    async def wait_disconnect(self, receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def stream(self, loop, response, receive, send):
+        reader = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='asgi-stream'
+        )
+        chunks = iter(response)
+        disconnect = loop.create_task(self.wait_disconnect(receive))
+        try:
+            while True:
+                chunk = loop.run_in_executor(reader, next, chunks, None)
+                await asyncio.wait(
+                    {chunk, disconnect}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if disconnect.done():
+                    # Генератор закроется в том же потоке, как только
+                    # вернёт текущий кусок.
+                    chunk.cancel()
+                    break
+                chunk = chunk.result()
+                if chunk is None:
+                    await send({'type': 'http.response.body', 'body': b''})
+                    break
+                if chunk:
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+        finally:
+            disconnect.cancel()
+            await loop.run_in_executor(reader, response.close)
+            reader.shutdown(wait=False)
@@ -0,0 +1,74 @@
+"""Пользователь запроса из кэша.
+
+``django.contrib.auth.get_user`` на каждый запрос читает пользователя из
+``auth_user``. Здесь то же самое, включая проверку хэша сессии, но
+пользователь берётся из кэша ``USER_CACHE_ALIAS`` и читается из базы не
+чаще раза в ``USER_CACHE_TIMEOUT`` секунд. Сохранение и удаление
+пользователя (вход, смена пароля, правка в админке) удаляют его из
+кэша, так что смена пароля разлогинивает остальные сессии.
+
+Сброс виден всем воркерам только в общем кэше: с кэшем в памяти
+процесса другие воркеры держали бы старый хэш пароля до
+``USER_CACHE_TIMEOUT`` секунд, поэтому там кэширование по умолчанию
+выключено (см. ``settings.py``). ``QuerySet.update`` сигналов не шлёт:
+после массовой правки пользователей (например, ``is_active=False``)
+нужно вызвать ``forget_user`` для каждого из них.
+
+Вместе с сессиями ``cached_db`` или ``signed_cookies`` (см.
+``SESSION_ENGINE``) страница залогиненного пользователя обходится без
+запросов к ``django_session`` и ``auth_user``.
+"""
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model,
+    load_backend
+)
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.utils.crypto import constant_time_compare
+
+USER_KEY = 'core:user:{}'
+
+
+def get_cache():
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def load_user(backend, user_id):
+    """Пользователь из кэша, при промахе — через бэкенд авторизации."""
+    if not settings.USER_CACHE_TIMEOUT:
+        return backend.get_user(user_id)
+    key = USER_KEY.format(user_id)
+    user = get_cache().get(key)
+    if user is None:
+        user = backend.get_user(user_id)
+        if user is not None:
+            get_cache().set(key, user, settings.USER_CACHE_TIMEOUT)
+    return user
+
+
+def forget_user(user_id):
+    get_cache().delete(USER_KEY.format(user_id))
+
+
+def get_user(request):
+    """Как ``django.contrib.auth.get_user``, но через ``load_user``."""
+    try:
+        user_id = get_user_model()._meta.pk.to_python(
+            request.session[SESSION_KEY]
+        )
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    user = load_user(load_backend(backend_path), user_id)
+    if user is None:
+        return AnonymousUser()
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not session_hash or not constant_time_compare(
+        session_hash, user.get_session_auth_hash()
+    ):
+        request.session.flush()
+        return AnonymousUser()
+    return user
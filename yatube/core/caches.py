@@ -0,0 +1,80 @@
+"""Настройка кэша строкой-адресом.
+
+Позволяет выбрать общий для всех воркеров бэкенд через переменную
+окружения, не меняя ``settings.py``::
+
+    locmem://                          кэш в памяти процесса (по умолчанию)
+    file:///var/tmp/yatube_cache       файлы в общем каталоге
+    db://yatube_cache                  таблица в БД (после createcachetable)
+    memcached://127.0.0.1:11211        memcached по TCP
+    memcached:///run/memcached.sock    memcached через локальный сокет
+    redis://127.0.0.1:6379/1           redis (нужен пакет django-redis)
+    redis:///run/redis.sock            redis через локальный сокет
+    dummy://                           кэш выключен
+
+Модуль не зависит от Django и импортируется прямо из настроек.
+"""
+from urllib.parse import parse_qs, urlsplit
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+    'pylibmc': 'django.core.cache.backends.memcached.PyLibMCCache',
+    'redis': 'django_redis.cache.RedisCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+# Бэкенды, которые не видны другим процессам сервера.
+PRIVATE = {'locmem', 'dummy'}
+
+
+def _location(scheme, parts):
+    if scheme == 'file':
+        return parts.path
+    if scheme == 'db':
+        return parts.netloc or parts.path.strip('/')
+    if scheme == 'locmem':
+        return parts.netloc
+    if scheme in ('memcached', 'pylibmc'):
+        return parts.netloc or f'unix:{parts.path}'
+    if scheme == 'redis':
+        if parts.netloc:
+            return f'redis://{parts.netloc}{parts.path}'
+        return f'unix://{parts.path}'
+    return ''
+
+
+def cache_from_url(url, **options):
+    """Возвращает словарь для ``CACHES`` по адресу вида ``scheme://...``.
+
+    Параметры запроса ``timeout``, ``key_prefix`` и ``version`` задают
+    одноимённые ключи конфигурации, остальные уходят в ``OPTIONS``
+    (``?max_entries=1000`` станет ``MAX_ENTRIES``).
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme
+    if scheme not in BACKENDS:
+        raise ValueError(f'Неизвестный бэкенд кэша: {url!r}')
+    config = {
+        'BACKEND': BACKENDS[scheme],
+        'LOCATION': _location(scheme, parts),
+    }
+    config.update(options)
+    query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+    if 'timeout' in query:
+        config['TIMEOUT'] = int(query.pop('timeout'))
+    if 'version' in query:
+        config['VERSION'] = int(query.pop('version'))
+    if 'key_prefix' in query:
+        config['KEY_PREFIX'] = query.pop('key_prefix')
+    if query:
+        config.setdefault('OPTIONS', {}).update(
+            (key.upper(), value) for key, value in query.items()
+        )
+    return config
+
+
+def is_shared(url):
+    """Общий ли кэш по адресу ``url`` для всех воркеров."""
+    return urlsplit(url).scheme not in PRIVATE
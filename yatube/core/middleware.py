@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.functional import SimpleLazyObject
+
+from . import auth, profiling
+
+
+class ProfilingMiddleware:
+    """Собирает метрики запросов по именам view, см. core.profiling."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        profiling.install_template_timer()
+        profiling.install_cache_counter()
+
+    def __call__(self, request):
+        return profiling.profile_request(self.get_response, request)
+
+
+class CachedUserMiddleware(AuthenticationMiddleware):
+    """``request.user`` из кэша, см. core.auth."""
+
+    def process_request(self, request):
+        def user():
+            if not hasattr(request, '_cached_user'):
+                request._cached_user = auth.get_user(request)
+            return request._cached_user
+
+        request.user = SimpleLazyObject(user)
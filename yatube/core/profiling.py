@@ -0,0 +1,280 @@
+"""Профилирование запросов в продакшене.
+
+Для каждого запроса считаются число SQL-запросов, время в БД, время
+отрисовки шаблонов и попадания в кэш. Значения копятся в гистограммах по
+имени view (``request.resolver_match.view_name``), периодически пишутся в
+лог ``yatube.profiling`` и доступны персоналу по адресу
+``admin/profiling/``. Превышение бюджета запросов из ``QUERY_BUDGETS``
+логируется предупреждением.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger('yatube.profiling')
+
+DURATION_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+_local = threading.local()
+
+
+class RequestProfile:
+    """Метрики одного запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+def current():
+    """Профиль текущего запроса или None вне запроса."""
+    return getattr(_local, 'profile', None)
+
+
+def record_cache(hit):
+    """Отмечает попадание или промах кэша в профиле текущего запроса."""
+    profile = current()
+    if profile is None:
+        return
+    if hit:
+        profile.cache_hits += 1
+    else:
+        profile.cache_misses += 1
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.bounds) and value > self.bounds[index]:
+            index += 1
+        self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+
+    def as_dict(self):
+        labels = [str(bound) for bound in self.bounds] + ['+Inf']
+        return {
+            'count': self.total,
+            'sum': round(self.sum, 3),
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+class ViewStats:
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.db = Histogram(DURATION_BUCKETS)
+        self.template = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.over_budget = 0
+
+    def add(self, duration, profile, over_budget):
+        self.duration.observe(duration * 1000)
+        self.db.observe(profile.db_time * 1000)
+        self.template.observe(profile.template_time * 1000)
+        self.queries.observe(profile.queries)
+        self.cache_hits += profile.cache_hits
+        self.cache_misses += profile.cache_misses
+        self.over_budget += int(over_budget)
+
+    def as_dict(self):
+        return {
+            'duration_ms': self.duration.as_dict(),
+            'db_ms': self.db.as_dict(),
+            'template_ms': self.template.as_dict(),
+            'queries': self.queries.as_dict(),
+            'cache': {'hits': self.cache_hits, 'misses': self.cache_misses},
+            'over_budget': self.over_budget,
+        }
+
+
+class Registry:
+    """Накопленные метрики процесса по именам view."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.flushed_at = time.monotonic()
+
+    def add(self, view_name, duration, profile, over_budget):
+        with self.lock:
+            stats = self.views.get(view_name)
+            if stats is None:
+                stats = self.views[view_name] = ViewStats()
+            stats.add(duration, profile, over_budget)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: stats.as_dict() for name, stats in self.views.items()
+            }
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+
+    def maybe_flush(self):
+        interval = settings.PROFILING_FLUSH_INTERVAL
+        if not interval or time.monotonic() - self.flushed_at < interval:
+            return
+        self.flushed_at = time.monotonic()
+        logger.info(json.dumps({
+            'pid': os.getpid(),
+            'views': self.snapshot(),
+        }, ensure_ascii=False))
+
+
+registry = Registry()
+
+_original_render = None
+
+
+def install_template_timer():
+    """Оборачивает Template.render, чтобы мерить время отрисовки.
+
+    Вложенные ``include`` не учитываются повторно: время считается только
+    для шаблона верхнего уровня.
+    """
+    global _original_render
+    if _original_render is not None:
+        return
+    _original_render = Template.render
+
+    def render(self, context):
+        profile = current()
+        if profile is None:
+            return _original_render(self, context)
+        profile.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return _original_render(self, context)
+        finally:
+            profile.template_depth -= 1
+            if not profile.template_depth:
+                profile.template_time += time.perf_counter() - started
+
+    Template.render = render
+
+
+MISSING = object()
+_counted_backends = set()
+
+
+def install_cache_counter():
+    """Оборачивает ``get`` и ``get_many`` бэкендов из ``CACHES``, чтобы
+    считать попадания и промахи всех кэшей, а не только фрагментов ленты.
+
+    Вызовы изнутри другого вызова (``get_many`` базового бэкенда через
+    ``get``) не учитываются повторно.
+    """
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        if backend in _counted_backends:
+            continue
+        _counted_backends.add(backend)
+        backend.get = _counted_get(backend.get)
+        backend.get_many = _counted_get_many(backend.get_many)
+
+
+def _outermost(profile):
+    return profile is not None and not profile.cache_depth
+
+
+def _counted_get(original):
+    def get(self, key, default=None, version=None):
+        profile = current()
+        if not _outermost(profile):
+            return original(self, key, default, version=version)
+        profile.cache_depth += 1
+        try:
+            value = original(self, key, MISSING, version=version)
+        finally:
+            profile.cache_depth -= 1
+        record_cache(value is not MISSING)
+        return default if value is MISSING else value
+
+    return get
+
+
+def _counted_get_many(original):
+    def get_many(self, keys, version=None):
+        profile = current()
+        if not _outermost(profile):
+            return original(self, keys, version=version)
+        keys = list(keys)
+        profile.cache_depth += 1
+        try:
+            found = original(self, keys, version=version)
+        finally:
+            profile.cache_depth -= 1
+        profile.cache_hits += len(found)
+        profile.cache_misses += len(keys) - len(found)
+        return found
+
+    return get_many
+
+
+def query_budget(view_name):
+    return settings.QUERY_BUDGETS.get(
+        view_name, settings.QUERY_BUDGET_DEFAULT
+    )
+
+
+def profile_request(get_response, request):
+    """Выполняет запрос с профилированием и учитывает его в registry."""
+    profile = RequestProfile()
+    _local.profile = profile
+    started = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(profile.execute)
+                )
+            response = get_response(request)
+    finally:
+        _local.profile = None
+    duration = time.perf_counter() - started
+
+    match = getattr(request, 'resolver_match', None)
+    view_name = match.view_name if match else 'unresolved'
+    budget = query_budget(view_name)
+    over_budget = budget is not None and profile.queries > budget
+    if over_budget:
+        logger.warning(
+            'Превышен бюджет запросов для %s: %d > %d (%s)',
+            view_name, profile.queries, budget, request.path
+        )
+    registry.add(view_name, duration, profile, over_budget)
+    registry.maybe_flush()
+    return response
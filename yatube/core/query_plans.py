@@ -0,0 +1,53 @@
+"""Планы выполнения SQL-запросов страниц.
+
+``capture`` записывает запросы, выполненные внутри блока, а ``explain``
+прогоняет каждый SELECT через ``EXPLAIN QUERY PLAN`` и находит полные
+просмотры таблиц и сортировки во временном B-дереве. Работает только с
+SQLite; на других базах ``explain`` ничего не проверяет.
+"""
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+FULL_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)\b(?! USING)')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+@contextmanager
+def capture():
+    with CaptureQueriesContext(connection) as captured:
+        yield captured
+
+
+def problems_in(plan):
+    """Полные просмотры таблиц и временные сортировки в плане."""
+    problems = []
+    for detail in plan:
+        match = FULL_SCAN_RE.match(detail)
+        if match:
+            problems.append(f'полный просмотр {match.group(1)}')
+        elif TEMP_SORT in detail:
+            problems.append(detail)
+    return problems
+
+
+def explain(queries):
+    """Планы запросов: список словарей ``sql``, ``plan``, ``problems``."""
+    if connection.vendor != 'sqlite':
+        return []
+    plans = []
+    with connection.cursor() as cursor:
+        for query in queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = [row[-1] for row in cursor.fetchall()]
+            plans.append({
+                'sql': sql,
+                'plan': plan,
+                'problems': problems_in(plan),
+            })
+    return plans
@@ -0,0 +1,140 @@
+"""Ограничение частоты записи маркерными корзинами (token bucket).
+
+Для view из ``RATE_LIMITS`` (ключ — ``request.resolver_match.view_name``)
+заводятся корзины на пользователя (``'user'``) и на IP (``'ip'``). Лимит
+``'10/m'`` значит: в корзине не больше 10 маркеров, и за минуту она
+пополняется на 10. Каждый запрос забирает по маркеру из всех своих
+корзин; если хотя бы в одной маркеров нет, view не вызывается, а клиент
+получает 429 с заголовком ``Retry-After``.
+
+Корзины лежат в общем кэше ``RATE_LIMIT_CACHE_ALIAS`` парой (маркеры,
+время) и читаются и пишутся одним ``get_many`` и одним ``set_many``.
+Запросов к БД ограничитель не делает, поэтому кэш не должен быть
+``db://``. Между чтением и записью корзину может списать параллельный
+запрос, и лимит превысится на несколько запросов; для защиты от
+перегрузки этого достаточно.
+"""
+import logging
+import math
+import time
+from functools import partial, wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.shortcuts import render
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+DEFAULT_METHODS = ('POST',)
+
+logger = logging.getLogger('yatube.ratelimit')
+
+
+def parse_rate(rate):
+    """``'10/m'`` -> (10, 60): размер корзины и период пополнения."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def client_ip(request):
+    """IP клиента с учётом ``RATE_LIMIT_TRUSTED_PROXIES`` прокси перед нами.
+
+    Каждый прокси дописывает адрес своего клиента в конец
+    ``X-Forwarded-For``, поэтому доверять можно только последним записям.
+    """
+    proxies = settings.RATE_LIMIT_TRUSTED_PROXIES
+    if proxies:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+        forwarded = [address.strip() for address in forwarded if address]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def buckets(request, view_name, limits):
+    """Корзины запроса: список (ключ кэша, размер, период).
+
+    View с одинаковым ``'bucket'`` в лимитах (например, форма сайта и
+    метод API, делающие одно и то же) расходуют общие корзины.
+    """
+    view_name = limits.get('bucket', view_name)
+    identities = {'ip': client_ip(request)}
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        identities['user'] = user.pk
+    result = []
+    for scope, identity in identities.items():
+        if scope in limits:
+            count, period = parse_rate(limits[scope])
+            result.append(
+                (f'ratelimit:{view_name}:{scope}:{identity}', count, period)
+            )
+    return result
+
+
+def consume(request, view_name, limits):
+    """Забирает маркеры из корзин запроса.
+
+    Возвращает 0, если запрос разрешён, иначе через сколько секунд
+    появится маркер. Отклонённый запрос маркеров не тратит.
+    """
+    request_buckets = buckets(request, view_name, limits)
+    if not request_buckets:
+        return 0
+    cache = caches[settings.RATE_LIMIT_CACHE_ALIAS]
+    now = time.time()
+    states = cache.get_many([key for key, _, _ in request_buckets])
+    levels = {}
+    wait = 0
+    for key, count, period in request_buckets:
+        tokens, updated = states.get(key, (count, now))
+        tokens = min(count, tokens + (now - updated) * count / period)
+        if tokens < 1:
+            wait = max(wait, (1 - tokens) * period / count)
+        levels[key] = tokens
+    if wait:
+        return max(1, math.ceil(wait))
+    # Через период пустая корзина снова полна, хранить её дольше незачем.
+    cache.set_many(
+        {key: (tokens - 1, now) for key, tokens in levels.items()},
+        max(period for _, _, period in request_buckets)
+    )
+    return 0
+
+
+def too_many_requests(request, retry_after):
+    response = render(request, 'core/429.html', status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limited(view=None, respond=too_many_requests):
+    """Ограничивает view лимитами из ``RATE_LIMITS`` по имени маршрута.
+
+    ``respond(request, retry_after)`` строит ответ 429; по умолчанию это
+    HTML-страница, API передаёт свой JSON-ответ::
+
+        @rate_limited(respond=throttled)
+        def view(request): ...
+    """
+    if view is None:
+        return partial(rate_limited, respond=respond)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        match = request.resolver_match
+        limits = settings.RATE_LIMITS.get(match.view_name) if match else None
+        if (
+            not settings.RATE_LIMIT_ENABLED
+            or limits is None
+            or request.method not in limits.get('methods', DEFAULT_METHODS)
+        ):
+            return view(request, *args, **kwargs)
+        retry_after = consume(request, match.view_name, limits)
+        if retry_after:
+            logger.info(
+                'Лимит %s превышен: %s', match.view_name, client_ip(request)
+            )
+            return respond(request, retry_after)
+        return view(request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,42 @@
+"""Прогрев кэша шаблонов.
+
+С ``TEMPLATE_CACHE`` шаблон разбирается один раз на процесс, но первым
+запросам каждого воркера всё равно достаётся чтение с диска и разбор
+всех шаблонов страницы. ``warm_up`` компилирует заранее всё, что лежит в
+каталогах ``DIRS``; точки входа вызывают её при старте процесса, если
+включён ``TEMPLATE_WARM_UP``.
+"""
+import os
+import time
+
+from django.template import TemplateSyntaxError, engines
+
+
+def template_names(engine=None):
+    """Имена всех шаблонов из каталогов ``DIRS`` движка."""
+    engine = engine or engines['django'].engine
+    for directory in engine.dirs:
+        for root, _, files in os.walk(directory):
+            for filename in sorted(files):
+                path = os.path.relpath(os.path.join(root, filename), directory)
+                yield path.replace(os.sep, '/')
+
+
+def warm_up(engine=None):
+    """Компилирует все шаблоны.
+
+    Возвращает число скомпилированных шаблонов, время в секундах и
+    словарь ошибок разбора по именам шаблонов.
+    """
+    engine = engine or engines['django'].engine
+    started = time.perf_counter()
+    compiled = 0
+    errors = {}
+    for name in template_names(engine):
+        try:
+            engine.get_template(name)
+        except TemplateSyntaxError as error:
+            errors[name] = str(error)
+        else:
+            compiled += 1
+    return compiled, time.perf_counter() - started, errors
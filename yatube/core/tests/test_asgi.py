@@ -0,0 +1,202 @@
+import asyncio
+import json
+import threading
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from core.asgi import AsgiHandler, environ_for
+from posts.models import Post
+
+User = get_user_model()
+
+
+class BlockingStream:
+    """Потоковый ответ, второй кусок которого ждёт ``release``."""
+
+    streaming = True
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.closed = 0
+
+    def application(self, environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return self
+
+    def __iter__(self):
+        yield b'first'
+        self.release.wait(5)
+        yield b'second'
+
+    def close(self):
+        self.closed += 1
+
+
+class Connection:
+    """Клиент ASGI, который отключается по ``disconnected``."""
+
+    def __init__(self):
+        self.sent = []
+        self.started = asyncio.Event()
+        self.disconnected = asyncio.Event()
+
+    async def receive(self):
+        if not self.sent:
+            return {'type': 'http.request', 'body': b''}
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        self.sent.append(message)
+        if message.get('body') == b'first':
+            self.started.set()
+
+
+class AsgiHandlerTests(TransactionTestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='ilya')
+        Post.objects.create(author=author, text='Пост из ASGI')
+        self.application = AsgiHandler(WSGIHandler(), max_workers=2)
+
+    def tearDown(self):
+        self.application.executor.shutdown()
+
+    def request(self, path):
+        messages = [
+            {'type': 'http.request', 'body': b'', 'more_body': True},
+            {'type': 'http.request', 'body': b''},
+        ]
+        sent = []
+
+        async def receive():
+            if not messages:
+                await asyncio.Event().wait()
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': b'',
+            'headers': [(b'host', b'testserver')],
+        }
+        asyncio.run(self.application(scope, receive, send))
+        return sent
+
+    def test_regular_response(self):
+        """Обычный ответ отдаётся одним сообщением тела."""
+        start, body = self.request(reverse('posts:index'))
+        self.assertEqual(start['status'], 200)
+        self.assertIn(
+            (b'content-type', b'text/html; charset=utf-8'), start['headers']
+        )
+        self.assertIn('Пост из ASGI', body['body'].decode())
+
+    def test_streaming_response(self):
+        """Потоковый ответ отдаётся по кускам и завершается пустым."""
+        sent = self.request(reverse('posts:index_feed', args=['rss']))
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertTrue(all(message['more_body'] for message in sent[1:-1]))
+        self.assertEqual(sent[-1], {'type': 'http.response.body', 'body': b''})
+        content = b''.join(message['body'] for message in sent[1:])
+        self.assertIn('Пост из ASGI', content.decode())
+
+    def test_streams_limited_and_closed_on_disconnect(self):
+        """Потоков сверх лимита — 503, отключение клиента закрывает ответ."""
+        stream = BlockingStream()
+        application = AsgiHandler(
+            stream.application, max_workers=2, max_streams=1
+        )
+        scope = {'type': 'http', 'method': 'GET', 'path': '/'}
+        first, second = Connection(), Connection()
+
+        async def main():
+            opened = asyncio.ensure_future(
+                application(scope, first.receive, first.send)
+            )
+            await first.started.wait()
+            await application(scope, second.receive, second.send)
+            first.disconnected.set()
+            # Генератор закрывается, когда вернёт ожидаемый кусок.
+            await asyncio.sleep(0.1)
+            stream.release.set()
+            await opened
+
+        try:
+            asyncio.run(main())
+        finally:
+            stream.release.set()
+            application.executor.shutdown()
+        self.assertEqual(second.sent[0]['status'], 503)
+        self.assertEqual(first.sent[0]['status'], 200)
+        self.assertEqual(
+            [message.get('body') for message in first.sent[1:]], [b'first']
+        )
+        self.assertEqual(stream.closed, 2)
+        self.assertEqual(application.streams, 0)
+
+    def test_repeated_headers(self):
+        """Куки из нескольких заголовков склеиваются через '; '."""
+        environ = environ_for({
+            'type': 'http',
+            'method': 'GET',
+            'path': '/',
+            'headers': [
+                (b'cookie', b'sessionid=abc'),
+                (b'cookie', b'csrftoken=xyz'),
+                (b'accept', b'text/html'),
+                (b'accept', b'*/*'),
+            ],
+        }, StringIO())
+        self.assertEqual(
+            environ['HTTP_COOKIE'], 'sessionid=abc; csrftoken=xyz'
+        )
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,*/*')
+
+    def test_disconnect_before_body(self):
+        async def receive():
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            raise AssertionError('Ответ отключившемуся клиенту')
+
+        asyncio.run(self.application(
+            {'type': 'http', 'method': 'POST', 'path': '/'}, receive, send
+        ))
+
+    def test_lifespan(self):
+        messages = [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(self.application({'type': 'lifespan'}, receive, send))
+        self.assertEqual(
+            sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+        )
+
+    def test_benchmark_servers(self):
+        """benchmark_servers сравнивает WSGI и ASGI на одной странице."""
+        out = StringIO()
+        call_command(
+            'benchmark_servers', requests=4, workers=2, client_delay=1,
+            stdout=out
+        )
+        report = json.loads(out.getvalue())
+        for mode in ('wsgi', 'asgi'):
+            self.assertEqual(report[mode]['errors'], 0)
+            self.assertGreater(report[mode]['requests_per_second'], 0)
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+User = get_user_model()
+
+
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    USER_CACHE_TIMEOUT=60
+)
+class CachedUserTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='ilya', password='pass')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def tables(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, ' '.join(query['sql'] for query in queries)
+
+    def test_no_session_or_user_queries(self):
+        """Повторный запрос не читает django_session и auth_user."""
+        url = reverse('about:author')
+        self.client.get(url)
+        response, sql = self.tables(url)
+        self.assertEqual(response.context['user'], self.user)
+        self.assertNotIn('django_session', sql)
+        self.assertNotIn('auth_user', sql)
+
+    def test_save_forgets_cached_user(self):
+        """Сохранение пользователя сбрасывает его кэш."""
+        url = reverse('about:author')
+        self.client.get(url)
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Илья'
+        user.save()
+        response, sql = self.tables(url)
+        self.assertIn('auth_user', sql)
+        self.assertEqual(response.context['user'].first_name, 'Илья')
+
+    def test_password_change_logs_out(self):
+        """После смены пароля старая сессия недействительна."""
+        self.client.get(reverse('about:author'))
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-pass')
+        user.save()
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_logout(self):
+        """Выход работает с кэшированным пользователем."""
+        self.client.get(reverse('about:author'))
+        self.client.get(reverse('users:logout'))
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies'
+    )
+    def test_signed_cookie_sessions(self):
+        """С сессиями в куках база не нужна даже при пустом кэше."""
+        self.client.force_login(self.user)
+        self.client.get(reverse('about:author'))
+        response, sql = self.tables(reverse('about:author'))
+        self.assertEqual(response.context['user'], self.user)
+        self.assertNotIn('django_session', sql)
+
+    @override_settings(USER_CACHE_TIMEOUT=0)
+    def test_cache_disabled(self):
+        """При нулевом таймауте пользователь читается из базы."""
+        url = reverse('about:author')
+        self.client.get(url)
+        response, sql = self.tables(url)
+        self.assertIn('auth_user', sql)
@@ -0,0 +1,59 @@
+from django.test import SimpleTestCase
+
+from core.caches import cache_from_url, is_shared
+
+
+class CacheFromUrlTests(SimpleTestCase):
+    def test_backends(self):
+        """Адрес кэша превращается в конфигурацию CACHES."""
+        cases = {
+            'locmem://': (
+                'django.core.cache.backends.locmem.LocMemCache', ''
+            ),
+            'file:///var/tmp/yatube': (
+                'django.core.cache.backends.filebased.FileBasedCache',
+                '/var/tmp/yatube'
+            ),
+            'db://yatube_cache': (
+                'django.core.cache.backends.db.DatabaseCache',
+                'yatube_cache'
+            ),
+            'memcached:///run/memcached.sock': (
+                'django.core.cache.backends.memcached.MemcachedCache',
+                'unix:/run/memcached.sock'
+            ),
+            'memcached://127.0.0.1:11211': (
+                'django.core.cache.backends.memcached.MemcachedCache',
+                '127.0.0.1:11211'
+            ),
+            'redis:///run/redis.sock': (
+                'django_redis.cache.RedisCache', 'unix:///run/redis.sock'
+            ),
+        }
+        for url, (backend, location) in cases.items():
+            with self.subTest(url=url):
+                config = cache_from_url(url)
+                self.assertEqual(config['BACKEND'], backend)
+                self.assertEqual(config['LOCATION'], location)
+
+    def test_query_options(self):
+        """Параметры адреса попадают в конфигурацию."""
+        config = cache_from_url(
+            'file:///tmp/c?timeout=60&version=3&max_entries=100',
+            KEY_PREFIX='yatube'
+        )
+        self.assertEqual(config['TIMEOUT'], 60)
+        self.assertEqual(config['VERSION'], 3)
+        self.assertEqual(config['KEY_PREFIX'], 'yatube')
+        self.assertEqual(config['OPTIONS'], {'MAX_ENTRIES': '100'})
+
+    def test_unknown_scheme(self):
+        with self.assertRaises(ValueError):
+            cache_from_url('mongo://localhost')
+
+    def test_shared(self):
+        """Кэш в памяти процесса не считается общим."""
+        self.assertFalse(is_shared('locmem://'))
+        self.assertFalse(is_shared('dummy://'))
+        self.assertTrue(is_shared('file:///var/tmp/yatube_cache'))
+        self.assertTrue(is_shared('redis://127.0.0.1:6379/1'))
@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import profiling
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='ilya')
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        profiling.registry.reset()
+
+    def test_metrics_collected_per_view(self):
+        """Метрики копятся по имени view."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        stats = profiling.registry.snapshot()['posts:index']
+        self.assertEqual(stats['duration_ms']['count'], 2)
+        self.assertGreater(stats['queries']['sum'], 0)
+        self.assertGreater(stats['template_ms']['sum'], 0)
+        self.assertGreater(stats['cache']['misses'], 0)
+        self.assertGreater(stats['cache']['hits'], 0)
+
+    @override_settings(QUERY_BUDGETS={'posts:index': 0})
+    def test_query_budget_warning(self):
+        """Превышение бюджета запросов попадает в лог."""
+        with self.assertLogs('yatube.profiling', 'WARNING') as logs:
+            self.client.get(reverse('posts:index'))
+        self.assertIn('posts:index', logs.output[0])
+        stats = profiling.registry.snapshot()['posts:index']
+        self.assertEqual(stats['over_budget'], 1)
+
+    def test_stats_endpoint_for_staff_only(self):
+        """Сводка доступна только персоналу."""
+        url = reverse('profiling')
+        self.client.get(reverse('posts:index'))
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        staff = User.objects.get(pk=self.user.pk)
+        staff.is_staff = True
+        staff.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('posts:index', response.json())
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='ilya')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        for number in range(15):
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {number}'
+            )
+        cls.post = Post.objects.filter(author=cls.author).first()
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f'Ответ {number}'
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        profiling.registry.reset()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_views_within_budget(self):
+        """Страницы с бюджетом укладываются в него на холодном кэше."""
+        urls = {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', args=[self.group.slug]
+            ),
+            'posts:profile': reverse(
+                'posts:profile', args=[self.author.username]
+            ),
+            'posts:post_detail': reverse(
+                'posts:post_detail', args=[self.post.pk]
+            ),
+            'posts:follow_index': reverse('posts:follow_index'),
+        }
+        self.assertEqual(set(urls), set(settings.QUERY_BUDGETS))
+        self.client.force_login(self.reader)
+        for name, url in urls.items():
+            with self.subTest(view=name):
+                cache.clear()
+                self.assertEqual(self.client.get(url).status_code, 200)
+                stats = profiling.registry.snapshot()[name]
+                self.assertLessEqual(
+                    stats['queries']['sum'], settings.QUERY_BUDGETS[name]
+                )
+                self.assertEqual(stats['over_budget'], 0)
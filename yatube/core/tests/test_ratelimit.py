@@ -0,0 +1,173 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core import ratelimit
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='ilya')
+        cls.other = User.objects.create_user(username='masha')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        cls.create_url = reverse('posts:post_create')
+        cls.comment_url = reverse(
+            'posts:add_comment', kwargs={'post_id': cls.post.pk}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    @override_settings(RATE_LIMITS={'posts:post_create': {'user': '2/m'}})
+    def test_user_limit(self):
+        """Сверх лимита пользователь получает 429 с Retry-After."""
+        for _ in range(2):
+            response = self.client.post(self.create_url, {'text': 'Пост'})
+            self.assertEqual(response.status_code, 302)
+        response = self.client.post(self.create_url, {'text': 'Лишний'})
+        self.assertEqual(response.status_code, 429)
+        self.assertTemplateUsed(response, 'core/429.html')
+        self.assertIn(int(response['Retry-After']), range(1, 31))
+        self.assertFalse(Post.objects.filter(text='Лишний').exists())
+
+    @override_settings(RATE_LIMITS={'posts:post_create': {'user': '1/m'}})
+    def test_get_not_limited(self):
+        """Открытие формы лимит не расходует."""
+        for _ in range(3):
+            response = self.client.get(self.create_url)
+            self.assertEqual(response.status_code, 200)
+        response = self.client.post(self.create_url, {'text': 'Пост'})
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(RATE_LIMITS={'posts:add_comment': {'ip': '1/m'}})
+    def test_ip_limit_shared_by_users(self):
+        """Корзина по IP общая для всех пользователей с этого адреса."""
+        self.client.post(self.comment_url, {'text': 'Первый'})
+        self.client.force_login(self.other)
+        response = self.client.post(self.comment_url, {'text': 'Второй'})
+        self.assertEqual(response.status_code, 429)
+        response = self.client.post(
+            self.comment_url, {'text': 'Второй'}, REMOTE_ADDR='10.0.0.2'
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    @override_settings(RATE_LIMITS={'posts:post_create': {'user': '1/m'}})
+    def test_bucket_refills(self):
+        """Корзина пополняется со временем."""
+        with mock.patch('core.ratelimit.time.time', return_value=1000.0):
+            self.client.post(self.create_url, {'text': 'Пост'})
+            response = self.client.post(self.create_url, {'text': 'Пост'})
+            self.assertEqual(response['Retry-After'], '60')
+        with mock.patch('core.ratelimit.time.time', return_value=1045.0):
+            response = self.client.post(self.create_url, {'text': 'Пост'})
+            self.assertEqual(response['Retry-After'], '15')
+        with mock.patch('core.ratelimit.time.time', return_value=1060.0):
+            response = self.client.post(self.create_url, {'text': 'Пост'})
+            self.assertEqual(response.status_code, 302)
+
+    @override_settings(RATE_LIMITS={'posts:post_create': {'user': '1/m'}})
+    def test_no_queries_when_limited(self):
+        """Отказ обходится без запросов к БД сверх сессии и пользователя."""
+        self.client.post(self.create_url, {'text': 'Пост'})
+        with self.assertNumQueries(2):
+            response = self.client.post(self.create_url, {'text': 'Пост'})
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(RATE_LIMITS={
+        'posts:profile_follow': {'user': '1/m', 'methods': ('GET',)}
+    })
+    def test_follow_limited_on_get(self):
+        """Подписка по ссылке расходует лимит GET-запросом."""
+        url = reverse('posts:profile_follow', args=[self.other.username])
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.assertEqual(self.client.get(url).status_code, 429)
+
+    @override_settings(RATE_LIMITS={
+        'posts:profile_follow': {'user': '2/m', 'methods': ('GET',)},
+        'posts:profile_unfollow': {
+            'user': '2/m', 'methods': ('GET',),
+            'bucket': 'posts:profile_follow',
+        },
+    })
+    def test_follow_and_unfollow_share_limit(self):
+        """Подписка и отписка расходуют одну корзину."""
+        username = self.other.username
+        follow = reverse('posts:profile_follow', args=[username])
+        unfollow = reverse('posts:profile_unfollow', args=[username])
+        self.assertEqual(self.client.get(follow).status_code, 302)
+        self.assertEqual(self.client.get(unfollow).status_code, 302)
+        self.assertEqual(self.client.get(follow).status_code, 429)
+        self.assertEqual(self.client.get(unfollow).status_code, 429)
+
+    @override_settings(RATE_LIMITS={'users:signup': {'ip': '1/h'}})
+    def test_signup_limited_by_ip(self):
+        """Регистрация ограничена по IP."""
+        self.client.logout()
+        url = reverse('users:signup')
+        self.client.post(url, {'username': 'new'})
+        response = self.client.post(url, {'username': 'new'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(
+        RATE_LIMIT_ENABLED=False,
+        RATE_LIMITS={'posts:post_create': {'user': '1/m'}}
+    )
+    def test_disabled(self):
+        """Выключенный ограничитель пропускает все запросы."""
+        for _ in range(2):
+            response = self.client.post(self.create_url, {'text': 'Пост'})
+            self.assertEqual(response.status_code, 302)
+
+    @override_settings(RATE_LIMITS={
+        'posts:post_create': {'user': '2/m'},
+        'api:posts': {'user': '2/m', 'bucket': 'posts:post_create'},
+    })
+    def test_api_shares_limit(self):
+        """API расходует ту же корзину, что и форма, и отвечает JSON."""
+        self.client.post(self.create_url, {'text': 'Пост'})
+        url = reverse('api:posts')
+        response = self.client.post(
+            url, {'text': 'Из API'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post(
+            url, {'text': 'Лишний'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertIn('detail', response.json())
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertFalse(Post.objects.filter(text='Лишний').exists())
+
+
+class ClientIpTests(TestCase):
+    def test_trusted_proxies(self):
+        """За доверенным прокси адрес берётся из X-Forwarded-For."""
+        request = RequestFactory().get(
+            '/', REMOTE_ADDR='10.0.0.1',
+            HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2'
+        )
+        cases = {0: '10.0.0.1', 1: '2.2.2.2', 2: '1.1.1.1', 3: '10.0.0.1'}
+        for proxies, address in cases.items():
+            with self.subTest(proxies=proxies):
+                with self.settings(RATE_LIMIT_TRUSTED_PROXIES=proxies):
+                    self.assertEqual(ratelimit.client_ip(request), address)
+
+    def test_parse_rate(self):
+        """Лимит разбирается на размер корзины и период."""
+        self.assertEqual(ratelimit.parse_rate('10/m'), (10, 60))
+        self.assertEqual(ratelimit.parse_rate('5/d'), (5, 86400))
@@ -0,0 +1,55 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from core.templates import template_names, warm_up
+from posts import feed_cache
+from posts.models import Post
+
+User = get_user_model()
+
+
+class TemplateWarmUpTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_warm_up_compiles_every_template(self):
+        """warm_up компилирует все шаблоны из templates/ без ошибок."""
+        names = list(template_names())
+        self.assertIn('posts/index.html', names)
+        self.assertIn('includes/card_post.html', names)
+        compiled, _, errors = warm_up()
+        self.assertEqual(errors, {})
+        self.assertEqual(compiled, len(names))
+        out = StringIO()
+        call_command('warm_templates', stdout=out)
+        self.assertIn(str(len(names)), out.getvalue())
+
+    def test_benchmark_reports_includes(self):
+        """benchmark_templates считает include карточки на каждый пост."""
+        with self.assertRaises(CommandError):
+            call_command('benchmark_templates', runs=1, stdout=StringIO())
+        author = User.objects.create_user(username='ilya')
+        Post.objects.bulk_create(
+            Post(author=author, text=f'Пост {number}') for number in range(12)
+        )
+        feed_cache.get_cache().delete(feed_cache.CHANGED_KEY)
+        version = feed_cache.version()
+        out = StringIO()
+        call_command('benchmark_templates', runs=2, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(feed_cache.version(), version)
+        self.assertIsNone(feed_cache.changed_at())
+        self.assertEqual(report['posts'], 10)
+        for variant in ('uncached', 'cached'):
+            with self.subTest(variant=variant):
+                card = report[variant]['includes']['includes/card_post.html']
+                self.assertEqual(card['calls_per_render'], 10)
+                self.assertGreater(report[variant]['render_ms']['median'], 0)
@@ -1,12 +1,16 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from . import profiling
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
 
 
 def csrf_failure(request, reason=''):
-    return render(request, 'core/403csrf.html')
+    return render(request, 'core/403csrf.html', status=403)
 
 
 def server_error(request):
@@ -15,3 +19,12 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+@staff_member_required
+def profiling_stats(request):
+    """Метрики профилирования текущего процесса в JSON."""
+    return JsonResponse(
+        profiling.registry.snapshot(),
+        json_dumps_params={'ensure_ascii': False}
+    )
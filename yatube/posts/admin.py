@@ -1,4 +1,6 @@
 from django.contrib import admin
+
+from . import search
 from .models import Group, Post
 
 
@@ -9,6 +11,13 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(
+            pk__in=search.matching_post_ids(search_term)
+        ), False
+
 
 admin.site.register(Post, PostAdmin)
 
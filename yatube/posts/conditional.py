@@ -0,0 +1,165 @@
+"""Условные GET-запросы для лент и страницы поста.
+
+Для каждой страницы одним небольшим запросом по индексам собирается её
+состояние: дата последнего поста или комментария, версия ленты из
+``feed_cache`` и то, что зависит от читателя. Состояние RSS и Atom
+строится только по постам: документ один для всех читателей, поэтому
+ETag не должен зависеть от пользователя и счётчиков подписчиков.
+Из состояния строятся
+ETag и Last-Modified, и ``django.views.decorators.http.condition``
+отвечает 304 до пагинации и отрисовки шаблона.
+
+Last-Modified учитывает только даты и время последнего изменения постов,
+поэтому точным валидатором остаётся ETag.
+"""
+import hashlib
+
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.views.decorators.http import condition
+
+from . import feed_cache, follow_graph, recommendations
+from .feed import follow_feed
+from .models import Comment, Follow, Group, Post, User
+
+STATE_ATTR = '_conditional_state'
+
+
+def make_etag(parts):
+    return hashlib.md5(
+        ':'.join(str(part) for part in parts).encode()
+    ).hexdigest()
+
+
+def single(queryset):
+    """Первая строка запроса без сортировки или None."""
+    rows = list(queryset.order_by()[:1])
+    return rows[0] if rows else None
+
+
+def newest(queryset, field):
+    """Подзапрос с самой поздней датой ``field`` в queryset."""
+    return Subquery(
+        queryset.order_by(f'-{field}').values(field)[:1]
+    )
+
+
+def latest(*dates):
+    dates = [date for date in dates if date is not None]
+    return max(dates) if dates else None
+
+
+def reader_parts(request):
+    """Часть состояния, которая зависит от читателя и адреса страницы."""
+    return [
+        request.user.pk,
+        follow_graph.for_request(request).stamp,
+        request.get_full_path(),
+    ]
+
+
+def shared_parts(request):
+    """Часть состояния страницы, одинаковой для всех читателей."""
+    return [request.get_host(), request.get_full_path()]
+
+
+def index_state(request, **kwargs):
+    pub_date = Post.objects.aggregate(latest=Max('pub_date'))['latest']
+    return [pub_date], pub_date
+
+
+def group_state(request, slug, **kwargs):
+    group = single(Group.objects.filter(slug=slug).annotate(
+        latest=newest(Post.objects.filter(group=OuterRef('pk')), 'pub_date')
+    ).values_list('pk', 'title', 'description', 'latest'))
+    if group is None:
+        return None, None
+    return list(group), group[-1]
+
+
+def profile_state(request, username, **kwargs):
+    authors = User.objects.filter(username=username).annotate(
+        latest=newest(Post.objects.filter(author=OuterRef('pk')), 'pub_date')
+    )
+    fields = [
+        'pk', 'first_name', 'last_name', 'latest', 'stats__posts_count',
+        'stats__followers_count', 'stats__following_count'
+    ]
+    author = single(authors.values_list(*fields))
+    if author is None:
+        return None, None
+    return list(author) + [recommendations.built_at()], author[3]
+
+
+def post_detail_state(request, post_id):
+    comments = Comment.objects.filter(post=OuterRef('pk'))
+    post = single(Post.objects.filter(pk=post_id).annotate(
+        comments_count=Subquery(comments.order_by().values('post').annotate(
+            total=Count('pk')
+        ).values('total')),
+        latest_comment=newest(comments, 'created')
+    ).values_list(
+        'pub_date', 'text', 'group_id', 'image', 'thumbnail',
+        'author__stats__posts_count', 'comments_count', 'latest_comment'
+    ))
+    if post is None:
+        return None, None
+    return list(post), latest(post[0], post[-1])
+
+
+def posts_state(queryset):
+    pub_date = queryset.aggregate(latest=Max('pub_date'))['latest']
+    return [pub_date], pub_date
+
+
+def group_feed_state(request, slug, **kwargs):
+    return posts_state(Post.objects.filter(group__slug=slug))
+
+
+def profile_feed_state(request, username, **kwargs):
+    return posts_state(Post.objects.filter(author__username=username))
+
+
+def follow_index_state(request):
+    pub_date = follow_feed(request.user).aggregate(
+        latest=Max('pub_date')
+    )['latest']
+    follows = Follow.objects.filter(user=request.user).aggregate(
+        count=Count('pk'), last=Max('pk')
+    )
+    return [
+        pub_date, follows['count'], follows['last'],
+        recommendations.built_at()
+    ], pub_date
+
+
+def state(request, state_func, per_reader, *args, **kwargs):
+    """Считает состояние страницы один раз на запрос."""
+    if not hasattr(request, STATE_ATTR):
+        parts, last_modified = state_func(request, *args, **kwargs)
+        if parts is None:
+            setattr(request, STATE_ATTR, (None, None))
+        else:
+            parts += [state_func.__name__, feed_cache.version()]
+            if per_reader:
+                parts += reader_parts(request)
+            else:
+                parts += shared_parts(request)
+            setattr(request, STATE_ATTR, (
+                make_etag(parts),
+                latest(last_modified, feed_cache.changed_at())
+            ))
+    return getattr(request, STATE_ATTR)
+
+
+def conditional(state_func, per_reader=True):
+    """Декоратор view: ETag и Last-Modified по функции состояния.
+
+    С ``per_reader=False`` состояние не зависит от читателя.
+    """
+    def etag(request, *args, **kwargs):
+        return state(request, state_func, per_reader, *args, **kwargs)[0]
+
+    def last_modified(request, *args, **kwargs):
+        return state(request, state_func, per_reader, *args, **kwargs)[1]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
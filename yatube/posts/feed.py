@@ -0,0 +1,236 @@
+"""Материализованная лента подписок (fan-out-on-write).
+
+Новый пост раскладывается во входящие ленты подписчиков автора, поэтому
+страница ``follow_index`` читается одним диапазоном по индексу
+``(user, pub_date)``. Посты авторов с очень большим числом подписчиков не
+раскладываются и подмешиваются при чтении (fan-out-on-read).
+
+Такие авторы отмечены флагом ``UserStats.heavy``. Он включается
+условным ``UPDATE``, когда ``followers_count`` превышает
+``FOLLOW_FEED_FANOUT_LIMIT``, и выключается, только когда подписчиков
+становится не больше ``FOLLOW_FEED_FANOUT_RESUME``, так что каждый
+переход замечается ровно один раз даже при параллельных подписках, а
+подписка и отписка на границе не переключают автора туда и обратно.
+Когда автор снова становится «лёгким», его посты раскладываются всем
+подписчикам в фоновом потоке после коммита: пока он был «тяжёлым», ни
+новые посты, ни подписки на него в ленты не попадали.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .feed_cache import get_cache
+from .models import FeedEntry, Follow, Post, UserStats
+
+BATCH_SIZE = 500
+HEAVY_AUTHORS_KEY = 'posts:feed:heavy_authors'
+HEAVY_AUTHORS_TIMEOUT = 60 * 10
+
+logger = logging.getLogger(__name__)
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='feed-backfill'
+        )
+    return _executor
+
+
+def resume_limit():
+    """Число подписчиков, при котором автор возвращается в раскладку."""
+    return min(
+        settings.FOLLOW_FEED_FANOUT_RESUME, settings.FOLLOW_FEED_FANOUT_LIMIT
+    )
+
+
+def heavy_authors():
+    """Множество id авторов, чьи посты читаются на лету."""
+    cache = get_cache()
+    authors = cache.get(HEAVY_AUTHORS_KEY)
+    if authors is None:
+        authors = set(
+            UserStats.objects.filter(heavy=True).values_list(
+                'user_id', flat=True
+            )
+        )
+        cache.set(HEAVY_AUTHORS_KEY, authors, HEAVY_AUTHORS_TIMEOUT)
+    return authors
+
+
+def followers_changed(author_id):
+    """Переключает автора между раскладкой и чтением на лету.
+
+    Вызывается после изменения ``followers_count`` автора.
+    """
+    author = UserStats.objects.filter(user_id=author_id)
+    if author.filter(
+        heavy=False, followers_count__gt=settings.FOLLOW_FEED_FANOUT_LIMIT
+    ).update(heavy=True):
+        get_cache().delete(HEAVY_AUTHORS_KEY)
+    elif author.filter(
+        heavy=True, followers_count__lte=resume_limit()
+    ).update(heavy=False):
+        get_cache().delete(HEAVY_AUTHORS_KEY)
+        schedule_fan_out(author_id)
+
+
+def sync_heavy_authors(fan_out=True):
+    """Сверяет флаги всех авторов с лимитом, например после его смены
+    или сверки счётчиков. Возвращает число переключённых авторов."""
+    became_heavy = UserStats.objects.filter(
+        heavy=False, followers_count__gt=settings.FOLLOW_FEED_FANOUT_LIMIT
+    ).update(heavy=True)
+    became_light = list(UserStats.objects.filter(
+        heavy=True, followers_count__lte=resume_limit()
+    ).values_list('user_id', flat=True))
+    UserStats.objects.filter(user_id__in=became_light).update(heavy=False)
+    get_cache().delete(HEAVY_AUTHORS_KEY)
+    if fan_out:
+        for author_id in became_light:
+            fan_out_author(author_id)
+    return became_heavy + len(became_light)
+
+
+def _create_entries(entries):
+    FeedEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост во входящие ленты подписчиков автора."""
+    if post.author_id in heavy_authors():
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _create_entries(
+        FeedEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date
+        )
+        for user_id in followers.iterator()
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика все посты нового автора."""
+    if author_id in heavy_authors():
+        return
+    _backfill(user_id, author_id)
+
+
+def _backfill(user_id, author_id):
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('pk', 'pub_date')
+    _create_entries(
+        FeedEntry(
+            user_id=user_id,
+            post_id=pk,
+            author_id=author_id,
+            pub_date=pub_date
+        )
+        for pk, pub_date in posts.iterator()
+    )
+
+
+def fan_out_author(author_id):
+    """Раскладывает все посты автора всем его подписчикам."""
+    followers = Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    for user_id in followers.iterator():
+        _backfill(user_id, author_id)
+
+
+def fan_out_in_worker(author_id):
+    """Обёртка для пула: логирует ошибки и закрывает соединение потока."""
+    try:
+        fan_out_author(author_id)
+    except Exception:
+        logger.exception('Не удалось разложить посты автора %s', author_id)
+    finally:
+        connection.close()
+
+
+def schedule_fan_out(author_id):
+    """Ставит раскладку постов автора в очередь после коммита.
+
+    При ``FOLLOW_FEED_BACKFILL_ASYNC = False`` посты раскладываются сразу.
+    """
+    if not settings.FOLLOW_FEED_BACKFILL_ASYNC:
+        fan_out_author(author_id)
+        return
+    transaction.on_commit(
+        lambda: get_executor().submit(fan_out_in_worker, author_id)
+    )
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты подписчика посты автора, от которого он отписался."""
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild():
+    """Полностью пересобирает входящие ленты по таблице подписок."""
+    FeedEntry.objects.all().delete()
+    sync_heavy_authors(fan_out=False)
+    follows = Follow.objects.values_list('user_id', 'author_id')
+    for user_id, author_id in follows.iterator():
+        backfill(user_id, author_id)
+
+
+def follow_feed(user):
+    """Лента подписок пользователя.
+
+    Возвращает входящую ленту ``FeedEntry``, если она включена и
+    пользователь не подписан на «тяжёлых» авторов, иначе запрос по
+    ``Post`` с чтением постов этих авторов на лету.
+    """
+    if not settings.FOLLOW_FEED_MATERIALIZED:
+        return Post.objects.filter(
+            author__following__user=user
+        ).select_related('author', 'group')
+    heavy = heavy_authors()
+    followed_heavy = list(
+        Follow.objects.filter(
+            user=user, author_id__in=heavy
+        ).values_list('author_id', flat=True)
+    ) if heavy else []
+    if not followed_heavy:
+        return FeedEntry.objects.filter(user=user).select_related(
+            'post__author', 'post__group'
+        )
+    inbox = FeedEntry.objects.filter(user=user).values('post_id')
+    return Post.objects.filter(
+        Q(pk__in=inbox) | Q(author_id__in=followed_heavy)
+    ).select_related('author', 'group')
+
+
+def as_posts(page_obj):
+    """Заменяет записи входящей ленты на странице их постами."""
+    page_obj.object_list = [
+        entry.post if isinstance(entry, FeedEntry) else entry
+        for entry in page_obj.object_list
+    ]
+    return page_obj
+
+
+def newer_posts(user, post_id, limit):
+    """Посты ленты подписок новее поста ``post_id``, свежие первыми."""
+    entries = follow_feed(user)
+    field = 'post_id' if entries.model is FeedEntry else 'pk'
+    entries = entries.filter(**{f'{field}__gt': post_id})[:limit]
+    return [
+        entry.post if isinstance(entry, FeedEntry) else entry
+        for entry in entries
+    ]
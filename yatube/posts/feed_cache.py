@@ -0,0 +1,86 @@
+"""Версионированный кэш фрагментов ленты.
+
+Ключ фрагмента содержит номер версии ленты, который увеличивается при
+сохранении и удалении любого поста. Старые фрагменты после этого просто
+перестают читаться и вытесняются по таймауту ``FEED_CACHE_TIMEOUT``.
+
+Если сам ключ версии вытеснен, счётчик начинается заново со значения
+``time.time_ns()``, а не с 1: иначе вернулись бы старые номера версий, и
+с ними фрагменты, документы лент и ETag, собранные до правок.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import caches
+
+VERSION_KEY = 'posts:feed:version'
+CHANGED_KEY = 'posts:feed:changed'
+COUNTER_KEY = 'posts:feed:{}'
+HIT = 'hits'
+MISS = 'misses'
+
+
+def get_cache():
+    """Кэш приложения posts, общий для всех процессов при общем бэкенде."""
+    return caches[settings.POSTS_CACHE_ALIAS]
+
+
+def version():
+    return get_cache().get_or_set(VERSION_KEY, time.time_ns, None)
+
+
+def invalidate():
+    """Делает устаревшими все закэшированные фрагменты ленты."""
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), None)
+    cache.set(CHANGED_KEY, datetime.now(timezone.utc).timestamp(), None)
+
+
+def changed_at():
+    """Время последнего изменения постов или None, если оно неизвестно."""
+    timestamp = get_cache().get(CHANGED_KEY)
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+def fragment_key(scope, vary_on):
+    digest = hashlib.md5(
+        ':'.join(str(value) for value in vary_on).encode()
+    ).hexdigest()
+    return f'posts:feed:{scope}:{version()}:{digest}'
+
+
+def record(kind):
+    cache = get_cache()
+    key = COUNTER_KEY.format(kind)
+    if cache.add(key, 1, None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def counters():
+    """Счётчики попаданий и промахов кэша ленты."""
+    cache = get_cache()
+    hits = cache.get(COUNTER_KEY.format(HIT), 0)
+    misses = cache.get(COUNTER_KEY.format(MISS), 0)
+    total = hits + misses
+    return {
+        HIT: hits,
+        MISS: misses,
+        'ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_counters():
+    get_cache().delete_many(
+        [COUNTER_KEY.format(HIT), COUNTER_KEY.format(MISS)]
+    )
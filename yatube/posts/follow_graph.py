@@ -0,0 +1,116 @@
+"""Граф подписок в кэше.
+
+Для каждого подписчика в кэше лежит отсортированный массив id авторов,
+на которых он подписан, и метка его последнего изменения. Массив читается
+из таблицы ``Follow`` при первом обращении и дальше правится сигналами
+при подписке и отписке, так что проверка «подписан ли» и пометка целого
+списка карточек стоят одного чтения кэша и O(1) на автора.
+
+Метка меняется при каждой правке и входит в ETag и ключи фрагментов
+страниц с кнопками подписки. Массовые изменения мимо сигналов (например,
+``seed_data``) сбрасывают весь граф через ``invalidate_all``; номер
+поколения, как и версия ленты, начинается с ``time.time_ns()``, чтобы
+после вытеснения ключа не вернулись старые подписки. Правка
+массива — чтение и запись без блокировки: если два запроса одного
+пользователя правят его одновременно, одна правка может потеряться до
+истечения ``FOLLOW_GRAPH_TIMEOUT``. Поэтому граф используется только
+для отрисовки, а подписка всегда пишется в таблицу.
+"""
+import time
+from array import array
+
+from django.conf import settings
+
+from .feed_cache import get_cache
+from .models import Follow
+
+GENERATION_KEY = 'posts:follows:generation'
+REQUEST_ATTR = '_follow_graph'
+
+
+class Following:
+    """Подписки одного пользователя: метка и множество id авторов."""
+
+    def __init__(self, stamp, authors):
+        self.stamp = stamp
+        self.authors = frozenset(authors)
+
+    def __contains__(self, author_id):
+        return author_id in self.authors
+
+    def among(self, author_ids):
+        """Те из ``author_ids``, на кого пользователь подписан."""
+        return self.authors.intersection(author_ids)
+
+
+NOBODY = Following(None, ())
+
+
+def generation():
+    return get_cache().get_or_set(GENERATION_KEY, time.time_ns, None)
+
+
+def invalidate_all():
+    """Сбрасывает закэшированные подписки всех пользователей."""
+    cache = get_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def cache_key(user_id):
+    return f'posts:follows:{generation()}:{user_id}'
+
+
+def store(key, authors):
+    stamp = time.time_ns()
+    get_cache().set(
+        key, (stamp, array('q', sorted(authors))),
+        settings.FOLLOW_GRAPH_TIMEOUT
+    )
+    return stamp
+
+
+def following(user_id):
+    """Подписки пользователя, при промахе кэша — из таблицы ``Follow``."""
+    key = cache_key(user_id)
+    cached = get_cache().get(key)
+    if cached is not None:
+        return Following(*cached)
+    authors = Follow.objects.filter(user_id=user_id).values_list(
+        'author_id', flat=True
+    )
+    authors = list(authors)
+    return Following(store(key, authors), authors)
+
+
+def for_request(request):
+    """Подписки текущего пользователя, одно чтение кэша на запрос."""
+    if not request.user.is_authenticated:
+        return NOBODY
+    if not hasattr(request, REQUEST_ATTR):
+        setattr(request, REQUEST_ATTR, following(request.user.pk))
+    return getattr(request, REQUEST_ATTR)
+
+
+def is_following(user_id, author_id):
+    return author_id in following(user_id)
+
+
+def update(user_id, author_id, followed):
+    """Правит закэшированные подписки после подписки или отписки.
+
+    Если подписок пользователя в кэше нет, они прочитаются из таблицы при
+    следующем обращении.
+    """
+    key = cache_key(user_id)
+    cached = get_cache().get(key)
+    if cached is None:
+        return
+    authors = set(cached[1])
+    if followed:
+        authors.add(author_id)
+    else:
+        authors.discard(author_id)
+    store(key, authors)
@@ -0,0 +1,85 @@
+"""Каталог групп со счётчиками постов и временем последнего поста.
+
+``Group.posts_count`` и ``Group.last_post_at`` меняются сигналами: новый
+пост увеличивает счётчик своей группы, а удаление поста или перенос в
+другую группу пересчитывают затронутые группы по индексу
+``(group, pub_date)``. Каталог сортируется по этим колонкам и индексу
+``-last_post_at``, не читая ``posts_post``, и хранится в кэше до
+следующего изменения групп или их постов.
+"""
+from django.conf import settings
+from django.db.models import Count, F, Max, Q
+
+from .feed_cache import get_cache
+from .models import Group, Post
+
+DIRECTORY_KEY = 'posts:groups:{}'
+# Порядок каталога -> сортировка запроса. SQLite ставит NULL в конец
+# убывающей сортировки, так что группы без постов идут последними.
+ORDERS = {
+    'activity': ('-last_post_at', 'title'),
+    'posts': ('-posts_count', 'title'),
+    'title': ('title',),
+}
+DEFAULT_ORDER = 'activity'
+FIELDS = ('title', 'slug', 'description', 'posts_count', 'last_post_at')
+
+
+def directory(order):
+    """Строки каталога в порядке ``order`` из кэша или одним запросом."""
+    cache = get_cache()
+    key = DIRECTORY_KEY.format(order)
+    rows = cache.get(key)
+    if rows is None:
+        rows = list(
+            Group.objects.order_by(*ORDERS[order]).values(*FIELDS)
+        )
+        cache.set(key, rows, settings.GROUPS_CACHE_TIMEOUT)
+    return rows
+
+
+def invalidate():
+    get_cache().delete_many([DIRECTORY_KEY.format(order) for order in ORDERS])
+
+
+def post_added(post):
+    """Учитывает новый пост в счётчике и дате его группы."""
+    if post.group_id is None:
+        return
+    Group.objects.filter(pk=post.group_id).update(
+        posts_count=F('posts_count') + 1
+    )
+    Group.objects.filter(
+        Q(last_post_at__isnull=True) | Q(last_post_at__lt=post.pub_date),
+        pk=post.group_id
+    ).update(last_post_at=post.pub_date)
+    invalidate()
+
+
+def recount(*group_ids):
+    """Пересчитывает счётчик и дату групп по их постам."""
+    for group_id in set(group_ids) - {None}:
+        activity = Post.objects.filter(group_id=group_id).aggregate(
+            total=Count('pk'), latest=Max('pub_date')
+        )
+        Group.objects.filter(pk=group_id).update(
+            posts_count=activity['total'], last_post_at=activity['latest']
+        )
+    invalidate()
+
+
+def reconcile():
+    """Пересчитывает все группы одним агрегирующим запросом."""
+    activity = {
+        row['group']: row for row in Post.objects.filter(
+            group__isnull=False
+        ).order_by().values('group').annotate(
+            total=Count('pk'), latest=Max('pub_date')
+        )
+    }
+    for group_id in Group.objects.values_list('pk', flat=True):
+        row = activity.get(group_id, {'total': 0, 'latest': None})
+        Group.objects.filter(pk=group_id).update(
+            posts_count=row['total'], last_post_at=row['latest']
+        )
+    invalidate()
@@ -0,0 +1,132 @@
+import asyncio
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+
+from core.asgi import AsgiHandler, StartResponse, environ_for
+
+
+def scope_for(url):
+    parts = urlsplit(url)
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'path': parts.path or '/',
+        'query_string': parts.query.encode(),
+        'headers': [(b'host', b'testserver')],
+        'server': ('testserver', 80),
+    }
+
+
+def result(started, statuses):
+    elapsed = time.perf_counter() - started
+    return {
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(statuses) / elapsed, 1),
+        'errors': sum(status != 200 for status in statuses),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность WSGI и ASGI на медленных '
+        'клиентах: каждый клиент читает ответ с задержкой --client-delay.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Потоков у WSGI-сервера и в пуле ASGI.'
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=50,
+            help='Сколько миллисекунд клиент читает ответ.'
+        )
+        parser.add_argument('--output', default='-')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['workers'] < 1:
+            raise CommandError('--requests и --workers должны быть больше 0.')
+        delay = options['client_delay'] / 1000
+        scope = scope_for(options['url'])
+        report = {
+            'url': options['url'],
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'workers': options['workers'],
+            'client_delay_ms': options['client_delay'],
+            'wsgi': self.run_wsgi(scope, delay, options),
+            'asgi': asyncio.run(self.run_asgi(scope, delay, options)),
+        }
+        report = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(report)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(report)
+
+    def run_wsgi(self, scope, delay, options):
+        """Потоковый WSGI-сервер: поток занят, пока клиент читает ответ."""
+        application = WSGIHandler()
+
+        def request():
+            start_response = StartResponse()
+            response = application(
+                environ_for(scope, io.BytesIO()), start_response
+            )
+            try:
+                for _ in response:
+                    pass
+                time.sleep(delay)
+            finally:
+                response.close()
+            return start_response.status
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            statuses = list(pool.map(
+                lambda _: request(), range(options['requests'])
+            ))
+        return result(started, statuses)
+
+    async def run_asgi(self, scope, delay, options):
+        """ASGI: пока клиент читает ответ, поток пула свободен."""
+        application = AsgiHandler(WSGIHandler(), options['workers'])
+        limit = asyncio.Semaphore(options['concurrency'])
+
+        async def request():
+            status = None
+            sent = False
+
+            async def receive():
+                nonlocal sent
+                if sent:
+                    await asyncio.Event().wait()
+                sent = True
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                nonlocal status
+                if message['type'] == 'http.response.start':
+                    status = message['status']
+                elif not message.get('more_body'):
+                    await asyncio.sleep(delay)
+
+            async with limit:
+                await application(scope, receive, send)
+            return status
+
+        started = time.perf_counter()
+        statuses = await asyncio.gather(
+            *(request() for _ in range(options['requests']))
+        )
+        application.executor.shutdown()
+        return result(started, statuses)
@@ -0,0 +1,149 @@
+import json
+import statistics
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Engine, RequestContext, engines
+from django.template.loader_tags import IncludeNode
+from django.test import RequestFactory, override_settings
+from django.urls import resolve
+
+from posts import feed_cache, follow_graph
+from posts.models import Post
+from posts.utils import POSTS_PER_PAGE, get_page_context
+
+TEMPLATE = 'posts/index.html'
+BENCHMARK_CACHE = 'benchmark'
+
+
+def private_cache():
+    """Кэш posts в памяти команды: сброс версии ленты на каждом прогоне
+    не должен сбрасывать фрагменты и ETag работающего сайта."""
+    return override_settings(
+        CACHES={
+            **settings.CACHES,
+            BENCHMARK_CACHE: {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': BENCHMARK_CACHE,
+            },
+        },
+        POSTS_CACHE_ALIAS=BENCHMARK_CACHE
+    )
+
+
+@contextmanager
+def timed_includes(timings):
+    """Копит время каждого ``{% include %}`` вместе с вложенными."""
+    original = IncludeNode.render
+
+    def render(self, context):
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            timings[self.template.token.strip('\'"')].append(
+                (time.perf_counter() - started) * 1000
+            )
+
+    IncludeNode.render = render
+    try:
+        yield
+    finally:
+        IncludeNode.render = original
+
+
+def make_engine(cached):
+    base = engines['django'].engine
+    loaders = settings.TEMPLATE_LOADERS
+    return Engine(
+        dirs=base.dirs,
+        context_processors=base.context_processors,
+        libraries=base.libraries,
+        loaders=[
+            ('django.template.loaders.cached.Loader', loaders)
+        ] if cached else loaders,
+    )
+
+
+def page_request():
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    request.resolver_match = resolve('/')
+    return request
+
+
+class Command(BaseCommand):
+    help = (
+        f'Замеряет отрисовку {TEMPLATE} с {POSTS_PER_PAGE} постами без '
+        'кэша шаблонов и с ним и считает стоимость каждого include.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=50)
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для результата, по умолчанию stdout.'
+        )
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs должен быть больше 0.')
+        request = page_request()
+        page_obj = get_page_context(
+            Post.objects.select_related('author', 'group'), request
+        )
+        if len(page_obj.object_list) < POSTS_PER_PAGE:
+            raise CommandError(
+                f'Нужно хотя бы {POSTS_PER_PAGE} постов, запустите seed_data.'
+            )
+        context = {'page_obj': page_obj, 'follows': follow_graph.NOBODY}
+        with private_cache():
+            report = {
+                'template': TEMPLATE,
+                'posts': len(page_obj.object_list),
+                'runs': options['runs'],
+                'uncached': self.measure(False, request, context, options),
+                'cached': self.measure(True, request, context, options),
+            }
+        report = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(report)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(report)
+
+    def measure(self, cached, request, context, options):
+        engine = make_engine(cached)
+        renders = []
+        includes = defaultdict(list)
+        with timed_includes(includes):
+            for _ in range(options['runs']):
+                # Иначе {% feedcache %} отдаст ленту из кэша фрагментов;
+                # версия сбрасывается только в private_cache().
+                feed_cache.invalidate()
+                started = time.perf_counter()
+                engine.get_template(TEMPLATE).render(
+                    RequestContext(request, context)
+                )
+                renders.append((time.perf_counter() - started) * 1000)
+        runs = options['runs']
+        return {
+            'render_ms': {
+                'first': round(renders[0], 3),
+                'median': round(statistics.median(renders), 3),
+                'p95': round(sorted(renders)[int(runs * 0.95) - 1], 3)
+                if runs >= 20 else None,
+            },
+            'includes': {
+                name: {
+                    'calls_per_render': len(timings) // runs,
+                    'ms_per_call': round(statistics.median(timings), 4),
+                    'ms_per_render': round(sum(timings) / runs, 3),
+                }
+                for name, timings in sorted(includes.items())
+            },
+        }
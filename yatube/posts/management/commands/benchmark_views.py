@@ -0,0 +1,160 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import query_plans
+from posts import feed_cache
+from posts.models import Follow, Group, Post, User
+from posts.utils import POSTS_PER_PAGE, CursorPaginator
+
+from .benchmark_templates import private_cache
+
+
+def summary(timings, queries):
+    timings = sorted(timings)
+    return {
+        'runs': len(timings),
+        'min_ms': round(timings[0], 2),
+        'median_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1], 2),
+        'max_ms': round(timings[-1], 2),
+        'mean_ms': round(statistics.mean(timings), 2),
+        'queries': max(queries),
+    }
+
+
+def cursor_for_page(number):
+    """Токен ``?cursor=`` страницы ``number`` ленты index, полученный
+    проходом по цепочке ``next_cursor``, как при листании вперёд."""
+    token = None
+    for _ in range(number - 1):
+        page = CursorPaginator(
+            Post.objects.only('pk', 'pub_date'), POSTS_PER_PAGE
+        ).cursor_page(token)
+        if page.next_cursor is None:
+            raise CommandError(f'В ленте меньше {number} страниц.')
+        token = page.next_cursor
+    return token
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время отрисовки index, group_list, profile, post_detail '
+        'и follow_index и пишет результат в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для результата, по умолчанию stdout.'
+        )
+        parser.add_argument(
+            '--warm-cache', action='store_true',
+            help='Не сбрасывать кэш ленты перед каждым запросом.'
+        )
+        parser.add_argument(
+            '--deep-page', type=int, default=0,
+            help='Дополнительно замерить index на странице N по курсору '
+                 'и по ?page=N (OFFSET) для сравнения.'
+        )
+        parser.add_argument(
+            '--explain', action='store_true',
+            help='Добавить EXPLAIN QUERY PLAN запросов каждой страницы.'
+        )
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs должно быть положительным.')
+        targets = self.targets(options['deep_page'])
+        reader = User.objects.annotate(
+            follows=Count('follower')
+        ).order_by('-follows').first()
+        client = Client()
+        if reader is not None:
+            client.force_login(reader)
+
+        # Сброс версии ленты перед замером не должен задевать кэш сайта.
+        with private_cache():
+            results = self.measure(client, targets, options)
+
+        report = json.dumps({
+            'posts': Post.objects.count(),
+            'users': User.objects.count(),
+            'follows': Follow.objects.count(),
+            'views': results,
+        }, ensure_ascii=False, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(report)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(report)
+
+    def measure(self, client, targets, options):
+        results = {}
+        for name, url in targets:
+            timings, queries = [], []
+            for _ in range(options['runs']):
+                if not options['warm_cache']:
+                    feed_cache.invalidate()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries.append(len(captured))
+                if response.status_code != 200:
+                    raise CommandError(
+                        f'{url} вернул {response.status_code}'
+                    )
+            results[name] = dict(url=url, **summary(timings, queries))
+            if options['explain']:
+                results[name]['plans'] = query_plans.explain(
+                    captured.captured_queries
+                )
+        return results
+
+    def targets(self, deep_page):
+        post = Post.objects.order_by('-pub_date').first()
+        group = Group.objects.annotate(
+            total=Count('posts')
+        ).order_by('-total').first()
+        author = User.objects.annotate(
+            total=Count('posts')
+        ).order_by('-total').first()
+        if post is None or group is None or author is None:
+            raise CommandError(
+                'Нет данных для замеров, сначала запустите seed_data.'
+            )
+        targets = [
+            ('index', reverse('posts:index')),
+            ('group_list', reverse(
+                'posts:group_list', kwargs={'slug': group.slug}
+            )),
+            ('profile', reverse(
+                'posts:profile', kwargs={'username': author.username}
+            )),
+            ('post_detail', reverse(
+                'posts:post_detail', kwargs={'post_id': post.pk}
+            )),
+            ('follow_index', reverse('posts:follow_index')),
+        ]
+        if deep_page > 1:
+            index = reverse('posts:index')
+            targets += [
+                (
+                    f'index_page_{deep_page}',
+                    f'{index}?cursor={cursor_for_page(deep_page)}'
+                ),
+                (
+                    f'index_offset_page_{deep_page}',
+                    f'{index}?page={deep_page}'
+                ),
+            ]
+        return targets
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации «на кого подписаться» по подпискам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько пользователей считать и записывать за раз.'
+        )
+        parser.add_argument(
+            '--top-k', type=int, default=None,
+            help='Сколько кандидатов хранить на пользователя.'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше 0.')
+        written = recommendations.build(
+            batch_size=options['batch_size'], top_k=options['top_k']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Рекомендаций записано: {written}'
+        ))
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит недостающие части карты сайта и её индекс. '
+        'Удобно запускать по расписанию, чтобы поисковики не ждали сборки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url', default=settings.SITEMAP_BASE_URL,
+            help='Адрес сайта для ссылок, по умолчанию SITEMAP_BASE_URL.'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Удалить все файлы и построить карту заново.'
+        )
+
+    def handle(self, *args, **options):
+        if not options['base_url']:
+            raise CommandError('Укажите --base-url или SITEMAP_BASE_URL.')
+        built = sitemaps.build_all(options['base_url'], options['force'])
+        self.stdout.write(self.style.SUCCESS(f'Построено частей: {built}'))
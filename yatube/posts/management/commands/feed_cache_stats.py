@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts import feed_cache
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кэша ленты.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Обнулить счётчики после вывода.'
+        )
+
+    def handle(self, *args, **options):
+        counters = feed_cache.counters()
+        self.stdout.write(
+            f'hits={counters["hits"]} misses={counters["misses"]} '
+            f'ratio={counters["ratio"]:.2%}'
+        )
+        if options['reset']:
+            feed_cache.reset_counters()
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит недостающие миниатюры картинок постов.'
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').filter(
+            thumbnail=''
+        ).values_list('pk', flat=True)
+        executor = thumbnails.get_executor()
+        futures = [
+            executor.submit(thumbnails.generate_in_worker, pk)
+            for pk in posts.iterator()
+        ]
+        built = sum(1 for future in futures if future.result())
+        self.stdout.write(self.style.SUCCESS(
+            f'Построено миниатюр: {built}'
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает оценки обсуждаемых постов по комментариям.'
+
+    def handle(self, *args, **options):
+        scored = trending.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Постов с оценкой: {scored}'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts import feed, stats
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счётчики постов и подписок пользователей с базой.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Размер пачки при записи счётчиков.'
+        )
+
+    def handle(self, *args, **options):
+        fixed = stats.reconcile(batch_size=options['batch_size'])
+        switched = feed.sync_heavy_authors()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков: {fixed}, '
+            f'переключено авторов ленты: {switched}'
+        ))
@@ -0,0 +1,214 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from posts import (
+    feed, feed_cache, follow_graph, groups, recommendations, search, sitemaps,
+    stats, trending
+)
+from posts.models import Comment, Follow, Group, Post, User
+
+SEED_PREFIX = 'seed_'
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Временно отключает auto_now_add, чтобы сохранить заданные даты."""
+    saved = [(field, field.auto_now_add) for field in fields]
+    for field, _ in saved:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in saved:
+            field.auto_now_add = value
+
+
+def batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу большим объёмом пользователей, групп, постов, '
+        'комментариев и подписок для нагрузочных замеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument(
+            '--follows-per-user', type=int, default=50,
+            help='Среднее число подписок на пользователя.'
+        )
+        parser.add_argument(
+            '--distribution', choices=('uniform', 'zipf'), default='zipf',
+            help='Распределение популярности авторов в графе подписок.'
+        )
+        parser.add_argument(
+            '--zipf-exponent', type=float, default=1.1,
+            help='Показатель степени для распределения zipf.'
+        )
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument(
+            '--skip-derived', action='store_true',
+            help='Не пересобирать ленты подписок, счётчики и рекомендации.'
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.period = timedelta(days=options['days'])
+
+        user_ids = self.create_users(options['users'])
+        group_ids = self.create_groups(options['groups'])
+        post_ids = self.create_posts(options['posts'], user_ids, group_ids)
+        self.create_comments(options['comments'], user_ids, post_ids)
+        self.create_follows(
+            user_ids,
+            options['follows_per_user'],
+            options['distribution'],
+            options['zipf_exponent']
+        )
+        if not options['skip_derived']:
+            self.log(
+                'Пересборка лент подписок, счётчиков, рекомендаций и поиска'
+            )
+            # Флаги «тяжёлых» авторов ленты берутся из счётчиков.
+            stats.reconcile(batch_size=self.batch_size)
+            feed.rebuild()
+            recommendations.build()
+            trending.rebuild()
+            groups.reconcile()
+            search.rebuild(batch_size=self.batch_size)
+        feed_cache.invalidate()
+        follow_graph.invalidate_all()
+        sitemaps.clear()
+        self.stdout.write(self.style.SUCCESS('Готово'))
+
+    def log(self, message):
+        self.stdout.write(f'{message}...')
+
+    def bulk_create(self, model, objects, **kwargs):
+        created = 0
+        for batch in batches(objects, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch, **kwargs)
+            created += len(batch)
+        self.stdout.write(f'  {model.__name__}: {created}')
+
+    def random_date(self):
+        return self.now - self.period * self.random.random()
+
+    def create_users(self, count):
+        self.log('Пользователи')
+        start = User.objects.filter(
+            username__startswith=SEED_PREFIX
+        ).count()
+        self.bulk_create(User, (
+            User(
+                username=f'{SEED_PREFIX}{start + i}',
+                first_name='Тестовый',
+                last_name=f'Автор {start + i}',
+                password='!'
+            )
+            for i in range(count)
+        ))
+        return list(User.objects.values_list('pk', flat=True))
+
+    def create_groups(self, count):
+        self.log('Группы')
+        start = Group.objects.count()
+        self.bulk_create(Group, (
+            Group(
+                title=f'Группа {start + i}',
+                slug=f'{SEED_PREFIX}group-{start + i}',
+                description='Сгенерированная группа'
+            )
+            for i in range(count)
+        ))
+        return list(Group.objects.values_list('pk', flat=True))
+
+    def create_posts(self, count, user_ids, group_ids):
+        self.log('Посты')
+        choice = self.random.choice
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            self.bulk_create(Post, (
+                Post(
+                    author_id=choice(user_ids),
+                    group_id=choice(group_ids) if group_ids else None,
+                    text=f'Сгенерированный пост {i}',
+                    pub_date=self.random_date()
+                )
+                for i in range(count)
+            ))
+        return list(Post.objects.values_list('pk', flat=True))
+
+    def create_comments(self, count, user_ids, post_ids):
+        self.log('Комментарии')
+        if not post_ids:
+            return
+        choice = self.random.choice
+        with explicit_dates(Comment._meta.get_field('created')):
+            self.bulk_create(Comment, (
+                Comment(
+                    post_id=choice(post_ids),
+                    author_id=choice(user_ids),
+                    text=f'Сгенерированный комментарий {i}',
+                    created=self.random_date()
+                )
+                for i in range(count)
+            ))
+
+    def author_weights(self, user_ids, distribution, exponent):
+        if distribution == 'uniform':
+            return None
+        ranked = user_ids[:]
+        self.random.shuffle(ranked)
+        weights, total = [], 0.0
+        for rank in range(1, len(ranked) + 1):
+            total += 1 / rank ** exponent
+            weights.append(total)
+        return ranked, weights
+
+    def create_follows(self, user_ids, per_user, distribution, exponent):
+        self.log('Подписки')
+        if len(user_ids) < 2 or per_user <= 0:
+            return
+        weighted = self.author_weights(user_ids, distribution, exponent)
+
+        def pick_authors(k):
+            if weighted is None:
+                return self.random.sample(user_ids, k)
+            ranked, cum_weights = weighted
+            return set(self.random.choices(
+                ranked, cum_weights=cum_weights, k=k
+            ))
+
+        def follows():
+            for user_id in user_ids:
+                k = min(
+                    len(user_ids) - 1,
+                    max(0, int(self.random.expovariate(1 / per_user)))
+                )
+                for author_id in pick_authors(k):
+                    if author_id != user_id:
+                        yield Follow(user_id=user_id, author_id=author_id)
+
+        self.bulk_create(Follow, follows(), ignore_conflicts=True)
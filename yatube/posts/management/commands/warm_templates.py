@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.templates import warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        'Компилирует все шаблоны из templates/ и сообщает об ошибках '
+        'разбора. Кэш шаблонов живёт в памяти процесса, поэтому серверы '
+        'прогревают его сами при TEMPLATE_WARM_UP.'
+    )
+
+    def handle(self, *args, **options):
+        compiled, seconds, errors = warm_up()
+        for name, error in errors.items():
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(f'Шаблонов с ошибками: {len(errors)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Скомпилировано шаблонов: {compiled} за {seconds * 1000:.1f} мс'
+        ))
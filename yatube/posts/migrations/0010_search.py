@@ -0,0 +1,49 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:11
+
+from django.db import DatabaseError, migrations, models
+import django.db.models.deletion
+
+FTS_TABLE_SQL = (
+    "CREATE VIRTUAL TABLE posts_search USING fts5("
+    "body, post_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(FTS_TABLE_SQL)
+    except DatabaseError:
+        # SQLite собран без FTS5: поиск работает по SearchEntry.
+        pass
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_thumbnail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Слово')),
+                ('document', models.PositiveIntegerField(db_index=True, verbose_name='Документ')),
+                ('count', models.PositiveIntegerField(verbose_name='Вхождений')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Post', verbose_name='Пост')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchentry',
+            index=models.Index(fields=['term', 'post'], name='search_term_post_idx'),
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:33
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def fill_group_activity(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    activity = Post.objects.filter(group__isnull=False).order_by().values(
+        'group'
+    ).annotate(total=Count('pk'), latest=Max('pub_date'))
+    for row in activity:
+        Group.objects.filter(pk=row['group']).update(
+            posts_count=row['total'], last_post_at=row['latest']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_trendingscore'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='last_post_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Последний пост'),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Постов'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['-last_post_at'], name='group_last_post_at_idx'),
+        ),
+        migrations.RunPython(fill_group_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_heavy_authors(apps, schema_editor):
+    # Раньше «тяжёлые» авторы определялись тем же лимитом по подпискам,
+    # так что их посты уже не были разложены по лентам.
+    UserStats = apps.get_model('posts', 'UserStats')
+    UserStats.objects.filter(
+        followers_count__gt=settings.FOLLOW_FEED_FANOUT_LIMIT
+    ).update(heavy=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_group_activity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='heavy',
+            field=models.BooleanField(db_index=True, default=False, editable=False, verbose_name='Посты читаются на лету'),
+        ),
+        migrations.RunPython(mark_heavy_authors, migrations.RunPython.noop),
+    ]
@@ -6,6 +6,19 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        'Постов', default=0, editable=False
+    )
+    last_post_at = models.DateTimeField(
+        'Последний пост', null=True, editable=False
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-last_post_at'], name='group_last_post_at_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -28,7 +41,8 @@ class Post(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='posts',
-        verbose_name='Автор'
+        verbose_name='Автор',
+        db_index=False
     )
     group = models.ForeignKey(
         Group,
@@ -36,6 +50,7 @@ class Post(models.Model):
         related_name='posts',
         blank=True,
         null=True,
+        db_index=False,
         verbose_name='Группа',
         help_text='Группа, к которой будет относиться пост'
     )
@@ -45,12 +60,44 @@ class Post(models.Model):
         blank=True,
         help_text='Загрузите картинку'
     )
+    thumbnail = models.CharField(
+        'Миниатюра',
+        max_length=255,
+        blank=True,
+        editable=False
+    )
+    thumbnail_width = models.PositiveSmallIntegerField(
+        'Ширина миниатюры',
+        null=True,
+        editable=False
+    )
+    thumbnail_height = models.PositiveSmallIntegerField(
+        'Высота миниатюры',
+        null=True,
+        editable=False
+    )
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def thumbnail_url(self):
+        return self.image.storage.url(self.thumbnail)
+
     class Meta:
         ordering = ['-pub_date']
+        # Индексы повторяют сортировку лент автора и группы, поэтому
+        # отдельные индексы по author_id и group_id не нужны.
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -62,7 +109,8 @@ class Comment(models.Model):
         Post,
         related_name='comments',
         on_delete=models.CASCADE,
-        verbose_name='Пост'
+        verbose_name='Пост',
+        db_index=False
     )
     author = models.ForeignKey(
         User,
@@ -77,6 +125,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx'
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -100,3 +154,140 @@ class Follow(models.Model):
                 name='unique_follow'
             )
         ]
+
+
+class FeedEntry(models.Model):
+    """Запись во входящей ленте подписчика (fan-out-on-write)."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ['-pub_date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-id'],
+                name='feed_user_pub_date_idx'
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='feed_user_author_idx'
+            ),
+        ]
+
+
+class UserStats(models.Model):
+    """Денормализованные счётчики профиля пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    # Посты не раскладываются по лентам подписчиков, а читаются на лету
+    # (см. posts.feed). Флаг меняется только при переходе через лимит.
+    heavy = models.BooleanField(
+        'Посты читаются на лету', default=False, db_index=True,
+        editable=False
+    )
+
+    def __str__(self):
+        return f'{self.user}: {self.posts_count}'
+
+
+class SearchEntry(models.Model):
+    """Строка инвертированного индекса поиска (без FTS5).
+
+    ``document`` — номер проиндексированного текста: ``2 * id`` для поста
+    и ``2 * id + 1`` для комментария.
+    """
+    term = models.CharField('Слово', max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Пост'
+    )
+    document = models.PositiveIntegerField('Документ', db_index=True)
+    count = models.PositiveIntegerField('Вхождений')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'post'], name='search_term_post_idx'),
+        ]
+
+
+class Recommendation(models.Model):
+    """Предложенный пользователю автор, см. posts.recommendations."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Пользователь',
+        db_index=False
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    score = models.FloatField('Оценка')
+    common_count = models.PositiveIntegerField('Общих подписок')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_recommendation'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-score'],
+                name='recommendation_user_score_idx'
+            ),
+        ]
+
+
+class TrendingScore(models.Model):
+    """Затухающая оценка обсуждаемости поста, см. posts.trending."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Пост'
+    )
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score'], name='trending_score_idx'),
+        ]
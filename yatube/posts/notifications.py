@@ -0,0 +1,181 @@
+"""Уведомления о новых постах для ленты подписок.
+
+Подписчик ленты получает события через server-sent events, если
+включён ``NOTIFICATIONS_STREAM``; иначе страница сама опрашивает
+``follow/new/``, не занимая поток сервера на каждую открытую вкладку.
+События
+раздаёт брокер в памяти процесса: подписка хранит множество авторов, на
+которых подписан пользователь, и очередь событий. Новый пост публикуется
+после коммита транзакции.
+
+Если задан ``NOTIFICATIONS_SOCKET_DIR``, каждый процесс с открытыми
+подписками слушает в этом каталоге свой unix-сокет, и событие
+рассылается во все процессы — замена внешней шине при нескольких
+воркерах на одной машине.
+"""
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+RETRY_MS = 5000
+MAX_DATAGRAM = 65536
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, authors):
+        self.authors = frozenset(authors)
+        self.events = queue.SimpleQueue()
+
+    def get(self, timeout):
+        """Следующее событие или None, если за timeout секунд его не было."""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class Broker:
+    """Раздаёт события о постах подпискам на их авторов."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.by_author = {}
+
+    def subscribe(self, authors):
+        subscription = Subscription(authors)
+        with self.lock:
+            for author in subscription.authors:
+                self.by_author.setdefault(author, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for author in subscription.authors:
+                subscribers = self.by_author.get(author)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.by_author[author]
+
+    def dispatch(self, event):
+        with self.lock:
+            subscribers = list(self.by_author.get(event['author_id'], ()))
+        for subscription in subscribers:
+            subscription.events.put(event)
+
+
+broker = Broker()
+_listener_path = None
+_listener_lock = threading.Lock()
+
+
+def listen():
+    """Запускает приём событий других процессов через unix-сокет."""
+    global _listener_path
+    directory = settings.NOTIFICATIONS_SOCKET_DIR
+    if not directory or _listener_path is not None:
+        return
+    with _listener_lock:
+        if _listener_path is not None:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.sock')
+        if os.path.exists(path):
+            os.remove(path)
+        receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        receiver.bind(path)
+        threading.Thread(
+            target=receive_forever, args=(receiver,),
+            name='notifications', daemon=True
+        ).start()
+        _listener_path = path
+
+
+def receive_forever(receiver):
+    while True:
+        data = receiver.recv(MAX_DATAGRAM)
+        try:
+            broker.dispatch(json.loads(data))
+        except (ValueError, KeyError):
+            logger.warning('Некорректное уведомление: %r', data[:100])
+
+
+def relay(event):
+    """Отправляет событие в сокеты остальных процессов."""
+    directory = settings.NOTIFICATIONS_SOCKET_DIR
+    if not directory or not os.path.isdir(directory):
+        return
+    payload = json.dumps(event).encode()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+        for entry in os.scandir(directory):
+            if not entry.name.endswith('.sock'):
+                continue
+            if entry.path == _listener_path:
+                continue
+            try:
+                sender.sendto(payload, entry.path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Процесс завершился, не убрав за собой сокет.
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+            except OSError:
+                logger.warning('Не удалось отправить уведомление в %s',
+                               entry.path)
+
+
+def publish(event):
+    broker.dispatch(event)
+    relay(event)
+
+
+def notify_new_post(post):
+    """Публикует событие о посте после коммита транзакции."""
+    event = {
+        'id': post.pk,
+        'author_id': post.author_id,
+        'author': post.author.username,
+    }
+    transaction.on_commit(lambda: publish(event))
+
+
+def event_stream(authors):
+    """Поток server-sent events о новых постах авторов ``authors``.
+
+    Раз в ``NOTIFICATIONS_HEARTBEAT`` секунд отправляется комментарий,
+    чтобы прокси не закрыли соединение. Через
+    ``NOTIFICATIONS_STREAM_TIMEOUT`` секунд поток завершается, и браузер
+    сам переподключается, заодно обновляя список авторов.
+    """
+    listen()
+    subscription = broker.subscribe(authors)
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        deadline = time.monotonic() + settings.NOTIFICATIONS_STREAM_TIMEOUT
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            event = subscription.get(
+                min(settings.NOTIFICATIONS_HEARTBEAT, remaining)
+            )
+            if event is None:
+                yield ': ping\n\n'
+                continue
+            yield (
+                f'id: {event["id"]}\nevent: post\n'
+                f'data: {json.dumps(event)}\n\n'
+            )
+    finally:
+        broker.unsubscribe(subscription)
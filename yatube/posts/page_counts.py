@@ -0,0 +1,59 @@
+"""Приблизительное число постов для пагинатора.
+
+Пагинатору нужно общее число записей только для «из ~N» и ссылки на
+последнюю страницу, поэтому вместо ``COUNT(*)`` на каждый запрос число
+берётся из кэша по области ленты: весь сайт, группа, автор или подписки
+читателя. Значение пересчитывается не чаще раза в
+``PAGE_COUNTS_TIMEOUT`` секунд и между пересчётами может отставать.
+
+Для группы и автора пересчёт читает денормализованные счётчики
+(``Group.posts_count``, ``UserStats.posts_count``), для подписок —
+сумму счётчиков авторов из графа подписок, и только для всего сайта —
+``COUNT(*)`` по таблице постов. Ключ подписок содержит метку графа, так
+что подписка и отписка сразу меняют число.
+"""
+from django.conf import settings
+from django.db.models import Sum
+
+from . import follow_graph
+from .feed_cache import get_cache
+from .models import Group, Post, UserStats
+
+COUNT_KEY = 'posts:count:{}'
+
+
+def cached(scope, compute):
+    """Число области ``scope`` из кэша, при промахе — ``compute()``."""
+    cache = get_cache()
+    key = COUNT_KEY.format(scope)
+    count = cache.get(key)
+    if count is None:
+        count = compute()
+        cache.set(key, count, settings.PAGE_COUNTS_TIMEOUT)
+    return count
+
+
+def site():
+    return cached('site', Post.objects.count)
+
+
+def group(group_id):
+    return cached(f'group:{group_id}', lambda: Group.objects.filter(
+        pk=group_id
+    ).values_list('posts_count', flat=True).first() or 0)
+
+
+def author(user_id):
+    return cached(f'author:{user_id}', lambda: UserStats.objects.filter(
+        user_id=user_id
+    ).values_list('posts_count', flat=True).first() or 0)
+
+
+def follows(user_id):
+    following = follow_graph.following(user_id)
+    return cached(
+        f'follows:{user_id}:{following.stamp}',
+        lambda: UserStats.objects.filter(
+            user_id__in=following.authors
+        ).aggregate(total=Sum('posts_count'))['total'] or 0
+    )
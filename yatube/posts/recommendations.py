@@ -0,0 +1,145 @@
+"""Рекомендации «на кого подписаться», посчитанные заранее.
+
+Команда ``build_recommendations`` один раз читает таблицу ``Follow`` в
+разреженную матрицу смежности: для каждого подписчика — отсортированный
+массив id авторов. Затем пачками по ``batch_size`` пользователей для
+каждого считаются авторы на расстоянии двух шагов (подписки подписок):
+число общих соседей — сколько подписок пользователя подписаны на
+кандидата. Оценка — это число, умноженное на свежесть последнего поста
+кандидата с полураспадом ``RECOMMENDATIONS_HALF_LIFE_DAYS`` дней. Тем, у
+кого кандидатов не хватает, предлагаются популярные авторы.
+
+Лучшие ``RECOMMENDATIONS_TOP_K`` кандидатов пишутся в ``Recommendation``,
+а страницы читают их одним запросом по индексу ``(user, -score)`` и
+отбрасывают тех, на кого пользователь уже подписался, по графу подписок.
+"""
+import heapq
+import time
+from array import array
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import follow_graph
+from .feed_cache import get_cache
+from .models import Follow, Post, Recommendation, User, UserStats
+
+BUILT_KEY = 'posts:recommendations:built'
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def adjacency():
+    """Подписки всех пользователей: id -> отсортированный массив авторов."""
+    following = defaultdict(list)
+    rows = Follow.objects.order_by().values_list('user_id', 'author_id')
+    for user_id, author_id in rows.iterator(chunk_size=10000):
+        following[user_id].append(author_id)
+    return {
+        user_id: array('q', sorted(authors))
+        for user_id, authors in following.items()
+    }
+
+
+def freshness(now):
+    """Id автора -> множитель свежести его последнего поста."""
+    half_life = settings.RECOMMENDATIONS_HALF_LIFE_DAYS * SECONDS_PER_DAY
+    latest = Post.objects.order_by().values('author').annotate(
+        latest=Max('pub_date')
+    ).values_list('author', 'latest')
+    return {
+        author_id: 0.5 ** ((now - pub_date).total_seconds() / half_life)
+        for author_id, pub_date in latest.iterator()
+    }
+
+
+def popular(fresh, size):
+    """Самые популярные авторы с постами: список (оценка, id)."""
+    followers = UserStats.objects.filter(
+        followers_count__gt=0
+    ).values_list('user_id', 'followers_count')
+    return heapq.nlargest(size, (
+        (count * fresh[author_id], author_id)
+        for author_id, count in followers.iterator()
+        if author_id in fresh
+    ))
+
+
+def candidates(user_id, following, fresh, popular_authors, top_k):
+    """Лучшие ``top_k`` кандидатов: список (оценка, общих соседей, id)."""
+    followed = following.get(user_id, ())
+    common = Counter()
+    for author_id in followed:
+        common.update(following.get(author_id, ()))
+    excluded = set(followed)
+    excluded.add(user_id)
+    best = heapq.nlargest(top_k, (
+        (count * fresh[author_id], count, author_id)
+        for author_id, count in common.items()
+        if author_id not in excluded and author_id in fresh
+    ))
+    chosen = excluded.union(author_id for _, _, author_id in best)
+    # Популярные авторы идут после всех кандидатов по общим соседям:
+    # их оценка меньше последней из найденных.
+    lowest = best[-1][0] if best else 1
+    for score, author_id in popular_authors:
+        if len(best) >= top_k:
+            break
+        if author_id not in chosen:
+            best.append((lowest * score / (score + 1), 0, author_id))
+    return best
+
+
+def user_batches(user_ids, batch_size):
+    for start in range(0, len(user_ids), batch_size):
+        yield user_ids[start:start + batch_size]
+
+
+def build(batch_size=500, top_k=None):
+    """Пересчитывает рекомендации всех пользователей.
+
+    Возвращает число записанных рекомендаций.
+    """
+    top_k = top_k or settings.RECOMMENDATIONS_TOP_K
+    following = adjacency()
+    fresh = freshness(timezone.now())
+    popular_authors = popular(fresh, top_k * 4)
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    written = 0
+    for batch in user_batches(user_ids, batch_size):
+        rows = [
+            Recommendation(
+                user_id=user_id, author_id=author_id,
+                score=score, common_count=count
+            )
+            for user_id in batch
+            for score, count, author_id in candidates(
+                user_id, following, fresh, popular_authors, top_k
+            )
+        ]
+        with transaction.atomic():
+            Recommendation.objects.filter(user_id__in=batch).delete()
+            Recommendation.objects.bulk_create(rows, batch_size=500)
+        written += len(rows)
+    get_cache().set(BUILT_KEY, time.time(), None)
+    return written
+
+
+def built_at():
+    """Время последнего пересчёта, входит в состояние страниц."""
+    return get_cache().get(BUILT_KEY)
+
+
+def for_request(request):
+    """Рекомендации текущему пользователю одним запросом."""
+    if not request.user.is_authenticated:
+        return []
+    following = follow_graph.for_request(request)
+    rows = Recommendation.objects.filter(user=request.user).select_related(
+        'author'
+    ).order_by('-score')[:settings.RECOMMENDATIONS_TOP_K]
+    return [
+        row for row in rows if row.author_id not in following
+    ][:settings.RECOMMENDATIONS_SHOWN]
@@ -0,0 +1,227 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Если SQLite собран с FTS5, тексты лежат в виртуальной таблице
+``posts_search`` и ранжируются по bm25. Иначе используется собственный
+инвертированный индекс ``SearchEntry``: слово, пост и число вхождений.
+Оба бэкенда находят пост, если все слова запроса есть в его тексте или
+в тексте одного его комментария; ранжируют они по-разному.
+Индекс обновляется сигналами при сохранении и удалении постов и
+комментариев; ``rebuild_search_index`` заполняет его заново.
+"""
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Sum
+from django.db.models.expressions import RawSQL
+
+from .models import Comment, Post, SearchEntry
+
+FTS_TABLE = 'posts_search'
+MAX_TERM_LENGTH = 64
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return [
+        token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(text.lower())
+    ]
+
+
+def post_document(post_id):
+    return 2 * post_id
+
+
+def comment_document(comment_id):
+    return 2 * comment_id + 1
+
+
+class Fts5Backend:
+    name = 'fts5'
+
+    def index(self, document, post_id, text):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [document]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, body, post_id) '
+                'VALUES (%s, %s, %s)',
+                [document, text, post_id]
+            )
+
+    def remove(self, document):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [document]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    @staticmethod
+    def match(terms):
+        return ' '.join(f'"{term}"' for term in terms)
+
+    def count(self, terms):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(DISTINCT post_id) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s',
+                [self.match(terms)]
+            )
+            return cursor.fetchone()[0]
+
+    def ranked_ids(self, terms, offset, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id FROM (SELECT post_id, rank FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s) GROUP BY post_id '
+                'ORDER BY MIN(rank), post_id DESC LIMIT %s OFFSET %s',
+                [self.match(terms), limit, offset]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def matching_ids(self, terms):
+        return RawSQL(
+            f'SELECT post_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [self.match(terms)]
+        )
+
+
+class InvertedIndexBackend:
+    name = 'inverted'
+
+    def index(self, document, post_id, text):
+        self.remove(document)
+        SearchEntry.objects.bulk_create([
+            SearchEntry(
+                term=term, post_id=post_id, document=document, count=count
+            )
+            for term, count in Counter(tokenize(text)).items()
+        ])
+
+    def remove(self, document):
+        SearchEntry.objects.filter(document=document).delete()
+
+    def clear(self):
+        SearchEntry.objects.all().delete()
+
+    def matches(self, terms):
+        # Как и в FTS5, все слова должны встретиться в одном документе:
+        # в тексте поста или в одном из его комментариев.
+        documents = SearchEntry.objects.filter(term__in=terms).values(
+            'document'
+        ).annotate(
+            matched=Count('term', distinct=True)
+        ).filter(matched=len(set(terms))).values('document')
+        return SearchEntry.objects.filter(
+            term__in=terms, document__in=documents
+        ).values('post').annotate(score=Sum('count'))
+
+    def count(self, terms):
+        return self.matches(terms).count()
+
+    def ranked_ids(self, terms, offset, limit):
+        return list(
+            self.matches(terms).order_by('-score', '-post').values_list(
+                'post', flat=True
+            )[offset:offset + limit]
+        )
+
+    def matching_ids(self, terms):
+        return self.matches(terms).values('post')
+
+
+_fts5_available = None
+
+
+def get_backend():
+    """Бэкенд поиска по настройке ``SEARCH_BACKEND``.
+
+    ``auto`` выбирает FTS5, если таблица ``posts_search`` создана
+    миграцией, иначе инвертированный индекс.
+    """
+    global _fts5_available
+    choice = settings.SEARCH_BACKEND
+    if choice == 'auto':
+        if _fts5_available is None:
+            _fts5_available = (
+                FTS_TABLE in connection.introspection.table_names()
+            )
+        choice = 'fts5' if _fts5_available else 'inverted'
+    return Fts5Backend() if choice == 'fts5' else InvertedIndexBackend()
+
+
+def index_post(post):
+    get_backend().index(post_document(post.pk), post.pk, post.text)
+
+
+def unindex_post(post_id):
+    get_backend().remove(post_document(post_id))
+
+
+def index_comment(comment):
+    get_backend().index(
+        comment_document(comment.pk), comment.post_id, comment.text
+    )
+
+
+def unindex_comment(comment_id):
+    get_backend().remove(comment_document(comment_id))
+
+
+def rebuild(batch_size=1000):
+    """Заново индексирует все посты и комментарии."""
+    backend = get_backend()
+    backend.clear()
+    for pk, text in Post.objects.values_list('pk', 'text').iterator(
+        chunk_size=batch_size
+    ):
+        backend.index(post_document(pk), pk, text)
+    comments = Comment.objects.values_list('pk', 'post_id', 'text')
+    for pk, post_id, text in comments.iterator(chunk_size=batch_size):
+        backend.index(comment_document(pk), post_id, text)
+
+
+class SearchResults:
+    """Ранжированная выдача, которую умеет листать ``Paginator``."""
+
+    def __init__(self, query):
+        self.query = query
+        self.terms = tokenize(query)
+        self.backend = get_backend()
+
+    def count(self):
+        if not self.terms:
+            return 0
+        return self.backend.count(self.terms)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        if not self.terms:
+            return []
+        offset = item.start or 0
+        ids = self.backend.ranked_ids(
+            self.terms, offset, item.stop - offset
+        )
+        posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search_posts(query):
+    return SearchResults(query)
+
+
+def matching_post_ids(query):
+    """Подзапрос с id постов, подходящих под запрос, для ``pk__in``."""
+    terms = tokenize(query)
+    if not terms:
+        return Post.objects.none().values('pk')
+    return get_backend().matching_ids(terms)
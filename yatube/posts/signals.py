@@ -0,0 +1,185 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (
+    feed, feed_cache, follow_graph, groups, notifications, search, sitemaps,
+    stats, trending
+)
+from .models import Comment, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    if created and settings.FOLLOW_FEED_MATERIALIZED:
+        feed.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def notify_followers(sender, instance, created, **kwargs):
+    if created:
+        notifications.notify_new_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_follow_feed(sender, instance, created, **kwargs):
+    if created and settings.FOLLOW_FEED_MATERIALIZED:
+        feed.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_follow_feed(sender, instance, **kwargs):
+    if settings.FOLLOW_FEED_MATERIALIZED:
+        feed.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+def add_to_follow_graph(sender, instance, created, **kwargs):
+    if created:
+        follow_graph.update(instance.user_id, instance.author_id, True)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_from_follow_graph(sender, instance, **kwargs):
+    follow_graph.update(instance.user_id, instance.author_id, False)
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, **kwargs):
+    if created:
+        stats.increment(instance.author_id, 'posts_count')
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    stats.decrement(instance.author_id, 'posts_count')
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, **kwargs):
+    if created:
+        stats.increment(instance.author_id, 'followers_count')
+        stats.increment(instance.user_id, 'following_count')
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    stats.decrement(instance.author_id, 'followers_count')
+    stats.decrement(instance.user_id, 'following_count')
+
+
+# Подключены после счётчиков выше: решение принимается по новому числу.
+@receiver(post_save, sender=Follow)
+def switch_heavy_on_follow(sender, instance, created, **kwargs):
+    if created and settings.FOLLOW_FEED_MATERIALIZED:
+        feed.followers_changed(instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def switch_heavy_on_unfollow(sender, instance, **kwargs):
+    if settings.FOLLOW_FEED_MATERIALIZED:
+        feed.followers_changed(instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_feed_cache(sender, **kwargs):
+    feed_cache.invalidate()
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    search.index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    search.unindex_comment(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def score_comment(sender, instance, created, **kwargs):
+    if created:
+        trending.add_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unscore_comment(sender, instance, **kwargs):
+    trending.remove_comment(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_trending_post(sender, instance, **kwargs):
+    trending.remove(instance.pk)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    if instance.pk is not None:
+        instance._previous_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def count_group_post(sender, instance, created, **kwargs):
+    if created:
+        groups.post_added(instance)
+        return
+    previous = getattr(instance, '_previous_group_id', instance.group_id)
+    if previous != instance.group_id:
+        groups.recount(previous, instance.group_id)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_group_post(sender, instance, **kwargs):
+    groups.recount(instance.group_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_directory(sender, **kwargs):
+    groups.invalidate()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_sitemap(sender, instance, created=True, **kwargs):
+    if created:
+        sitemaps.invalidate('posts', instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_sitemap(sender, instance, **kwargs):
+    sitemaps.invalidate('groups', instance.pk)
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, update_fields=None, **kwargs):
+    # Вход сохраняет только last_login, имя при этом не меняется.
+    if instance.pk is None or (
+        update_fields is not None and 'username' not in update_fields
+    ):
+        return
+    instance._previous_username = User.objects.filter(
+        pk=instance.pk
+    ).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_profile_sitemap(sender, instance, created=True, **kwargs):
+    previous = getattr(instance, '_previous_username', instance.username)
+    if created or previous != instance.username:
+        sitemaps.invalidate('profiles', instance.pk)
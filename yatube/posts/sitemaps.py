@@ -0,0 +1,211 @@
+"""Карта сайта, разбитая на части по диапазонам id.
+
+Разделы ``posts``, ``groups`` и ``profiles`` режутся на части по
+``SITEMAP_CHUNK_SIZE`` id: часть ``posts-3`` содержит посты с id от
+``3 * SITEMAP_CHUNK_SIZE`` до следующей границы. Часть строится
+итератором по первичному ключу, записывается в файл в ``SITEMAP_ROOT`` и
+дальше отдаётся с диска. Сигналы удаляют только файл той части, в
+которую попал новый или удалённый объект, и индекс карты; остальные
+части не пересобираются.
+"""
+import os
+import re
+import tempfile
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Max
+from django.urls import reverse
+from django.utils.feedgenerator import rfc3339_date
+
+from .models import Group, Post, User
+
+INDEX = 'index'
+SECTION_RE = re.compile(r'^(?P<section>[a-z]+)-(?P<chunk>\d+)$')
+ITERATOR_CHUNK = 2000
+
+
+def post_entries(rows):
+    for pk, pub_date in rows:
+        yield reverse('posts:post_detail', args=[pk]), pub_date
+
+
+def group_entries(rows):
+    for slug, in rows:
+        yield reverse('posts:group_list', args=[slug]), None
+
+
+def profile_entries(rows):
+    for username, in rows:
+        yield reverse('posts:profile', args=[username]), None
+
+
+# Раздел -> (модель, поля для values_list, функция адресов).
+SECTIONS = {
+    'posts': (Post, ('pk', 'pub_date'), post_entries),
+    'groups': (Group, ('slug',), group_entries),
+    'profiles': (User, ('username',), profile_entries),
+}
+
+
+def site(base_url):
+    """Адрес сайта без слэша и имя каталога его файлов."""
+    base_url = base_url.rstrip('/')
+    return base_url, re.sub(r'[^\w-]', '_', urlsplit(base_url).netloc)
+
+
+def chunk_of(pk):
+    return pk // settings.SITEMAP_CHUNK_SIZE
+
+
+def host_dirs():
+    root = settings.SITEMAP_ROOT
+    if not os.path.isdir(root):
+        return []
+    return [entry.path for entry in os.scandir(root) if entry.is_dir()]
+
+
+def path_for(host, name):
+    return os.path.join(settings.SITEMAP_ROOT, host, f'{name}.xml')
+
+
+def invalidate(section, pk):
+    """Удаляет файл части с объектом ``pk`` и индекс карты."""
+    for directory in host_dirs():
+        for name in (f'{section}-{chunk_of(pk)}', INDEX):
+            try:
+                os.remove(os.path.join(directory, f'{name}.xml'))
+            except FileNotFoundError:
+                pass
+
+
+def clear():
+    """Удаляет все построенные файлы карты сайта."""
+    for directory in host_dirs():
+        for entry in os.scandir(directory):
+            if entry.name.endswith('.xml'):
+                os.remove(entry.path)
+
+
+def write_atomically(path, chunks):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'w', encoding='utf-8') as output:
+            for chunk in chunks:
+                output.write(chunk)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def chunk_count(section):
+    model = SECTIONS[section][0]
+    last = model.objects.aggregate(last=Max('pk'))['last']
+    return 0 if last is None else chunk_of(last) + 1
+
+
+def urlset(base_url, section, chunk):
+    model, fields, entries = SECTIONS[section]
+    size = settings.SITEMAP_CHUNK_SIZE
+    rows = model.objects.filter(
+        pk__gte=chunk * size, pk__lt=(chunk + 1) * size
+    ).order_by('pk').values_list(*fields).iterator(
+        chunk_size=ITERATOR_CHUNK
+    )
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    )
+    for location, lastmod in entries(rows):
+        url = f'<url><loc>{escape(base_url + location)}</loc>'
+        if lastmod:
+            url += f'<lastmod>{rfc3339_date(lastmod)}</lastmod>'
+        yield f'{url}</url>\n'
+    yield '</urlset>\n'
+
+
+def sitemap_index(base_url, host):
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<sitemapindex '
+        'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    )
+    for section in SECTIONS:
+        for chunk in range(chunk_count(section)):
+            name = f'{section}-{chunk}'
+            location = reverse('posts:sitemap_section', args=[name])
+            lastmod = ''
+            path = path_for(host, name)
+            if os.path.exists(path):
+                modified = datetime.fromtimestamp(
+                    os.path.getmtime(path), timezone.utc
+                )
+                lastmod = f'<lastmod>{rfc3339_date(modified)}</lastmod>'
+            yield (
+                f'<sitemap><loc>{escape(base_url + location)}</loc>'
+                f'{lastmod}</sitemap>\n'
+            )
+    yield '</sitemapindex>\n'
+
+
+def parse_name(name):
+    """Раздел и номер части по имени ``posts-3`` или None."""
+    match = SECTION_RE.match(name)
+    if match is None or match.group('section') not in SECTIONS:
+        return None
+    return match.group('section'), int(match.group('chunk'))
+
+
+def build(base_url, name):
+    """Путь к файлу части ``name``; строит его, если файла нет."""
+    base_url, host = site(base_url)
+    path = path_for(host, name)
+    if os.path.exists(path):
+        return path
+    if name == INDEX:
+        write_atomically(path, sitemap_index(base_url, host))
+    else:
+        section, chunk = parse_name(name)
+        write_atomically(path, urlset(base_url, section, chunk))
+    return path
+
+
+def open_part(base_url, name):
+    """Открывает файл части, собирая его при необходимости.
+
+    Сигнал может удалить файл между сборкой и открытием, тогда он
+    собирается ещё раз.
+    """
+    for _ in range(3):
+        try:
+            return open(build(base_url, name), 'rb')
+        except FileNotFoundError:
+            pass
+    return open(build(base_url, name), 'rb')
+
+
+def build_all(base_url, force=False):
+    """Строит недостающие части и заново индекс.
+
+    Возвращает число построенных частей.
+    """
+    if force:
+        clear()
+    host = site(base_url)[1]
+    built = 0
+    for section in SECTIONS:
+        for chunk in range(chunk_count(section)):
+            name = f'{section}-{chunk}'
+            if not os.path.exists(path_for(host, name)):
+                build(base_url, name)
+                built += 1
+    index = path_for(host, INDEX)
+    if os.path.exists(index):
+        os.remove(index)
+    build(base_url, INDEX)
+    return built
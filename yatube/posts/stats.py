@@ -0,0 +1,100 @@
+"""Счётчики постов, подписчиков и подписок пользователя.
+
+Значения хранятся в ``UserStats`` и меняются сигналами при создании и
+удалении постов и подписок. Строка счётчиков создаётся лениво по живым
+данным, а команда ``reconcile_user_stats`` периодически сверяет их.
+"""
+from django.db.models import Count, F
+
+from .models import Follow, Post, User, UserStats
+
+
+def recount(user_id):
+    """Пересчитывает счётчики пользователя по таблицам постов и подписок."""
+    stats, _ = UserStats.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            'posts_count': Post.objects.filter(author_id=user_id).count(),
+            'followers_count': Follow.objects.filter(
+                author_id=user_id
+            ).count(),
+            'following_count': Follow.objects.filter(
+                user_id=user_id
+            ).count(),
+        }
+    )
+    return stats
+
+
+def for_user(user):
+    """Счётчики пользователя одним запросом."""
+    stats = UserStats.objects.filter(user=user).first()
+    if stats is None:
+        stats = recount(user.pk)
+    return stats
+
+
+def increment(user_id, field):
+    updated = UserStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + 1}
+    )
+    if not updated:
+        recount(user_id)
+
+
+def decrement(user_id, field):
+    UserStats.objects.filter(user_id=user_id, **{f'{field}__gt': 0}).update(
+        **{field: F(field) - 1}
+    )
+
+
+def _grouped_counts(queryset, field):
+    return dict(
+        queryset.values(field).annotate(
+            total=Count('pk')
+        ).values_list(field, 'total')
+    )
+
+
+def reconcile(batch_size=500):
+    """Сверяет счётчики всех пользователей с реальными данными.
+
+    Возвращает число исправленных и созданных строк.
+    """
+    posts = _grouped_counts(Post.objects.all(), 'author')
+    followers = _grouped_counts(Follow.objects.all(), 'author')
+    following = _grouped_counts(Follow.objects.all(), 'user')
+    existing = {
+        stats.user_id: stats for stats in UserStats.objects.iterator()
+    }
+    to_create, to_update = [], []
+    for user_id in User.objects.values_list('pk', flat=True).iterator():
+        actual = (
+            posts.get(user_id, 0),
+            followers.get(user_id, 0),
+            following.get(user_id, 0),
+        )
+        stats = existing.get(user_id)
+        if stats is None:
+            to_create.append(UserStats(
+                user_id=user_id,
+                posts_count=actual[0],
+                followers_count=actual[1],
+                following_count=actual[2]
+            ))
+        elif actual != (
+            stats.posts_count, stats.followers_count, stats.following_count
+        ):
+            (
+                stats.posts_count,
+                stats.followers_count,
+                stats.following_count
+            ) = actual
+            to_update.append(stats)
+    UserStats.objects.bulk_create(to_create, batch_size=batch_size)
+    UserStats.objects.bulk_update(
+        to_update,
+        ['posts_count', 'followers_count', 'following_count'],
+        batch_size=batch_size
+    )
+    return len(to_create) + len(to_update)
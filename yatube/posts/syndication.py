@@ -0,0 +1,132 @@
+"""RSS и Atom для ленты сайта, групп и авторов.
+
+Записи читаются через ``values()`` по индексу (дата, id) итератором и
+сразу отдаются клиенту ``StreamingHttpResponse``, не собирая всю ленту в
+памяти. Готовый XML запоминается в кэше под ключом с версией ленты из
+``feed_cache``, поэтому после сохранения или удаления поста следующий
+опрос соберёт документ заново, а до тех пор отдаётся из кэша.
+"""
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.feedgenerator import rfc2822_date, rfc3339_date
+from django.utils.text import Truncator
+
+from . import feed_cache
+
+RSS = 'rss'
+ATOM = 'atom'
+CONTENT_TYPES = {
+    RSS: 'application/rss+xml; charset=utf-8',
+    ATOM: 'application/atom+xml; charset=utf-8',
+}
+ENTRY_FIELDS = ('id', 'text', 'pub_date', 'author__username')
+TITLE_WORDS = 8
+
+
+def cache_key(request, kind, scope):
+    # Ссылки в документе абсолютные, поэтому ключ зависит и от хоста.
+    return (
+        f'posts:syndication:{request.get_host()}:{kind}:{scope}:'
+        f'{feed_cache.version()}'
+    )
+
+
+def entries(queryset):
+    return queryset.order_by('-pub_date', '-pk').values(
+        *ENTRY_FIELDS
+    )[:settings.SYNDICATION_ITEMS].iterator(chunk_size=100)
+
+
+def entry_title(text):
+    return Truncator(text).words(TITLE_WORDS)
+
+
+def rss(title, link, self_link, rows, post_link):
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">'
+        f'<channel><title>{escape(title)}</title>'
+        f'<link>{escape(link)}</link>'
+        f'<description>{escape(title)}</description>'
+        f'<atom:link href={quoteattr(self_link)} rel="self"/>'
+    )
+    for row in rows:
+        url = escape(post_link(row['id']))
+        yield (
+            f'<item><title>{escape(entry_title(row["text"]))}</title>'
+            f'<link>{url}</link><guid>{url}</guid>'
+            f'<pubDate>{rfc2822_date(row["pub_date"])}</pubDate>'
+            f'<description>{escape(row["text"])}</description></item>'
+        )
+    yield '</channel></rss>\n'
+
+
+def atom(title, link, self_link, rows, post_link):
+    rows = iter(rows)
+    first = next(rows, None)
+    updated = rfc3339_date(first['pub_date']) if first else ''
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">'
+        f'<title>{escape(title)}</title>'
+        f'<link href={quoteattr(link)} rel="alternate"/>'
+        f'<link href={quoteattr(self_link)} rel="self"/>'
+        f'<id>{escape(link)}</id><updated>{updated}</updated>'
+    )
+    if first is None:
+        yield '</feed>\n'
+        return
+    yield atom_entry(first, post_link)
+    for row in rows:
+        yield atom_entry(row, post_link)
+    yield '</feed>\n'
+
+
+def atom_entry(row, post_link):
+    url = escape(post_link(row['id']))
+    return (
+        f'<entry><title>{escape(entry_title(row["text"]))}</title>'
+        f'<link href="{url}" rel="alternate"/><id>{url}</id>'
+        f'<updated>{rfc3339_date(row["pub_date"])}</updated>'
+        f'<author><name>{escape(row["author__username"])}</name></author>'
+        f'<content type="text">{escape(row["text"])}</content></entry>'
+    )
+
+
+WRITERS = {RSS: rss, ATOM: atom}
+
+
+def caching(key, chunks):
+    """Отдаёт куски документа и по завершении кладёт его в кэш."""
+    written = []
+    for chunk in chunks:
+        written.append(chunk)
+        yield chunk
+    feed_cache.get_cache().set(
+        key, ''.join(written), settings.SYNDICATION_CACHE_TIMEOUT
+    )
+
+
+def feed_response(request, kind, scope, title, link, queryset):
+    """Ответ с лентой ``kind`` для области ``scope``: из кэша или потоком."""
+    if kind not in WRITERS:
+        raise Http404
+    key = cache_key(request, kind, scope)
+    cached = feed_cache.get_cache().get(key)
+    if cached is not None:
+        return HttpResponse(cached, content_type=CONTENT_TYPES[kind])
+    base = request.build_absolute_uri('/')[:-1]
+
+    def post_link(post_id):
+        return base + reverse('posts:post_detail', args=[post_id])
+
+    chunks = WRITERS[kind](
+        title, base + link, request.build_absolute_uri(),
+        entries(queryset), post_link
+    )
+    return StreamingHttpResponse(
+        caching(key, chunks), content_type=CONTENT_TYPES[kind]
+    )
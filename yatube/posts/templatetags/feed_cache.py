@@ -0,0 +1,100 @@
+import re
+
+from django import template
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from posts import feed_cache
+
+register = template.Library()
+
+FOLLOW_SLOT_RE = re.compile(r'<!--follow:(\d+):([^>]*?)-->')
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist, scope, vary_on):
+        self.nodelist = nodelist
+        self.scope = scope
+        self.vary_on = vary_on
+
+    def render(self, context):
+        key = feed_cache.fragment_key(
+            self.scope.resolve(context),
+            [var.resolve(context) for var in self.vary_on]
+        )
+        cache = feed_cache.get_cache()
+        fragment = cache.get(key)
+        if fragment is not None:
+            feed_cache.record(feed_cache.HIT)
+            return fragment
+        feed_cache.record(feed_cache.MISS)
+        fragment = self.nodelist.render(context)
+        cache.set(key, fragment, settings.FEED_CACHE_TIMEOUT)
+        return fragment
+
+
+@register.tag('feedcache')
+def do_feed_cache(parser, token):
+    """Кэширует фрагмент ленты до следующего изменения постов.
+
+        {% feedcache 'index' request.GET.cursor %} ... {% endfeedcache %}
+    """
+    nodelist = parser.parse(('endfeedcache',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least 1 argument."
+        )
+    return FeedCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]]
+    )
+
+
+class FollowLinksNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        html = self.nodelist.render(context)
+        follows = context.get('follows')
+        user = context.get('user')
+        if follows is None or not follows.stamp:
+            return FOLLOW_SLOT_RE.sub('', html)
+        links = {}
+
+        def link(match):
+            author_id = int(match.group(1))
+            if author_id == user.pk:
+                return ''
+            if author_id not in links:
+                links[author_id] = render_to_string(
+                    'includes/follow_link.html', {
+                        'post': {
+                            'author_id': author_id,
+                            'author': match.group(2),
+                        },
+                        'follows': follows,
+                    }
+                )
+            return links[author_id]
+
+        return FOLLOW_SLOT_RE.sub(link, html)
+
+
+@register.tag('followlinks')
+def do_follow_links(parser, token):
+    """Подставляет ссылки подписки читателя в общий фрагмент ленты.
+
+    Карточки с ``follow_slots=True`` выводят вместо ссылки метку, так что
+    ``{% feedcache %}`` внутри кэширует одну ленту для всех читателей, а
+    ссылки по ``follows`` подставляются уже после кэша::
+
+        {% followlinks %}{% feedcache 'index' %}...{% endfeedcache %}
+        {% endfollowlinks %}
+    """
+    nodelist = parser.parse(('endfollowlinks',))
+    parser.delete_first_token()
+    return FollowLinksNode(nodelist)
@@ -0,0 +1,55 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import feed_cache, search
+from posts.models import Comment, FeedEntry, Follow, Group, Post, UserStats
+from posts.utils import decode_cursor
+
+
+class SeedAndBenchmarkTests(TestCase):
+    def test_seed_then_benchmark(self):
+        """seed_data наполняет базу, benchmark_views замеряет страницы."""
+        call_command(
+            'seed_data', users=20, groups=3, posts=200, comments=300,
+            follows_per_user=5, batch_size=64, seed=1, stdout=StringIO()
+        )
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(FeedEntry.objects.exists())
+        self.assertEqual(UserStats.objects.count(), 20)
+        self.assertGreater(
+            len(set(Post.objects.values_list('pub_date', flat=True))), 1
+        )
+        word = search.tokenize(Post.objects.first().text)[0]
+        self.assertGreater(search.search_posts(word).count(), 0)
+
+        version = feed_cache.version()
+        out = StringIO()
+        call_command('benchmark_views', runs=2, explain=True, stdout=out)
+        self.assertEqual(feed_cache.version(), version)
+        report = json.loads(out.getvalue())
+        self.assertEqual(
+            set(report['views']),
+            {'index', 'group_list', 'profile', 'post_detail', 'follow_index'}
+        )
+        self.assertEqual(report['views']['index']['runs'], 2)
+        for name, view in report['views'].items():
+            with self.subTest(view=name):
+                self.assertTrue(view['plans'])
+                self.assertFalse(
+                    any(plan['problems'] for plan in view['plans'])
+                )
+
+        out = StringIO()
+        call_command('benchmark_views', runs=1, deep_page=5, stdout=out)
+        views = json.loads(out.getvalue())['views']
+        cursor = views['index_page_5']['url'].split('?cursor=')[1]
+        self.assertEqual(decode_cursor(cursor)[3], 5)
+        self.assertTrue(
+            views['index_offset_page_5']['url'].endswith('?page=5')
+        )
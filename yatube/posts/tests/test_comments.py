@@ -0,0 +1,67 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+from posts.utils import COMMENTS_PER_PAGE
+
+
+class CommentListTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='ilya')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        cls.quiet_post = Post.objects.create(author=cls.user, text='Тихий')
+        users = [
+            User.objects.create_user(username=f'user{i}') for i in range(5)
+        ]
+        Comment.objects.bulk_create([
+            Comment(
+                post=cls.post,
+                author=users[i % len(users)],
+                text=f'Коммент {i}'
+            )
+            for i in range(COMMENTS_PER_PAGE + 5)
+        ])
+        Comment.objects.create(
+            post=cls.quiet_post, author=cls.user, text='Один'
+        )
+
+    def count_queries(self, post):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(
+                reverse('posts:post_detail', kwargs={'post_id': post.pk})
+            )
+        return len(queries)
+
+    def test_comment_authors_loaded_in_one_query(self):
+        """Число запросов не зависит от количества комментариев."""
+        self.assertEqual(
+            self.count_queries(self.post), self.count_queries(self.quiet_post)
+        )
+
+    def test_load_more_fragment(self):
+        """Фрагмент «показать ещё» отдаёт следующую страницу."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertTrue(comments.has_next())
+
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk}),
+            {'cursor': comments.next_cursor}
+        )
+        self.assertTemplateUsed(response, 'includes/comments.html')
+        self.assertEqual(len(response.context['comments']), 5)
+        self.assertFalse(response.context['comments'].has_next())
+
+    def test_load_more_for_missing_post(self):
+        """Фрагмент комментариев несуществующего поста отдаёт 404."""
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 10 ** 6})
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,85 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='ilya')
+        cls.reader = User.objects.create_user(username='fiji')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def urls(self):
+        return [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:follow_index'),
+        ]
+
+    def revalidate(self, url, response):
+        return self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+
+    def test_not_modified(self):
+        """Повторный запрос с тем же ETag получает 304 без отрисовки."""
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('ETag', response)
+                self.assertIn('Last-Modified', response)
+                with CaptureQueriesContext(connection) as captured:
+                    revalidated = self.revalidate(url, response)
+                self.assertEqual(revalidated.status_code, 304)
+                # Сессия, пользователь и не больше двух запросов состояния.
+                self.assertLessEqual(len(captured), 4)
+
+    def test_modified_after_new_post(self):
+        """Новый пост меняет ETag всех страниц."""
+        responses = {url: self.client.get(url) for url in self.urls()}
+        Post.objects.create(author=self.author, group=self.group, text='Ещё')
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                revalidated = self.revalidate(url, response)
+                self.assertEqual(revalidated.status_code, 200)
+
+    def test_post_detail_modified(self):
+        """Правка поста и новый комментарий меняют ETag страницы поста."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        response = self.client.get(url)
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+        response = self.client.get(url)
+        Comment.objects.create(post=self.post, author=self.reader, text='Ок')
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_etag_depends_on_reader(self):
+        """ETag зависит от читателя и страницы пагинации."""
+        url = reverse('posts:profile', kwargs={'username': self.author})
+        response = self.client.get(url)
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+        self.client.logout()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(self.client.get(
+            reverse('posts:index'), {'page': 2},
+            HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code, 200)
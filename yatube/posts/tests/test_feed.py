@@ -0,0 +1,142 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import feed
+from posts.models import FeedEntry, Follow, Post, User, UserStats
+
+
+class FollowFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='ilya')
+        cls.follower = User.objects.create_user(username='fiji')
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text='Пост до подписки'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.follower_client = Client()
+        self.follower_client.force_login(FollowFeedTests.follower)
+
+    def feed_texts(self):
+        response = self.follower_client.get(reverse('posts:follow_index'))
+        return [post.text for post in response.context['page_obj']]
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка заполняет ленту старыми постами, отписка очищает её."""
+        self.follower_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}
+        ))
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.follower, post=self.old_post
+        ).exists())
+        self.assertEqual(self.feed_texts(), [self.old_post.text])
+
+        self.follower_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author}
+        ))
+        self.assertFalse(
+            FeedEntry.objects.filter(user=self.follower).exists()
+        )
+        self.assertEqual(self.feed_texts(), [])
+
+    def test_new_post_is_fanned_out(self):
+        """Новый пост попадает во входящие ленты подписчиков."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.follower, post=new_post
+        ).exists())
+        self.assertEqual(
+            self.feed_texts(), [new_post.text, self.old_post.text]
+        )
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=0)
+    def test_heavy_author_is_read_on_the_fly(self):
+        """Посты «тяжёлого» автора не раскладываются, но видны в ленте."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        cache.clear()
+        new_post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertFalse(
+            FeedEntry.objects.filter(post=new_post).exists()
+        )
+        self.assertIn(new_post.text, self.feed_texts())
+
+    @override_settings(
+        FOLLOW_FEED_FANOUT_LIMIT=1, FOLLOW_FEED_BACKFILL_ASYNC=False
+    )
+    def test_author_becoming_light_is_fanned_out(self):
+        """Посты и подписки времён «тяжёлого» автора попадают в ленты."""
+        first, late = (
+            User.objects.create_user(username=name)
+            for name in ('first', 'late')
+        )
+        Follow.objects.create(user=first, author=self.author)
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.assertEqual(feed.heavy_authors(), {self.author.pk})
+        new_post = Post.objects.create(author=self.author, text='Новый пост')
+        Follow.objects.create(user=late, author=self.author)
+        self.assertFalse(FeedEntry.objects.filter(user=late).exists())
+
+        Follow.objects.filter(user__in=[first, self.follower]).delete()
+        self.assertEqual(feed.heavy_authors(), set())
+        self.assertEqual(
+            set(FeedEntry.objects.filter(user=late).values_list(
+                'post_id', flat=True
+            )),
+            {self.old_post.pk, new_post.pk}
+        )
+
+    @override_settings(
+        FOLLOW_FEED_FANOUT_LIMIT=1, FOLLOW_FEED_FANOUT_RESUME=0,
+        FOLLOW_FEED_BACKFILL_ASYNC=False
+    )
+    def test_light_again_below_resume_limit(self):
+        """Автор возвращается в раскладку только ниже второго порога."""
+        first, second = (
+            User.objects.create_user(username=name)
+            for name in ('first', 'second')
+        )
+        Follow.objects.create(user=first, author=self.author)
+        Follow.objects.create(user=second, author=self.author)
+        self.assertEqual(feed.heavy_authors(), {self.author.pk})
+        Follow.objects.filter(user=first).delete()
+        self.assertEqual(feed.heavy_authors(), {self.author.pk})
+        Follow.objects.filter(user=second).delete()
+        self.assertEqual(feed.heavy_authors(), set())
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=1)
+    def test_fan_out_after_commit(self):
+        """Раскладка постов ставится в очередь после коммита."""
+        first, second = (
+            User.objects.create_user(username=name)
+            for name in ('first', 'second')
+        )
+        Follow.objects.create(user=first, author=self.author)
+        Follow.objects.create(user=second, author=self.author)
+        with mock.patch.object(feed, 'fan_out_author') as fan_out, \
+                mock.patch.object(feed.transaction, 'on_commit') as on_commit:
+            Follow.objects.filter(user=first).delete()
+        fan_out.assert_not_called()
+        on_commit.assert_called_once()
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=0)
+    def test_heavy_authors_from_flags(self):
+        """Набор «тяжёлых» авторов читается по флагу без агрегации."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        self.assertTrue(UserStats.objects.get(user=self.author).heavy)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(feed.heavy_authors(), {self.author.pk})
+        self.assertNotIn('posts_follow', queries[0]['sql'])
+        with self.settings(FOLLOW_FEED_FANOUT_LIMIT=5):
+            self.assertEqual(feed.sync_heavy_authors(), 1)
+        self.assertEqual(feed.heavy_authors(), set())
@@ -0,0 +1,175 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import feed_cache, follow_graph
+from posts.models import Follow, Post, User
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(5)
+        ]
+        for author in cls.authors:
+            Post.objects.create(author=author, text=f'Пост {author}')
+        Follow.objects.create(user=cls.reader, author=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_loaded_once(self):
+        """Подписки читаются из таблицы только при промахе кэша."""
+        with self.assertNumQueries(1):
+            following = follow_graph.following(self.reader.pk)
+        with self.assertNumQueries(0):
+            again = follow_graph.following(self.reader.pk)
+        self.assertEqual(following.authors, {self.authors[0].pk})
+        self.assertEqual(again.stamp, following.stamp)
+        ids = [author.pk for author in self.authors]
+        self.assertEqual(following.among(ids), {self.authors[0].pk})
+
+    def test_signals_update_graph(self):
+        """Подписка и отписка правят граф и меняют метку."""
+        stamp = follow_graph.following(self.reader.pk).stamp
+        Follow.objects.create(user=self.reader, author=self.authors[1])
+        following = follow_graph.following(self.reader.pk)
+        self.assertIn(self.authors[1].pk, following)
+        self.assertNotEqual(following.stamp, stamp)
+        Follow.objects.filter(user=self.reader).delete()
+        with self.assertNumQueries(0):
+            following = follow_graph.following(self.reader.pk)
+        self.assertEqual(following.authors, frozenset())
+
+    def test_invalidate_all(self):
+        """Сброс графа заставляет перечитать таблицу."""
+        follow_graph.following(self.reader.pk)
+        follow_graph.invalidate_all()
+        with self.assertNumQueries(1):
+            follow_graph.following(self.reader.pk)
+
+    def test_generation_not_reused_after_eviction(self):
+        """Вытесненное поколение графа начинается с нового номера."""
+        generations = {follow_graph.generation()}
+        follow_graph.invalidate_all()
+        generations.add(follow_graph.generation())
+        feed_cache.get_cache().delete(follow_graph.GENERATION_KEY)
+        self.assertNotIn(follow_graph.generation(), generations)
+
+    def test_profile_without_follow_query(self):
+        """Профиль берёт состояние подписки из графа."""
+        follow_graph.following(self.reader.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('posts:profile', args=[self.authors[0].username])
+            )
+        self.assertTrue(response.context['following'])
+        self.assertFalse(any(
+            'posts_follow' in query['sql'] for query in queries
+        ))
+
+    def test_follow_with_stale_graph(self):
+        """Устаревший граф не мешает записать подписку, повтор не
+        создаёт дубля."""
+        author = self.authors[3]
+        follow_graph.store(
+            follow_graph.cache_key(self.reader.pk),
+            [self.authors[0].pk, author.pk]
+        )
+        url = reverse('posts:profile_follow', args=[author.username])
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(
+            Follow.objects.filter(user=self.reader, author=author).count(), 1
+        )
+
+    def test_follow_and_unfollow_views(self):
+        """Подписка и отписка по ссылкам попадают в граф."""
+        url = reverse('posts:profile_follow', args=[self.authors[2].username])
+        self.client.get(url)
+        self.assertIn(
+            self.authors[2].pk, follow_graph.following(self.reader.pk)
+        )
+        self.client.get(
+            reverse('posts:profile_unfollow', args=[self.authors[2].username])
+        )
+        self.assertNotIn(
+            self.authors[2].pk, follow_graph.following(self.reader.pk)
+        )
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:profile_follow', args=['nobody'])
+            ).status_code,
+            404
+        )
+
+    def test_index_follow_buttons(self):
+        """Кнопки подписки в ленте не добавляют запросов на автора."""
+        response = self.client.get(reverse('posts:index'))
+        follow_links = [
+            reverse('posts:profile_follow', args=[author.username])
+            for author in self.authors[1:]
+        ]
+        for link in follow_links:
+            self.assertContains(response, link)
+        self.assertContains(
+            response,
+            reverse('posts:profile_unfollow', args=[self.authors[0].username])
+        )
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:index'))
+        follow_queries = [
+            query for query in queries if 'posts_follow' in query['sql']
+        ]
+        self.assertEqual(len(follow_queries), 1)
+
+    def test_index_fragment_shared(self):
+        """Фрагмент ленты один на всех, ссылки подписки — свои у каждого."""
+        self.client.get(reverse('posts:index'))
+        feed_cache.reset_counters()
+        self.client.logout()
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(feed_cache.counters()[feed_cache.HIT], 1)
+        self.assertNotContains(response, '<!--follow:')
+        self.assertNotContains(
+            response,
+            reverse('posts:profile_unfollow', args=[self.authors[0].username])
+        )
+        self.client.force_login(self.authors[1])
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(feed_cache.counters()[feed_cache.HIT], 2)
+        self.assertNotContains(
+            response,
+            reverse('posts:profile_follow', args=[self.authors[1].username])
+        )
+        self.assertContains(
+            response,
+            reverse('posts:profile_follow', args=[self.authors[0].username])
+        )
+
+    def test_index_fragment_per_reader(self):
+        """Ссылки подписки в ленте обновляются после подписки."""
+        self.client.get(reverse('posts:index'))
+        Follow.objects.create(user=self.reader, author=self.authors[1])
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(
+            response,
+            reverse('posts:profile_unfollow', args=[self.authors[1].username])
+        )
+        self.client.logout()
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(
+            response,
+            reverse('posts:profile_follow', args=[self.authors[1].username])
+        )
@@ -0,0 +1,110 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import groups
+from posts.models import Group, Post, User
+
+
+class GroupDirectoryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='ilya')
+        cls.quiet = Group.objects.create(
+            title='Тихая', slug='quiet', description='Без постов'
+        )
+        cls.busy = Group.objects.create(
+            title='Шумная', slug='busy', description='Много постов'
+        )
+        cls.recent = Group.objects.create(
+            title='Свежая', slug='recent', description='Свежий пост'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def post(self, group, text='Пост'):
+        return Post.objects.create(author=self.user, group=group, text=text)
+
+    def test_counters_follow_posts(self):
+        """Счётчик и дата группы меняются при создании и удалении."""
+        first = self.post(self.busy)
+        second = self.post(self.busy)
+        self.busy.refresh_from_db()
+        self.assertEqual(self.busy.posts_count, 2)
+        self.assertEqual(self.busy.last_post_at, second.pub_date)
+        second.delete()
+        self.busy.refresh_from_db()
+        self.assertEqual(self.busy.posts_count, 1)
+        self.assertEqual(self.busy.last_post_at, first.pub_date)
+
+    def test_moving_post_recounts_both_groups(self):
+        """Перенос поста пересчитывает старую и новую группы."""
+        post = self.post(self.busy)
+        post.group = self.recent
+        post.save()
+        self.busy.refresh_from_db()
+        self.recent.refresh_from_db()
+        self.assertEqual(self.busy.posts_count, 0)
+        self.assertIsNone(self.busy.last_post_at)
+        self.assertEqual(self.recent.posts_count, 1)
+
+    def test_sort_orders(self):
+        """Каталог сортируется по активности, числу постов и названию."""
+        for _ in range(2):
+            self.post(self.busy)
+        Post.objects.filter(group=self.busy).update(
+            pub_date=timezone.now() - timedelta(days=1)
+        )
+        groups.reconcile()
+        self.post(self.recent)
+        cases = {
+            'activity': ['recent', 'busy', 'quiet'],
+            'posts': ['busy', 'recent', 'quiet'],
+            'title': ['recent', 'quiet', 'busy'],
+        }
+        for order, slugs in cases.items():
+            with self.subTest(order=order):
+                rows = groups.directory(order)
+                self.assertEqual([row['slug'] for row in rows], slugs)
+
+    def test_page_cached_and_invalidated(self):
+        """Каталог читается из кэша до изменения постов."""
+        url = reverse('posts:group_index')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.context['order'], 'activity')
+        self.post(self.quiet)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        quiet = next(
+            row for row in response.context['groups']
+            if row['slug'] == 'quiet'
+        )
+        self.assertEqual(quiet['posts_count'], 1)
+        self.assertContains(
+            response, reverse('posts:group_list', args=['quiet'])
+        )
+
+    def test_unknown_sort_falls_back(self):
+        """Неизвестный порядок заменяется порядком по активности."""
+        response = self.client.get(
+            reverse('posts:group_index'), {'sort': 'nope'}
+        )
+        self.assertEqual(response.context['order'], 'activity')
+
+    def test_group_rename_invalidates(self):
+        """Переименование группы сбрасывает каталог."""
+        groups.directory('title')
+        group = Group.objects.get(pk=self.quiet.pk)
+        group.title = 'Аааа'
+        group.save()
+        self.assertEqual(groups.directory('title')[0]['title'], 'Аааа')
@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+import socket
+import tempfile
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts import notifications
+from posts.models import Follow, Post, User
+
+
+class BrokerTests(TestCase):
+    def test_dispatch_to_author_subscribers(self):
+        broker = notifications.Broker()
+        subscription = broker.subscribe([1, 2])
+        other = broker.subscribe([3])
+        broker.dispatch({'id': 10, 'author_id': 2})
+        self.assertEqual(subscription.get(0), {'id': 10, 'author_id': 2})
+        self.assertIsNone(other.get(0))
+        broker.unsubscribe(subscription)
+        broker.unsubscribe(other)
+        self.assertEqual(broker.by_author, {})
+
+    def test_relay_to_other_processes(self):
+        """Событие уходит в сокеты других процессов в общем каталоге."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'other.sock')
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as receiver:
+            receiver.bind(path)
+            receiver.settimeout(1)
+            with override_settings(NOTIFICATIONS_SOCKET_DIR=directory):
+                notifications.relay({'id': 1, 'author_id': 2})
+            self.assertEqual(
+                json.loads(receiver.recv(1024)), {'id': 1, 'author_id': 2}
+            )
+        notifications.relay({'id': 1, 'author_id': 2})
+        with override_settings(NOTIFICATIONS_SOCKET_DIR=directory):
+            notifications.relay({'id': 1, 'author_id': 2})
+        self.assertFalse(os.path.exists(path))
+
+
+@override_settings(
+    NOTIFICATIONS_STREAM=True, NOTIFICATIONS_HEARTBEAT=0.01,
+    NOTIFICATIONS_STREAM_TIMEOUT=1
+)
+class FollowEventsTests(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='ilya')
+        self.reader = User.objects.create_user(username='fiji')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.force_login(self.reader)
+
+    def test_stream_reports_new_posts(self):
+        """Подписчик получает событие о новом посте автора."""
+        response = self.client.get(reverse('posts:follow_events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = iter(response.streaming_content)
+        self.assertTrue(next(events).startswith(b'retry:'))
+        self.assertEqual(next(events), b': ping\n\n')
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        Post.objects.create(author=self.reader, text='Свой пост')
+        self.assertEqual(next(events), (
+            f'id: {post.pk}\nevent: post\ndata: '
+            f'{{"id": {post.pk}, "author_id": {self.author.pk}, '
+            f'"author": "ilya"}}\n\n'
+        ).encode())
+        response.close()
+        self.assertEqual(notifications.broker.by_author, {})
+
+    def test_new_cards_only(self):
+        """follow/new/ отдаёт только посты новее показанного."""
+        old = Post.objects.create(author=self.author, text='Старый пост')
+        new = Post.objects.create(author=self.author, text='Свежий пост')
+        response = self.client.get(
+            reverse('posts:follow_new'), {'after': old.pk}
+        )
+        self.assertContains(response, 'Свежий пост')
+        self.assertNotContains(response, 'Старый пост')
+        self.assertEqual(response['X-Latest-Post'], str(new.pk))
+        self.assertEqual(response['X-New-Posts'], '1')
+
+    @override_settings(NOTIFICATIONS_STREAM=False)
+    def test_polling_without_stream(self):
+        """Без потока лента опрашивает follow/new/, а поток отдаёт 404."""
+        response = self.client.get(reverse('posts:follow_events'))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertNotContains(response, 'EventSource')
+        self.assertContains(response, reverse('posts:follow_new'))
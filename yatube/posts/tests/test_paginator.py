@@ -0,0 +1,204 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import page_counts
+from posts.models import Follow, Group, Post, User
+from posts.utils import (
+    CursorPaginator, POSTS_PER_PAGE, WindowedPaginator, page_window
+)
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='ilya')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create([
+            Post(
+                author=cls.user,
+                group=cls.group,
+                text=f'Тестовый пост {i}'
+            )
+            for i in range(POSTS_PER_PAGE + 3)
+        ])
+        cls.expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True
+            )
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_follow_each_other(self):
+        """Курсор ведёт на следующую страницу и обратно без пропусков."""
+        first = CursorPaginator(Post.objects.all(), POSTS_PER_PAGE)
+        first_page = first.cursor_page(None)
+        self.assertEqual(
+            [post.pk for post in first_page],
+            self.expected[:POSTS_PER_PAGE]
+        )
+        self.assertTrue(first_page.has_next())
+        self.assertFalse(first_page.has_previous())
+
+        second = CursorPaginator(Post.objects.all(), POSTS_PER_PAGE)
+        second_page = second.cursor_page(first_page.next_cursor)
+        self.assertEqual(second_page.number, 2)
+        self.assertEqual(
+            [post.pk for post in second_page],
+            self.expected[POSTS_PER_PAGE:]
+        )
+        self.assertFalse(second_page.has_next())
+
+        back = CursorPaginator(Post.objects.all(), POSTS_PER_PAGE)
+        back_page = back.cursor_page(second_page.previous_cursor)
+        self.assertEqual(back_page.number, 1)
+        self.assertEqual(
+            [post.pk for post in back_page],
+            self.expected[:POSTS_PER_PAGE]
+        )
+
+    def test_broken_cursor_returns_first_page(self):
+        """Битый курсор отдаёт первую страницу."""
+        paginator = CursorPaginator(Post.objects.all(), POSTS_PER_PAGE)
+        page = paginator.cursor_page('garbage')
+        self.assertEqual(page.number, 1)
+        self.assertEqual(len(page), POSTS_PER_PAGE)
+
+    def test_approximate_count(self):
+        """Приблизительное количество задаёт число страниц."""
+        paginator = CursorPaginator(
+            Post.objects.all(), POSTS_PER_PAGE, count=lambda: 95
+        )
+        paginator.cursor_page(None)
+        self.assertEqual(paginator.num_pages, 10)
+
+    def test_views_use_cursor(self):
+        """Ленты листаются курсором и не считают COUNT(*)."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                page_obj = response.context['page_obj']
+                self.assertIsInstance(page_obj.paginator, CursorPaginator)
+                response = self.client.get(
+                    url, {'cursor': page_obj.next_cursor}
+                )
+                self.assertEqual(len(response.context['page_obj']), 3)
+
+
+class WindowedPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='ilya')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for number in range(POSTS_PER_PAGE + 3):
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Пост {number}'
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_page_window(self):
+        """Окно содержит соседние, первую и последнюю страницы."""
+        cases = {
+            (1, 1): [1],
+            (1, 4): [1, 2, 3, 4],
+            (50, 100): [1, None, 48, 49, 50, 51, 52, None, 100],
+            (4, 100): [1, 2, 3, 4, 5, 6, None, 100],
+            (100, 100): [1, None, 98, 99, 100],
+        }
+        for (number, num_pages), window in cases.items():
+            with self.subTest(number=number, num_pages=num_pages):
+                self.assertEqual(page_window(number, num_pages), window)
+
+    def test_given_count_skips_count_query(self):
+        """С переданным числом пагинатор не считает COUNT(*)."""
+        paginator = WindowedPaginator(
+            Post.objects.order_by('-pk'), POSTS_PER_PAGE, count=1
+        )
+        with self.assertNumQueries(1):
+            page = paginator.get_page(2)
+        self.assertEqual(len(page), 3)
+        self.assertEqual(paginator.num_pages, 2)
+        self.assertEqual(page.window, [1, 2])
+
+    def test_overstated_count_falls_back(self):
+        """Страница за концом ленты отдаёт последнюю по точному числу."""
+        paginator = WindowedPaginator(
+            Post.objects.order_by('-pk'), POSTS_PER_PAGE, count=lambda: 995
+        )
+        self.assertEqual(paginator.get_page(1).window, [1, 2, 3, None, 100])
+        paginator = WindowedPaginator(
+            Post.objects.order_by('-pk'), POSTS_PER_PAGE, count=lambda: 995
+        )
+        page = paginator.get_page(50)
+        self.assertEqual(page.number, 2)
+        self.assertEqual(paginator.count, POSTS_PER_PAGE + 3)
+
+    def test_counts_cached_per_scope(self):
+        """Числа областей читаются из кэша до истечения таймаута."""
+        scopes = {
+            'site': page_counts.site,
+            'group': lambda: page_counts.group(self.group.pk),
+            'author': lambda: page_counts.author(self.user.pk),
+        }
+        for scope, count in scopes.items():
+            with self.subTest(scope=scope):
+                self.assertEqual(count(), POSTS_PER_PAGE + 3)
+                Post.objects.create(author=self.user, group=self.group)
+                with self.assertNumQueries(0):
+                    self.assertEqual(count(), POSTS_PER_PAGE + 3)
+                cache.clear()
+                Post.objects.filter(text='').delete()
+
+    def test_follow_count_changes_with_follows(self):
+        """Подписка сразу меняет число постов ленты подписок."""
+        self.assertEqual(page_counts.follows(self.reader.pk), 0)
+        Follow.objects.create(user=self.reader, author=self.user)
+        self.assertEqual(
+            page_counts.follows(self.reader.pk), POSTS_PER_PAGE + 3
+        )
+
+    def test_views_pass_approximate_count(self):
+        """Ленты показывают окно страниц по приблизительному числу."""
+        self.client.force_login(self.reader)
+        Follow.objects.create(user=self.reader, author=self.user)
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response.context['page_obj'].paginator.approximate_count,
+                    POSTS_PER_PAGE + 3
+                )
+                self.assertContains(response, 'из ~2')
+                response = self.client.get(url, {'page': 2})
+                page_obj = response.context['page_obj']
+                self.assertIsInstance(page_obj.paginator, WindowedPaginator)
+                self.assertEqual(page_obj.window, [1, 2])
@@ -0,0 +1,76 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from core.query_plans import capture, explain, problems_in
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class QueryPlanTests(TestCase):
+    """Запросы страниц не читают таблицы целиком и не сортируют на лету."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='ilya')
+        cls.reader = User.objects.create_user(username='fiji')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Group.objects.create(title='Другая', slug='other', description='-')
+        for i in range(15):
+            cls.post = Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {i}'
+            )
+            Post.objects.create(author=cls.reader, text=f'Чужой пост {i}')
+        for i in range(25):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f'Комментарий {i}'
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def urls(self):
+        post_detail = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        return [
+            reverse('posts:index'),
+            f'{reverse("posts:index")}?page=2',
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            post_detail,
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk}),
+            reverse('posts:follow_index'),
+        ]
+
+    def assert_plans_clean(self, url):
+        response = self.client.get(url)
+        with capture() as captured:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        next_cursor = getattr(
+            response.context and response.context.get('page_obj'),
+            'next_cursor', None
+        )
+        if next_cursor:
+            with capture() as next_page:
+                self.client.get(url, {'cursor': next_cursor})
+            captured.captured_queries.extend(next_page.captured_queries)
+        for query in explain(captured.captured_queries):
+            with self.subTest(url=url, sql=query['sql']):
+                self.assertEqual(query['problems'], [], query['plan'])
+
+    def test_views(self):
+        """Планы запросов лент, профиля и страницы поста."""
+        for url in self.urls():
+            self.assert_plans_clean(url)
+
+    def test_problems_in(self):
+        """Проверка плана находит полный просмотр и сортировку."""
+        self.assertEqual(problems_in([
+            'SCAN posts_post',
+            'SCAN posts_post USING INDEX posts_post_pub_date',
+            'USE TEMP B-TREE FOR ORDER BY',
+        ]), ['полный просмотр posts_post', 'USE TEMP B-TREE FOR ORDER BY'])
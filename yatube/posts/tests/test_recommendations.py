@@ -0,0 +1,113 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import follow_graph, recommendations
+from posts.models import Follow, Post, Recommendation, User
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        names = ('reader', 'bob', 'carol', 'dave', 'erin', 'old', 'quiet')
+        cls.users = {
+            name: User.objects.create_user(username=name) for name in names
+        }
+        for name in ('bob', 'carol', 'dave', 'erin', 'old'):
+            Post.objects.create(author=cls.users[name], text=f'Пост {name}')
+        Post.objects.filter(author=cls.users['old']).update(
+            pub_date=timezone.now() - timedelta(days=300)
+        )
+        follows = (
+            ('reader', 'bob'), ('reader', 'carol'),
+            ('bob', 'dave'), ('carol', 'dave'), ('carol', 'erin'),
+            ('bob', 'old'), ('bob', 'quiet'),
+        )
+        for user, author in follows:
+            Follow.objects.create(
+                user=cls.users[user], author=cls.users[author]
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def suggested(self, name):
+        return list(
+            Recommendation.objects.filter(
+                user=self.users[name]
+            ).order_by('-score').values_list(
+                'author__username', 'common_count'
+            )
+        )
+
+    def test_friends_of_friends(self):
+        """Кандидаты упорядочены по общим соседям и свежести постов."""
+        recommendations.build(batch_size=2)
+        self.assertEqual(
+            self.suggested('reader'),
+            [('dave', 2), ('erin', 1), ('old', 1)]
+        )
+
+    def test_popular_fallback(self):
+        """Без подписок предлагаются популярные авторы."""
+        recommendations.build()
+        suggested = self.suggested('erin')
+        self.assertEqual(suggested[0], ('dave', 0))
+        self.assertNotIn('erin', [name for name, _ in suggested])
+        self.assertNotIn('quiet', [name for name, _ in suggested])
+
+    def test_rebuild_replaces_rows(self):
+        """Пересчёт заменяет прежние рекомендации пользователя."""
+        recommendations.build(top_k=1)
+        recommendations.build(top_k=1)
+        self.assertEqual(self.suggested('reader'), [('dave', 2)])
+
+    def test_read_skips_followed_authors(self):
+        """Страница читает рекомендации одним запросом без подписанных."""
+        recommendations.build()
+        request = RequestFactory().get('/')
+        request.user = self.users['reader']
+        follow_graph.for_request(request)
+        with self.assertNumQueries(1):
+            suggestions = recommendations.for_request(request)
+        self.assertEqual(suggestions[0].author, self.users['dave'])
+        Follow.objects.create(
+            user=self.users['reader'], author=self.users['dave']
+        )
+        request = RequestFactory().get('/')
+        request.user = self.users['reader']
+        authors = [row.author for row in recommendations.for_request(request)]
+        self.assertNotIn(self.users['dave'], authors)
+
+    def test_pages_show_suggestions(self):
+        """Рекомендации выводятся в профиле и ленте подписок."""
+        call_command('build_recommendations', stdout=StringIO())
+        self.client.force_login(self.users['reader'])
+        for url in (
+            reverse('posts:follow_index'),
+            reverse('posts:profile', args=['bob']),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(
+                    response, reverse('posts:profile_follow', args=['dave'])
+                )
+                self.assertTemplateUsed(response, 'includes/suggestions.html')
+
+    def test_rebuild_changes_etag(self):
+        """Пересчёт рекомендаций меняет ETag страницы подписок."""
+        self.client.force_login(self.users['reader'])
+        etag = self.client.get(reverse('posts:follow_index'))['ETag']
+        recommendations.build()
+        self.assertNotEqual(
+            self.client.get(reverse('posts:follow_index'))['ETag'], etag
+        )
@@ -0,0 +1,103 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import search
+from posts.models import Comment, Post, SearchEntry, User
+
+
+class SearchMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='ilya')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+
+    def ids(self, query):
+        return [post.pk for post in search.search_posts(query)[:10]]
+
+    def test_finds_posts_by_all_words(self):
+        """Находятся посты, где встречаются все слова запроса."""
+        both = Post.objects.create(author=self.author, text='Кот и Собака')
+        Post.objects.create(author=self.author, text='Только кот')
+        self.assertEqual(self.ids('собака кот'), [both.pk])
+        self.assertEqual(search.search_posts('кот').count(), 2)
+        self.assertEqual(self.ids('!!!'), [])
+
+    def test_finds_posts_by_comments(self):
+        """Пост находится по тексту комментария, и пропадает после правки."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        comment = Comment.objects.create(
+            post=post, author=self.author, text='Жираф'
+        )
+        self.assertEqual(self.ids('жираф'), [post.pk])
+        comment.delete()
+        self.assertEqual(self.ids('жираф'), [])
+
+        post.text = 'Слон'
+        post.save()
+        self.assertEqual(self.ids('пост'), [])
+        self.assertEqual(self.ids('слон'), [post.pk])
+
+    def test_words_from_one_document(self):
+        """Слова из поста и из комментария к нему вместе не совпадают."""
+        post = Post.objects.create(author=self.author, text='Зебра')
+        Comment.objects.create(post=post, author=self.author, text='Пони')
+        self.assertEqual(self.ids('зебра пони'), [])
+        self.assertEqual(search.search_posts('зебра пони').count(), 0)
+        Comment.objects.create(
+            post=post, author=self.author, text='Зебра и пони'
+        )
+        self.assertEqual(self.ids('зебра пони'), [post.pk])
+        self.assertEqual(search.search_posts('зебра пони').count(), 1)
+
+    def test_rebuild(self):
+        """Команда пересборки восстанавливает индекс."""
+        post = Post.objects.create(author=self.author, text='Бегемот')
+        search.get_backend().clear()
+        self.assertEqual(self.ids('бегемот'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.ids('бегемот'), [post.pk])
+
+    def test_search_page(self):
+        """Страница поиска выводит найденные посты и листается."""
+        for i in range(12):
+            Post.objects.create(author=self.author, text=f'Енот {i}')
+        Post.objects.create(author=self.author, text='Лиса')
+        response = self.client.get(reverse('posts:search'), {'q': 'енот'})
+        self.assertEqual(response.context['page_obj'].paginator.count, 12)
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertContains(response, '?q=%D0%B5%D0%BD%D0%BE%D1%82&amp;page=2')
+        response = self.client.get(
+            reverse('posts:search'), {'q': 'енот', 'page': 2}
+        )
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    def test_admin_search(self):
+        """Поиск в админке использует индекс."""
+        Post.objects.create(author=self.author, text='Барсук')
+        Post.objects.create(author=self.author, text='Хорёк')
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'барсук'}
+        )
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+
+class Fts5SearchTests(SearchMixin, TestCase):
+    def setUp(self):
+        if search.get_backend().name != 'fts5':
+            self.skipTest('SQLite собран без FTS5')
+
+
+@override_settings(SEARCH_BACKEND='inverted')
+class InvertedIndexSearchTests(SearchMixin, TestCase):
+    def test_entries_count_words(self):
+        """В индексе хранится число вхождений слова."""
+        post = Post.objects.create(author=self.author, text='раз раз два')
+        entry = SearchEntry.objects.get(post=post, term='раз')
+        self.assertEqual(entry.count, 2)
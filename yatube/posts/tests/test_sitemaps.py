@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from xml.etree import ElementTree
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import sitemaps
+from posts.models import Group, Post, User
+
+SITEMAP_ROOT = tempfile.mkdtemp()
+NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+
+def locations(response):
+    root = ElementTree.fromstring(b''.join(response.streaming_content))
+    return [loc.text for loc in root.iter(f'{NS}loc')]
+
+
+@override_settings(SITEMAP_ROOT=SITEMAP_ROOT, SITEMAP_CHUNK_SIZE=5)
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='ilya')
+        Group.objects.create(title='Группа', slug='group', description='-')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {i}')
+            for i in range(7)
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(SITEMAP_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        sitemaps.clear()
+
+    def part(self, name):
+        return os.path.join(SITEMAP_ROOT, 'testserver', f'{name}.xml')
+
+    def test_index_lists_chunks(self):
+        """Индекс перечисляет части разделов по диапазонам id."""
+        response = self.client.get(reverse('posts:sitemap'))
+        names = [url.rsplit('/', 1)[1] for url in locations(response)]
+        last = sitemaps.chunk_of(self.posts[-1].pk)
+        self.assertEqual(names[:last + 1], [
+            f'sitemap-posts-{chunk}.xml' for chunk in range(last + 1)
+        ])
+        self.assertIn('sitemap-groups-0.xml', names)
+        self.assertIn('sitemap-profiles-0.xml', names)
+
+    def test_section_served_from_disk(self):
+        """Часть строится один раз и дальше читается с диска."""
+        chunk = sitemaps.chunk_of(self.posts[0].pk)
+        url = reverse('posts:sitemap_section', args=[f'posts-{chunk}'])
+        urls = locations(self.client.get(url))
+        self.assertIn(
+            'http://testserver' + reverse(
+                'posts:post_detail', args=[self.posts[0].pk]
+            ),
+            urls
+        )
+        self.assertTrue(os.path.exists(self.part(f'posts-{chunk}')))
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:sitemap_section', args=['posts-999'])
+            ).status_code,
+            404
+        )
+
+    def test_new_post_invalidates_only_its_chunk(self):
+        """Новый пост удаляет только файл своей части и индекс."""
+        call_command(
+            'build_sitemaps', base_url='http://testserver/', stdout=StringIO()
+        )
+        first = self.part(f'posts-{sitemaps.chunk_of(self.posts[0].pk)}')
+        self.assertTrue(os.path.exists(first))
+        post = Post.objects.create(author=self.author, text='Новый')
+        last = self.part(f'posts-{sitemaps.chunk_of(post.pk)}')
+        self.assertFalse(os.path.exists(last))
+        self.assertFalse(os.path.exists(self.part('index')))
+        if first != last:
+            self.assertTrue(os.path.exists(first))
+
+    def test_renamed_user_invalidates_profiles(self):
+        """Смена имени пользователя удаляет часть профилей, вход — нет."""
+        user = User.objects.create_user(username='reader')
+        call_command(
+            'build_sitemaps', base_url='http://testserver/', stdout=StringIO()
+        )
+        part = self.part(f'profiles-{sitemaps.chunk_of(user.pk)}')
+        self.client.force_login(user)
+        user.first_name = 'Читатель'
+        user.save()
+        self.assertTrue(os.path.exists(part))
+        user.username = 'renamed'
+        user.save()
+        self.assertFalse(os.path.exists(part))
+        self.assertFalse(os.path.exists(self.part('index')))
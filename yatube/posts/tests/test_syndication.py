@@ -0,0 +1,88 @@
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import feed_cache
+from posts.models import Follow, Group, Post, User
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+
+
+def content(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class SyndicationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='ilya')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        for i in range(5):
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост <{i}>'
+            )
+
+    def setUp(self):
+        caches[settings.POSTS_CACHE_ALIAS].clear()
+
+    def test_rss_and_atom(self):
+        """Ленты сайта, группы и автора отдаются в RSS и Atom."""
+        urls = [
+            reverse('posts:index_feed', args=['rss']),
+            reverse('posts:group_feed', args=['group', 'rss']),
+            reverse('posts:profile_feed', args=['ilya', 'rss']),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response.streaming)
+                self.assertIn('ETag', response)
+                root = ElementTree.fromstring(content(response))
+                titles = [
+                    item.find('title').text for item in root.iter('item')
+                ]
+                self.assertEqual(titles[0], 'Пост <4>')
+                self.assertEqual(len(titles), 5)
+        response = self.client.get(reverse('posts:index_feed', args=['atom']))
+        root = ElementTree.fromstring(content(response))
+        self.assertEqual(len(root.findall(f'{ATOM_NS}entry')), 5)
+        self.assertEqual(self.client.get('/feed.json').status_code, 404)
+
+    @override_settings(SYNDICATION_ITEMS=3)
+    def test_cached_until_post_changes(self):
+        """Повторный опрос берёт документ из кэша до изменения постов."""
+        url = reverse('posts:index_feed', args=['rss'])
+        first = content(self.client.get(url))
+        self.assertEqual(first.count(b'<item>'), 3)
+        with self.assertNumQueries(1):
+            cached = self.client.get(url)
+        self.assertFalse(cached.streaming)
+        self.assertEqual(cached.content, first)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=cached['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        Post.objects.create(author=self.author, text='Свежий')
+        self.assertIn('Свежий', content(self.client.get(url)).decode())
+
+    def test_state_shared_by_readers(self):
+        """ETag ленты не зависит от читателя и подписчиков, а отдача
+        ленты не трогает счётчики кэша фрагментов."""
+        url = reverse('posts:profile_feed', args=['ilya', 'rss'])
+        anonymous = self.client.get(url)['ETag']
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.author)
+        self.client.force_login(reader)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=anonymous)
+        self.assertEqual(response.status_code, 304)
+        counters = feed_cache.counters()
+        self.assertEqual(counters[feed_cache.HIT], 0)
+        self.assertEqual(counters[feed_cache.MISS], 0)
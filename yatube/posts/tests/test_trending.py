@@ -0,0 +1,128 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Comment, Post, TrendingScore, User
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='ilya')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {number}')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def comment(self, post, age=timedelta(0)):
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='Комментарий'
+        )
+        if age:
+            Comment.objects.filter(pk=comment.pk).update(
+                created=timezone.now() - age
+            )
+        return comment
+
+    def test_log_add(self):
+        """Сложение весов в логарифмической шкале."""
+        self.assertAlmostEqual(trending.log_add(3, 3), 4)
+        self.assertAlmostEqual(trending.log_add(1000, 0), 1000)
+
+    def test_fresh_comment_outweighs_old(self):
+        """Свежий комментарий весит больше нескольких старых."""
+        self.comment(self.posts[0], timedelta(days=3))
+        self.comment(self.posts[0], timedelta(days=3))
+        self.comment(self.posts[1])
+        trending.rebuild()
+        self.assertEqual(
+            list(trending.top()[0]), [self.posts[1].pk, self.posts[0].pk]
+        )
+
+    def test_incremental_matches_rebuild(self):
+        """Оценки по сигналам совпадают с полным пересчётом."""
+        for post in (self.posts[2], self.posts[2], self.posts[0]):
+            self.comment(post)
+        incremental = dict(TrendingScore.objects.values_list('post', 'score'))
+        trending.rebuild()
+        rebuilt = dict(TrendingScore.objects.values_list('post', 'score'))
+        self.assertEqual(incremental.keys(), rebuilt.keys())
+        for post_id, score in rebuilt.items():
+            self.assertAlmostEqual(incremental[post_id], score)
+
+    def test_comment_view_updates_cached_top(self):
+        """Комментарий через add_comment сразу меняет порядок."""
+        self.comment(self.posts[0])
+        self.assertEqual(list(trending.top()[0]), [self.posts[0].pk])
+        self.client.force_login(self.user)
+        url = reverse('posts:add_comment', args=[self.posts[1].pk])
+        for _ in range(2):
+            self.client.post(url, {'text': 'Ещё'})
+        with self.assertNumQueries(0):
+            post_ids = list(trending.top()[0])
+        self.assertEqual(post_ids, [self.posts[1].pk, self.posts[0].pk])
+
+    def test_deleted_comment_lowers_score(self):
+        """Удалённый комментарий вычитает свой вес из оценки поста."""
+        first = self.comment(self.posts[0])
+        second = self.comment(self.posts[0])
+        self.comment(self.posts[1])
+        self.assertEqual(list(trending.top()[0])[0], self.posts[0].pk)
+        first.delete()
+        self.assertAlmostEqual(
+            TrendingScore.objects.get(post=self.posts[0]).score,
+            trending.weight(second.created)
+        )
+        second.delete()
+        self.assertFalse(
+            TrendingScore.objects.filter(post=self.posts[0]).exists()
+        )
+        self.assertEqual(list(trending.top()[0]), [self.posts[1].pk])
+
+    @override_settings(TRENDING_SIZE=2)
+    def test_top_size(self):
+        """В кэше хранится не больше TRENDING_SIZE постов."""
+        trending.top()
+        for post in self.posts:
+            self.comment(post)
+        self.assertEqual(len(trending.top()[0]), 2)
+
+    def test_deleted_post_dropped(self):
+        """Удалённый пост пропадает из обсуждаемых."""
+        post = Post.objects.create(author=self.user, text='Удаляемый')
+        self.comment(post)
+        self.comment(self.posts[1])
+        trending.top()
+        post.delete()
+        self.assertEqual(list(trending.top()[0]), [self.posts[1].pk])
+
+    def test_page_constant_queries(self):
+        """Страница читает посты одним запросом по id."""
+        for post in self.posts:
+            self.comment(post)
+        url = reverse('posts:trending')
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            list(trending.top()[0])
+        )
+        self.assertTemplateUsed(response, 'posts/trending.html')
+
+    def test_switcher_tab(self):
+        """Вкладка обсуждаемого есть в переключателе лент."""
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, reverse('posts:trending'))
@@ -8,6 +8,7 @@ from django import forms
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
 
+from posts import feed_cache
 from posts.models import Group, Post, User, Follow
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -201,15 +202,52 @@ class PostPagesTests(TestCase):
     def test_cache_index(self):
         """Проверка хранения и очищения кэша для index."""
         first_response = self.authorized_client.get(PostPagesTests.index_page)
-        post = Post.objects.get(pk=1)
-        post.text = 'Измененный текст'
-        post.save()
+        Post.objects.filter(pk=PostPagesTests.post.pk).update(
+            text='Измененный текст'
+        )
         second_response = self.authorized_client.get(PostPagesTests.index_page)
         self.assertEqual(first_response.content, second_response.content)
         cache.clear()
         third_response = self.authorized_client.get(PostPagesTests.index_page)
         self.assertNotEqual(first_response.content, third_response.content)
 
+    def test_cache_index_invalidated_on_save(self):
+        """Сохранение поста сбрасывает кэш index, страницы кэшируются
+        отдельно."""
+        first_response = self.authorized_client.get(PostPagesTests.index_page)
+        post = Post.objects.get(pk=PostPagesTests.post.pk)
+        post.text = 'Измененный текст'
+        post.save()
+        second_response = self.authorized_client.get(PostPagesTests.index_page)
+        self.assertNotEqual(first_response.content, second_response.content)
+        self.assertContains(second_response, post.text)
+        Post.objects.bulk_create([
+            Post(author=PostPagesTests.user, text=f'Тестовый пост {i}')
+            for i in range(10)
+        ])
+        cache.clear()
+        self.authorized_client.get(PostPagesTests.index_page)
+        next_page = self.authorized_client.get(
+            PostPagesTests.index_page, {'page': 2}
+        )
+        self.assertContains(next_page, post.text)
+
+    def test_cache_index_counters(self):
+        """Кэш index считает попадания и промахи."""
+        self.authorized_client.get(PostPagesTests.index_page)
+        self.authorized_client.get(PostPagesTests.index_page)
+        counters = feed_cache.counters()
+        self.assertEqual(counters['hits'], 1)
+        self.assertEqual(counters['misses'], 1)
+
+    def test_version_not_reused_after_eviction(self):
+        """После вытеснения ключа версии старые номера не возвращаются."""
+        versions = {feed_cache.version()}
+        feed_cache.invalidate()
+        versions.add(feed_cache.version())
+        feed_cache.get_cache().delete(feed_cache.VERSION_KEY)
+        self.assertNotIn(feed_cache.version(), versions)
+
     def test_authorized_user_can_follow(self):
         """Авторизованный пользователь может подписаться на автора
         и отписаться."""
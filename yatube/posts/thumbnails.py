@@ -0,0 +1,79 @@
+"""Фоновая подготовка миниатюр картинок постов.
+
+Миниатюра строится пулом потоков после коммита транзакции, в которой
+загружена картинка, и сохраняется в полях ``Post.thumbnail*``. Шаблоны
+выводят готовый файл и никогда не вызывают Pillow во время запроса.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from sorl.thumbnail import get_thumbnail
+
+from . import feed_cache
+from .models import Post
+
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+logger = logging.getLogger(__name__)
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails'
+        )
+    return _executor
+
+
+def generate(post_id):
+    """Строит миниатюру картинки поста и записывает её в пост."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return None
+    thumbnail = get_thumbnail(
+        post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS
+    )
+    # Картинку могли заменить, пока строилась миниатюра.
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnail=thumbnail.name,
+        thumbnail_width=thumbnail.width,
+        thumbnail_height=thumbnail.height
+    )
+    if updated:
+        feed_cache.invalidate()
+    return thumbnail
+
+
+def generate_in_worker(post_id):
+    """Обёртка для пула: логирует ошибки и закрывает соединение потока."""
+    try:
+        return generate(post_id)
+    except Exception:
+        logger.exception('Не удалось построить миниатюру поста %s', post_id)
+    finally:
+        connection.close()
+
+
+def schedule(post):
+    """Ставит построение миниатюры в очередь после коммита транзакции.
+
+    При ``THUMBNAIL_ASYNC = False`` миниатюра строится сразу.
+    """
+    if post.thumbnail:
+        Post.objects.filter(pk=post.pk).update(
+            thumbnail='', thumbnail_width=None, thumbnail_height=None
+        )
+    if not post.image:
+        return
+    if not settings.THUMBNAIL_ASYNC:
+        generate(post.pk)
+        return
+    transaction.on_commit(
+        lambda: get_executor().submit(generate_in_worker, post.pk)
+    )
@@ -0,0 +1,160 @@
+"""Обсуждаемые посты: оценка с затуханием по времени.
+
+Каждый комментарий добавляет посту вес, который вдвое падает каждые
+``TRENDING_HALF_LIFE_HOURS`` часов. Чтобы не пересчитывать все оценки по
+мере старения, вес хранится относительно фиксированной эпохи и в
+логарифмической шкале: комментарий в момент ``t`` весит
+``2 ** ((t - EPOCH) / half_life)``, а в ``TrendingScore.score`` лежит
+``log2`` суммы весов. Затухание одинаково для всех постов, поэтому
+порядок по такой оценке совпадает с порядком по текущей, а новый
+комментарий меняет только оценку своего поста.
+
+Лучшие ``TRENDING_SIZE`` постов хранятся в кэше двумя массивами (id и
+оценки) по убыванию оценки. Сигнал комментария правит их на месте, а
+страница ленты берёт срез id и читает посты одним запросом по ключу.
+Правка списка — чтение и запись без блокировки, поэтому он живёт не
+дольше ``TRENDING_CACHE_TIMEOUT`` секунд и затем перечитывается из
+``TrendingScore``: потерянная параллельная правка не держится дольше.
+
+Удалённый комментарий вычитает свой вес из оценки поста; если это был
+последний комментарий, оценка удаляется.
+"""
+import math
+from array import array
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import transaction
+
+from .feed_cache import get_cache
+from .models import Comment, Post, TrendingScore
+
+TOP_KEY = 'posts:trending:top'
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def weight(moment):
+    """log2 веса события в момент ``moment``."""
+    half_life = settings.TRENDING_HALF_LIFE_HOURS * 3600
+    return (moment - EPOCH).total_seconds() / half_life
+
+
+def log_add(first, second):
+    """log2(2 ** first + 2 ** second) без переполнения."""
+    high, low = max(first, second), min(first, second)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def log_sub(first, second):
+    """log2(2 ** first - 2 ** second) или None, если разность не
+    больше нуля с точностью вычислений."""
+    if first - second < 1e-9:
+        return None
+    return first + math.log2(1 - 2 ** (second - first))
+
+
+def load_top():
+    """Лучшие посты из таблицы оценок: (массив id, массив оценок)."""
+    rows = TrendingScore.objects.order_by('-score').values_list(
+        'post_id', 'score'
+    )[:settings.TRENDING_SIZE]
+    rows = list(rows)
+    return (
+        array('q', [post_id for post_id, _ in rows]),
+        array('d', [score for _, score in rows]),
+    )
+
+
+def top():
+    cache = get_cache()
+    cached = cache.get(TOP_KEY)
+    if cached is None:
+        cached = load_top()
+        cache.set(TOP_KEY, cached, settings.TRENDING_CACHE_TIMEOUT)
+    return cached
+
+
+def place(post_id, score):
+    """Ставит пост с новой оценкой в закэшированный список лучших."""
+    cache = get_cache()
+    cached = cache.get(TOP_KEY)
+    if cached is None:
+        return
+    ranking = {
+        ranked_id: ranked_score for ranked_id, ranked_score in zip(*cached)
+    }
+    ranking[post_id] = score
+    best = sorted(
+        ranking.items(), key=lambda item: item[1], reverse=True
+    )[:settings.TRENDING_SIZE]
+    cache.set(TOP_KEY, (
+        array('q', [ranked_id for ranked_id, _ in best]),
+        array('d', [ranked_score for _, ranked_score in best]),
+    ), settings.TRENDING_CACHE_TIMEOUT)
+
+
+def remove(post_id):
+    """Убирает удалённый пост из списка лучших."""
+    cache = get_cache()
+    cached = cache.get(TOP_KEY)
+    if cached is None or post_id not in cached[0]:
+        return
+    cache.delete(TOP_KEY)
+
+
+def add_comment(comment):
+    """Добавляет вес нового комментария к оценке его поста."""
+    added = weight(comment.created)
+    with transaction.atomic():
+        score, created = TrendingScore.objects.select_for_update(
+        ).get_or_create(post_id=comment.post_id, defaults={'score': added})
+        if not created:
+            score.score = log_add(score.score, added)
+            score.save(update_fields=['score'])
+    place(comment.post_id, score.score)
+
+
+def remove_comment(comment):
+    """Вычитает вес удалённого комментария из оценки его поста."""
+    with transaction.atomic():
+        score = TrendingScore.objects.select_for_update().filter(
+            post_id=comment.post_id
+        ).first()
+        if score is None:
+            return
+        lowered = log_sub(score.score, weight(comment.created))
+        if lowered is None:
+            score.delete()
+        else:
+            score.score = lowered
+            score.save(update_fields=['score'])
+    # Пост мог опуститься ниже постов, которых нет в списке лучших.
+    remove(comment.post_id)
+
+
+def rebuild():
+    """Пересчитывает все оценки по комментариям. Возвращает их число."""
+    scores = {}
+    comments = Comment.objects.order_by().values_list('post_id', 'created')
+    for post_id, created in comments.iterator(chunk_size=2000):
+        added = weight(created)
+        scores[post_id] = (
+            log_add(scores[post_id], added) if post_id in scores else added
+        )
+    with transaction.atomic():
+        TrendingScore.objects.all().delete()
+        TrendingScore.objects.bulk_create(
+            (
+                TrendingScore(post_id=post_id, score=score)
+                for post_id, score in scores.items()
+            ),
+            batch_size=500
+        )
+    get_cache().delete(TOP_KEY)
+    return len(scores)
+
+
+def page_posts(page_ids):
+    """Посты страницы в порядке ``page_ids`` одним запросом."""
+    posts = Post.objects.select_related('author', 'group').in_bulk(page_ids)
+    return [posts[pk] for pk in page_ids if pk in posts]
@@ -5,7 +5,13 @@ from . import views
 app_name = 'posts'
 
 urlpatterns = [
+    path('groups/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/feed.<str:kind>',
+        views.group_feed,
+        name='group_feed'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -13,7 +19,16 @@ urlpatterns = [
     path(
         'posts/<int:post_id>/comment/', views.add_comment, name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/events/', views.follow_events, name='follow_events'),
+    path('follow/new/', views.follow_new, name='follow_new'),
+    path('search/', views.search_posts, name='search'),
+    path('trending/', views.trending_posts, name='trending'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -24,5 +39,17 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path(
+        'profile/<str:username>/feed.<str:kind>',
+        views.profile_feed,
+        name='profile_feed'
+    ),
+    path('feed.<str:kind>', views.index_feed, name='index_feed'),
+    path('sitemap.xml', views.sitemap_index, name='sitemap'),
+    path(
+        'sitemap-<str:name>.xml',
+        views.sitemap_section,
+        name='sitemap_section'
+    ),
     path('', views.index, name='index'),
 ]
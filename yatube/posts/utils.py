@@ -1,11 +1,235 @@
-from django.core.paginator import Paginator
+from django.core.paginator import (
+    EmptyPage, Page, PageNotAnInteger, Paginator
+)
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes, force_str
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 
 
 POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+# Сколько номеров страниц показывать по обе стороны от текущей.
+PAGE_WINDOW = 2
 
+FORWARD = 'n'
+BACKWARD = 'p'
 
-def get_page_context(queryset, request):
-    paginator = Paginator(queryset, POSTS_PER_PAGE)
+
+def encode_cursor(direction, value, pk, number):
+    """Упаковывает направление, позицию (дата, id) и номер страницы
+    в непрозрачный токен для ссылки."""
+    raw = f'{direction}|{value.isoformat()}|{pk}|{number}'
+    return urlsafe_base64_encode(force_bytes(raw))
+
+
+def decode_cursor(token):
+    """Распаковывает токен курсора. Для битого токена возвращает None."""
+    try:
+        direction, value, pk, number = force_str(
+            urlsafe_base64_decode(token)
+        ).split('|')
+        value = parse_datetime(value)
+        pk, number = int(pk), int(number)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if direction not in (FORWARD, BACKWARD) or value is None:
+        return None
+    return direction, value, pk, max(number, 1)
+
+
+def page_window(number, num_pages, radius=PAGE_WINDOW):
+    """Номера страниц вокруг текущей плюс первая и последняя.
+
+    Пропуски между ними обозначаются ``None``: для страницы 50 из 100
+    получится ``[1, None, 48, 49, 50, 51, 52, None, 100]``.
+    """
+    numbers = sorted(
+        {1, num_pages} | set(range(
+            max(number - radius, 1), min(number + radius, num_pages) + 1
+        ))
+    )
+    window = []
+    for current in numbers:
+        if window and current - window[-1] > 1:
+            window.append(None)
+        window.append(current)
+    return window
+
+
+class WindowedPage(Page):
+    @cached_property
+    def window(self):
+        return page_window(self.number, self.paginator.num_pages)
+
+
+class WindowedPaginator(Paginator):
+    """Пагинатор по номерам страниц для шаблона с окном номеров.
+
+    Вместо ``COUNT(*)`` можно передать в ``count`` приблизительное число
+    записей числом или функцией, например из ``page_counts``. Оно может
+    отставать, поэтому страница читается с одной лишней записью и число
+    страниц не бывает меньше реально найденных. Точный ``COUNT(*)``
+    делается, только если запрошенная страница оказалась за концом.
+    """
+
+    def __init__(self, object_list, per_page, count=None):
+        super().__init__(object_list, per_page)
+        self._count = count
+
+    @cached_property
+    def approximate_count(self):
+        if callable(self._count):
+            return self._count()
+        return self._count
+
+    def get_page(self, number):
+        if self._count is None:
+            return super().get_page(number)
+        try:
+            return self.page(number)
+        except PageNotAnInteger:
+            return self.page(1)
+        except EmptyPage:
+            # За концом ленты: считаем точно и отдаём последнюю страницу.
+            self._count = None
+            self.__dict__.pop('count', None)
+            self.__dict__.pop('num_pages', None)
+            return super().page(self.num_pages)
+
+    def page(self, number):
+        if self._count is None:
+            return super().page(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть числом.')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1.')
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('На этой странице нет записей.')
+        self.count = max(self.approximate_count, bottom + len(rows))
+        self.__dict__.pop('num_pages', None)
+        return self._get_page(rows[:self.per_page], number, self)
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор по ключу (дата, id) без OFFSET и COUNT(*).
+
+    Страница выбирается условием по индексу поля ``key`` (по умолчанию
+    ``pub_date``), поэтому глубокие страницы стоят столько же, сколько
+    первая. Общее число записей не считается: его можно передать в
+    ``count`` числом или функцией, тогда оно показывается как
+    приблизительное.
+    """
+    cursor_based = True
+
+    def __init__(self, object_list, per_page, count=None, key='pub_date'):
+        super().__init__(object_list.order_by(f'-{key}', '-pk'), per_page)
+        self.key = key
+        self._count = count
+        self._number = 1
+        self._has_more = False
+        self._fetched = 0
+
+    @cached_property
+    def approximate_count(self):
+        if callable(self._count):
+            return self._count()
+        return self._count
+
+    @cached_property
+    def count(self):
+        known = (self._number - 1) * self.per_page + self._fetched
+        if self.approximate_count is None:
+            return known
+        return max(known, self.approximate_count)
+
+    @cached_property
+    def num_pages(self):
+        if not self._has_more:
+            return self._number
+        if self.approximate_count is None:
+            return self._number + 1
+        return max(
+            self._number + 1, -(-self.approximate_count // self.per_page)
+        )
+
+    def cursor_page(self, token):
+        """Возвращает страницу по токену курсора; без токена или с битым
+        токеном — первую страницу."""
+        cursor = decode_cursor(token) if token else None
+        if cursor is None:
+            return self._make_page(self.object_list, 1)
+        direction, value, pk, number = cursor
+        key = self.key
+        if direction == FORWARD:
+            queryset = self.object_list.filter(
+                Q(**{f'{key}__lt': value}) | Q(**{key: value, 'pk__lt': pk})
+            )
+            return self._make_page(queryset, number)
+        queryset = self.object_list.filter(
+            Q(**{f'{key}__gt': value}) | Q(**{key: value, 'pk__gt': pk})
+        ).order_by(key, 'pk')
+        return self._make_page(queryset, number, backwards=True)
+
+    def _make_page(self, queryset, number, backwards=False):
+        rows = list(queryset[:self.per_page + 1])
+        overflow = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            if not overflow:
+                # Дошли до начала ленты: отдаём полноценную первую страницу.
+                return self._make_page(self.object_list, 1)
+            rows.reverse()
+            number = max(number, 2)
+        self._number = number
+        self._has_more = backwards or overflow
+        self._fetched = len(rows)
+        page = Page(rows, number, self)
+        page.next_cursor = (
+            self._encode(FORWARD, rows[-1], number + 1)
+            if self._has_more else None
+        )
+        page.previous_cursor = (
+            self._encode(BACKWARD, rows[0], number - 1)
+            if number > 1 and rows else None
+        )
+        return page
+
+    def _encode(self, direction, obj, number):
+        if isinstance(obj, dict):
+            # Строка из values(): ключ и id должны быть среди полей.
+            return encode_cursor(direction, obj[self.key], obj['id'], number)
+        return encode_cursor(
+            direction, getattr(obj, self.key), obj.pk, number
+        )
+
+
+def get_page_context(queryset, request, count=None):
+    """Постраничный вывод ленты.
+
+    По умолчанию лента листается курсором ``?cursor=``. Старые ссылки
+    вида ``?page=N`` обслуживаются ``WindowedPaginator``. Оба берут
+    общее число из ``count``, если оно передано.
+    """
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return page_obj
+    if page_number is not None:
+        paginator = WindowedPaginator(queryset, POSTS_PER_PAGE, count=count)
+        return paginator.get_page(page_number)
+    paginator = CursorPaginator(queryset, POSTS_PER_PAGE, count=count)
+    return paginator.cursor_page(request.GET.get('cursor'))
+
+
+def get_comments_page(comments, cursor=None):
+    """Страница комментариев вместе с авторами, листается курсором."""
+    paginator = CursorPaginator(
+        comments.select_related('author'), COMMENTS_PER_PAGE, key='created'
+    )
+    return paginator.cursor_page(cursor)
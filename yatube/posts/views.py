@@ -1,60 +1,191 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.conf import settings
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
+from django.db import IntegrityError, transaction
 
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from core.ratelimit import rate_limited
+
+from . import (
+    follow_graph, groups, notifications, page_counts, recommendations,
+    search, sitemaps, stats, syndication, thumbnails, trending
+)
+from .conditional import (
+    conditional, follow_index_state, group_feed_state, group_state,
+    index_state, post_detail_state, profile_feed_state, profile_state
+)
+from .feed import as_posts, follow_feed, newer_posts
 from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Follow
-from .utils import get_page_context
+from .models import Post, Group, User, Follow, Comment
+from .utils import (
+    POSTS_PER_PAGE, WindowedPaginator, get_comments_page, get_page_context
+)
 
 
+@conditional(index_state)
 def index(request):
     page_obj = get_page_context(
-        Post.objects.select_related('author', 'group'), request
+        Post.objects.select_related('author', 'group'), request,
+        count=page_counts.site
     )
-    return render(request, 'posts/index.html', context={'page_obj': page_obj})
+    context = {
+        'page_obj': page_obj,
+        'follows': follow_graph.for_request(request)
+    }
+    return render(request, 'posts/index.html', context)
 
 
+def trending_posts(request):
+    post_ids, _ = trending.top()
+    page_obj = WindowedPaginator(post_ids, POSTS_PER_PAGE).get_page(
+        request.GET.get('page')
+    )
+    page_obj.object_list = trending.page_posts(list(page_obj.object_list))
+    context = {
+        'page_obj': page_obj,
+        'follows': follow_graph.for_request(request)
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+def group_index(request):
+    order = request.GET.get('sort')
+    if order not in groups.ORDERS:
+        order = groups.DEFAULT_ORDER
+    context = {
+        'groups': groups.directory(order),
+        'order': order
+    }
+    return render(request, 'posts/groups.html', context)
+
+
+@conditional(group_state)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     page_obj = get_page_context(
-        group.posts.select_related('author', 'group'), request
+        group.posts.select_related('author', 'group'), request,
+        count=lambda: page_counts.group(group.pk)
     )
     context = {
         'group': group,
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'follows': follow_graph.for_request(request)
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional(profile_state)
 def profile(request, username):
     author = get_object_or_404(User, username=username)
     page_obj = get_page_context(
-        author.posts.select_related('author', 'group'), request
-    )
-    following = (
-        request.user.is_authenticated
-        and Follow.objects.filter(user=request.user, author=author).exists()
+        author.posts.select_related('author', 'group'), request,
+        count=lambda: page_counts.author(author.pk)
     )
     context = {
         'author': author,
+        'author_stats': stats.for_user(author),
         'page_obj': page_obj,
-        'following': following
+        'following': author.pk in follow_graph.for_request(request),
+        'suggestions': recommendations.for_request(request)
     }
     return render(request, 'posts/profile.html', context)
 
 
+@conditional(index_state, per_reader=False)
+def index_feed(request, kind):
+    return syndication.feed_response(
+        request, kind, 'index', 'Последние обновления на сайте',
+        reverse('posts:index'), Post.objects.all()
+    )
+
+
+@conditional(group_feed_state, per_reader=False)
+def group_feed(request, slug, kind):
+    group = get_object_or_404(Group, slug=slug)
+    return syndication.feed_response(
+        request, kind, f'group:{group.pk}', f'Записи сообщества {group}',
+        reverse('posts:group_list', args=[slug]), group.posts.all()
+    )
+
+
+@conditional(profile_feed_state, per_reader=False)
+def profile_feed(request, username, kind):
+    author = get_object_or_404(User, username=username)
+    return syndication.feed_response(
+        request, kind, f'author:{author.pk}',
+        f'Записи {author.get_full_name() or author.username}',
+        reverse('posts:profile', args=[username]), author.posts.all()
+    )
+
+
+def sitemap_base_url(request):
+    return settings.SITEMAP_BASE_URL or request.build_absolute_uri('/')
+
+
+def sitemap_index(request):
+    return FileResponse(
+        sitemaps.open_part(sitemap_base_url(request), sitemaps.INDEX),
+        content_type='application/xml'
+    )
+
+
+def sitemap_section(request, name):
+    parsed = sitemaps.parse_name(name)
+    if parsed is None or parsed[1] >= sitemaps.chunk_count(parsed[0]):
+        raise Http404
+    return FileResponse(
+        sitemaps.open_part(sitemap_base_url(request), name),
+        content_type='application/xml'
+    )
+
+
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    paginator = WindowedPaginator(
+        search.search_posts(query), POSTS_PER_PAGE
+    )
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'query_prefix': urlencode({'q': query}) + '&',
+        'page_obj': page_obj
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@conditional(post_detail_state)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), id=post_id
+    )
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    comments = get_comments_page(post.comments.all())
     context = {
         'post': post,
+        'author_stats': stats.for_user(post.author),
         'form': form,
         'comments': comments
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments = get_comments_page(
+        Comment.objects.filter(post_id=post_id), request.GET.get('cursor')
+    )
+    context = {
+        'post_id': post_id,
+        'comments': comments
+    }
+    return render(request, 'includes/comments.html', context)
+
+
 @login_required
+@rate_limited
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
 
@@ -62,6 +193,7 @@ def post_create(request):
         form = form.save(commit=False)
         form.author = request.user
         form.save()
+        thumbnails.schedule(form)
         return redirect('posts:profile', username=request.user.username)
 
     context = {
@@ -85,7 +217,9 @@ def post_edit(request, post_id):
     is_edit = True
 
     if form.is_valid():
-        form.save()
+        post = form.save()
+        if 'image' in form.changed_data:
+            thumbnails.schedule(post)
         return redirect('posts:post_detail', post_id=post.pk)
 
     context = {
@@ -96,6 +230,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@rate_limited
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -108,30 +243,73 @@ def add_comment(request, post_id):
 
 
 @login_required
+@conditional(follow_index_state)
 def follow_index(request):
-    page_obj = get_page_context(
-        Post.objects.filter(
-            author__following__user=request.user
-        ).select_related('author'),
-        request
+    page_obj = as_posts(
+        get_page_context(
+            follow_feed(request.user), request,
+            count=lambda: page_counts.follows(request.user.pk)
+        )
+    )
+    context = {
+        'page_obj': page_obj,
+        'suggestions': recommendations.for_request(request),
+        'notifications_stream': settings.NOTIFICATIONS_STREAM,
+        'poll_interval': settings.NOTIFICATIONS_POLL_INTERVAL * 1000
+    }
+    return render(request, 'posts/follow.html', context)
+
+
+@login_required
+def follow_events(request):
+    if not settings.NOTIFICATIONS_STREAM:
+        raise Http404('Поток уведомлений выключен.')
+    authors = Follow.objects.filter(user=request.user).values_list(
+        'author_id', flat=True
     )
-    return render(request, 'posts/follow.html', context={'page_obj': page_obj})
+    response = StreamingHttpResponse(
+        notifications.event_stream(list(authors)),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+def follow_new(request):
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        after = 0
+    posts = newer_posts(request.user, after, POSTS_PER_PAGE)
+    response = render(request, 'includes/new_posts.html', {'posts': posts})
+    response['X-Latest-Post'] = max([post.pk for post in posts] + [after])
+    response['X-New-Posts'] = len(posts)
+    return response
 
 
 @login_required
+@rate_limited
 def profile_follow(request, username):
-    user = request.user
-    author = User.objects.get(username=username)
-    follower = Follow.objects.filter(user=user, author=author)
-    if user != author and not follower.exists():
-        Follow.objects.create(user=user, author=author)
+    author_id = get_object_or_404(
+        User.objects.values_list('pk', flat=True), username=username
+    )
+    if author_id != request.user.pk:
+        # Граф подписок в кэше может отставать от таблицы, поэтому здесь
+        # он не проверяется: повторную подписку отсекает индекс.
+        try:
+            with transaction.atomic():
+                Follow.objects.create(user=request.user, author_id=author_id)
+        except IntegrityError:
+            pass
     return redirect('posts:profile', username=username)
 
 
 @login_required
+@rate_limited
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    follower = Follow.objects.filter(user=request.user, author=author)
-    if follower.exists():
-        follower.delete()
+    Follow.objects.filter(
+        user=request.user, author__username=username
+    ).delete()
     return redirect('posts:profile', username=username)
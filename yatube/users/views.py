@@ -1,8 +1,12 @@
+from django.utils.decorators import method_decorator
 from django.views.generic import CreateView
 from django.urls import reverse_lazy
+
+from core.ratelimit import rate_limited
 from .forms import CreationForm
 
 
+@method_decorator(rate_limited, name='dispatch')
 class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
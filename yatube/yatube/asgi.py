@@ -0,0 +1,15 @@
+"""ASGI-точка входа, например: ``uvicorn yatube.asgi:application``."""
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import AsgiHandler
+from core.templates import warm_up
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = AsgiHandler(get_wsgi_application())
+
+if settings.TEMPLATE_WARM_UP:
+    warm_up()
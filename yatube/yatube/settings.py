@@ -1,5 +1,7 @@
 import os
 
+from core.caches import cache_from_url, is_shared
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -36,16 +38,18 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
     'debug_toolbar',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.CachedUserMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -54,12 +58,27 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
+# TEMPLATE_CACHE: разобранные шаблоны хранятся в памяти процесса
+# (cached.Loader) и не перечитываются с диска; по умолчанию — когда DEBUG
+# выключен. TEMPLATE_WARM_UP: компилировать все шаблоны из templates/ при
+# старте процесса (yatube/wsgi.py, yatube/asgi.py), а не на первых запросах.
+TEMPLATE_CACHE = os.environ.get(
+    'YATUBE_TEMPLATE_CACHE', '0' if DEBUG else '1'
+) == '1'
+TEMPLATE_WARM_UP = TEMPLATE_CACHE
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)
+            ] if TEMPLATE_CACHE else TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -73,6 +92,13 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Размер пула потоков, в котором ASGI-приложение (yatube/asgi.py)
+# выполняет синхронные view Django.
+ASGI_THREADS = int(os.getenv('YATUBE_ASGI_THREADS', 8))
+# Потоковый ответ (SSE, RSS) читается в своём потоке, поэтому число
+# одновременно открытых потоковых ответов ограничено, сверх него — 503.
+ASGI_STREAMS = int(os.getenv('YATUBE_ASGI_STREAMS', 32))
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -135,12 +161,195 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Миниатюры картинок постов строятся пулом потоков при загрузке.
+THUMBNAIL_ASYNC = True
+THUMBNAIL_WORKERS = 2
+
+# Бэкенд кэша задаётся адресом, см. core/caches.py. Для нескольких
+# воркеров нужен общий бэкенд (file://, db://, memcached://, redis://),
+# иначе у каждого процесса свой холодный кэш и своя версия ленты.
+CACHE_URL = os.environ.get('YATUBE_CACHE_URL', 'locmem://')
+POSTS_CACHE_URL = os.environ.get('YATUBE_POSTS_CACHE_URL', CACHE_URL)
+
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': cache_from_url(CACHE_URL, KEY_PREFIX='yatube'),
+    'posts': cache_from_url(POSTS_CACHE_URL, KEY_PREFIX='yatube'),
+}
+
+# Хранилище сессий, YATUBE_SESSIONS: 'cache' — кэш с записью в БД
+# (cached_db), 'cookies' — подписанные куки, 'db' — только БД. Кэш в
+# памяти процесса не видит выхода и смены пароля в других воркерах,
+# поэтому без общего кэша по умолчанию сессии хранятся в БД.
+SESSION_ENGINES = {
+    'cache': 'django.contrib.sessions.backends.cached_db',
+    'cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'db': 'django.contrib.sessions.backends.db',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get(
+    'YATUBE_SESSIONS', 'cache' if is_shared(CACHE_URL) else 'db'
+)]
+SESSION_CACHE_ALIAS = 'default'
+
+# Пользователь запроса кэшируется на USER_CACHE_TIMEOUT секунд
+# (core.auth); 0 — читать из БД на каждый запрос. Сброс кэша при смене
+# пароля виден всем воркерам только в общем кэше, поэтому с кэшем в
+# памяти процесса кэширование по умолчанию выключено.
+USER_CACHE_ALIAS = 'default'
+USER_CACHE_TIMEOUT = int(os.environ.get(
+    'YATUBE_USER_CACHE_TIMEOUT', 60 if is_shared(CACHE_URL) else 0
+))
+
+# Алиас кэша, через который приложение posts хранит фрагменты ленты,
+# версии и служебные выборки.
+POSTS_CACHE_ALIAS = 'posts'
+
+# Поиск по постам: 'auto' (FTS5, если есть), 'fts5' или 'inverted'.
+SEARCH_BACKEND = 'auto'
+
+# Время жизни закэшированного фрагмента ленты, секунды. Кэш сбрасывается
+# раньше, как только меняется любой пост.
+FEED_CACHE_TIMEOUT = 20
+
+# Сколько последних постов отдавать в RSS/Atom и сколько хранить готовый
+# документ в кэше. Кэш сбрасывается раньше при любом изменении постов.
+SYNDICATION_ITEMS = 50
+SYNDICATION_CACHE_TIMEOUT = 60 * 60
+
+# Уведомления о новых постах (SSE): период пинга и длительность одного
+# соединения в секундах. Каталог для unix-сокетов нужен, чтобы события
+# доходили до всех процессов сервера. Открытый поток держит поток
+# сервера (под WSGI — целый воркер), поэтому по умолчанию он выключен и
+# лента подписок раз в NOTIFICATIONS_POLL_INTERVAL секунд опрашивает
+# follow/new/. YATUBE_NOTIFICATIONS_STREAM=1 включает поток.
+NOTIFICATIONS_STREAM = os.getenv('YATUBE_NOTIFICATIONS_STREAM') == '1'
+NOTIFICATIONS_POLL_INTERVAL = 60
+NOTIFICATIONS_HEARTBEAT = 15
+NOTIFICATIONS_STREAM_TIMEOUT = 60
+NOTIFICATIONS_SOCKET_DIR = os.getenv('YATUBE_NOTIFICATIONS_SOCKET_DIR')
+
+# Ограничение частоты записи, см. core.ratelimit: имя view -> лимиты на
+# пользователя ('user') и на IP ('ip') в виде 'число/период' (s, m, h, d)
+# и методы, которые расходуют лимит (по умолчанию только POST). Методы
+# API делят корзины ('bucket') с формами сайта, делающими то же самое.
+# RATE_LIMIT_TRUSTED_PROXIES — сколько прокси стоит перед приложением и
+# дописывает адрес клиента в X-Forwarded-For.
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT_CACHE_ALIAS = 'default'
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv('YATUBE_TRUSTED_PROXIES', 0))
+RATE_LIMITS = {
+    'posts:post_create': {'user': '10/m', 'ip': '30/m'},
+    'posts:add_comment': {'user': '20/m', 'ip': '60/m'},
+    'posts:profile_follow': {
+        'user': '30/m', 'ip': '60/m', 'methods': ('GET', 'POST'),
+    },
+    'posts:profile_unfollow': {
+        'user': '30/m', 'ip': '60/m', 'methods': ('GET', 'POST'),
+        'bucket': 'posts:profile_follow',
+    },
+    'users:signup': {'ip': '10/h'},
+    'api:posts': {
+        'user': '10/m', 'ip': '30/m', 'bucket': 'posts:post_create',
+    },
+    'api:comments': {
+        'user': '20/m', 'ip': '60/m', 'bucket': 'posts:add_comment',
+    },
+    'api:follows': {
+        'user': '30/m', 'ip': '60/m', 'bucket': 'posts:profile_follow',
+    },
 }
 
+# Файлы карты сайта: каталог, число id в одной части и адрес сайта для
+# ссылок (по умолчанию берётся из запроса).
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+SITEMAP_CHUNK_SIZE = 10000
+SITEMAP_BASE_URL = os.getenv('YATUBE_SITEMAP_BASE_URL')
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
+# Тулбар проверяет только APP_DIRS, а его шаблоны находит
+# app_directories.Loader из TEMPLATE_LOADERS.
+SILENCED_SYSTEM_CHECKS = ['debug_toolbar.W006']
+
+# Приблизительное число постов ленты (сайт, группа, автор, подписки) для
+# пагинатора пересчитывается не чаще раза в столько секунд.
+PAGE_COUNTS_TIMEOUT = 60 * 5
+
+# Материализованная лента подписок: посты раскладываются по входящим лентам
+# подписчиков при публикации. Авторы с числом подписчиков больше лимита
+# читаются на лету, а обратно в раскладку возвращаются, только когда
+# подписчиков становится не больше FOLLOW_FEED_FANOUT_RESUME: иначе
+# подписка и отписка на границе каждый раз запускали бы раскладку всех
+# постов автора. Раскладка идёт в фоновом потоке после коммита
+# (FOLLOW_FEED_BACKFILL_ASYNC). После смены лимитов флаги авторов
+# пересчитывает reconcile_user_stats.
+FOLLOW_FEED_MATERIALIZED = True
+FOLLOW_FEED_FANOUT_LIMIT = 1000
+FOLLOW_FEED_FANOUT_RESUME = 800
+FOLLOW_FEED_BACKFILL_ASYNC = True
+
+# Время жизни подписок пользователя в кэше (posts.follow_graph), секунды.
+# Подписки и отписки правят кэш сразу, но сигналы видны другим воркерам
+# только в общем кэше, поэтому с кэшем в памяти процесса таймаут короткий:
+# он ограничивает расхождение с таблицей.
+FOLLOW_GRAPH_TIMEOUT = int(os.environ.get(
+    'YATUBE_FOLLOW_GRAPH_TIMEOUT',
+    60 * 60 * 24 if is_shared(POSTS_CACHE_URL) else 60
+))
+
+# Рекомендации авторов (posts.recommendations): сколько лучших кандидатов
+# хранить на пользователя, сколько показывать и за сколько дней вдвое
+# падает вес автора без новых постов. Пересчёт — build_recommendations.
+RECOMMENDATIONS_TOP_K = 20
+RECOMMENDATIONS_SHOWN = 5
+RECOMMENDATIONS_HALF_LIFE_DAYS = 30
+
+# Обсуждаемые посты (posts.trending): за сколько часов вдвое падает вес
+# комментария, сколько лучших постов держать в кэше и через сколько
+# секунд перечитывать их из таблицы оценок.
+TRENDING_HALF_LIFE_HOURS = 24
+TRENDING_SIZE = 100
+TRENDING_CACHE_TIMEOUT = 60 * 10
+
+# Время жизни закэшированного каталога групп, секунды. Каталог
+# сбрасывается раньше при любом изменении групп или их постов.
+GROUPS_CACHE_TIMEOUT = 60 * 60
+
+# Профилирование запросов (core.profiling). Сводка пишется в лог
+# yatube.profiling раз в PROFILING_FLUSH_INTERVAL секунд, при заданном
+# YATUBE_PROFILING_LOG — в этот файл.
+PROFILING_ENABLED = True
+PROFILING_FLUSH_INTERVAL = 60
+
+# Бюджеты SQL-запросов на страницу по имени view, замеренные для
+# вошедшего читателя с подписками на холодном кэше (вместе с сессией и
+# пользователем). При превышении в лог пишется предупреждение, тест
+# core.tests.test_profiling следит, чтобы страницы в них укладывались.
+QUERY_BUDGET_DEFAULT = None
+QUERY_BUDGETS = {
+    'posts:index': 6,
+    'posts:group_list': 7,
+    'posts:profile': 9,
+    'posts:post_detail': 7,
+    'posts:follow_index': 9,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'profiling': {
+            'class': 'logging.FileHandler',
+            'filename': os.environ['YATUBE_PROFILING_LOG'],
+        } if os.environ.get('YATUBE_PROFILING_LOG') else {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yatube.profiling': {
+            'handlers': ['profiling'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}